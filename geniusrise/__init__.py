@@ -24,6 +24,7 @@ from geniusrise.core import (
     Output,
     PostgresState,
     RedisState,
+    SQLiteState,
     Spout,
     State,
     StreamingInput,
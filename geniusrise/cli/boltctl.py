@@ -17,6 +17,7 @@
 import argparse
 import json
 import logging
+import os
 import tempfile
 
 import emoji  # type: ignore
@@ -24,6 +25,8 @@ from rich_argparse import RichHelpFormatter
 
 from geniusrise.cli.discover import DiscoveredBolt
 from geniusrise.core import Bolt
+from geniusrise.core.data import serve_metrics
+from geniusrise.core.task import WorkerPool
 from geniusrise.runners.k8s import Deployment, Service, Job, CronJob
 
 
@@ -57,7 +60,7 @@ class BoltCtl:
         run_parser = subparsers.add_parser("rise", help="Run a bolt locally.", formatter_class=RichHelpFormatter)
         run_parser.add_argument("input_type", choices=["batch", "streaming", "batch_to_stream", "stream_to_batch"], help="Choose the type of input data: batch or streaming.", default="batch")
         run_parser.add_argument("output_type", choices=["batch", "streaming", "stream_to_batch"], help="Choose the type of output data: batch or streaming.", default="batch")
-        run_parser.add_argument("state_type", choices=["none", "redis", "postgres", "dynamodb", "prometheus"], help="Select the type of state manager: none, redis, postgres, or dynamodb.", default="none")
+        run_parser.add_argument("state_type", choices=["none", "redis", "postgres", "sqlite", "dynamodb", "prometheus"], help="Select the type of state manager: none, redis, postgres, sqlite, or dynamodb.", default="none")
         # input
         run_parser.add_argument("--buffer_size", help="Specify the size of the buffer.", default=100, type=int)
         run_parser.add_argument("--input_folder", help="Specify the directory where output files should be stored temporarily.", default=tempfile.mkdtemp(), type=str)
@@ -72,6 +75,14 @@ class BoltCtl:
         run_parser.add_argument("--output_kafka_cluster_connection_string", help="Kafka connection string for streaming spouts.", default="localhost:9094", type=str)
         run_parser.add_argument("--output_s3_bucket", help="Provide the name of the S3 bucket for output storage.", default="geniusrise-test", type=str)
         run_parser.add_argument("--output_s3_folder", help="Indicate the S3 folder for output storage.", default="geniusrise", type=str)
+        # output options
+        run_parser.add_argument("--output_format", choices=["json", "jsonl", "jsonl.gz", "jsonl.zst", "parquet"], help="Encoding of the files flushed by stream_to_batch outputs.", default=None, type=str)
+        run_parser.add_argument("--max_file_size", help="Maximum size in bytes of a flushed file.", default=None, type=int)
+        run_parser.add_argument("--buffer_max_bytes", help="Flush once the buffered messages reach this many bytes.", default=None, type=int)
+        run_parser.add_argument("--buffer_max_age", help="Flush once the oldest buffered message is this many seconds old.", default=None, type=float)
+        run_parser.add_argument("--background_flush", action="store_true", help="Write and upload flushed files on a background thread.", default=None)
+        run_parser.add_argument("--producer_profile", choices=["default", "throughput", "durable"], help="Kafka producer profile of streaming outputs.", default=None, type=str)
+        run_parser.add_argument("--serializer", choices=["json", "orjson", "msgpack"], help="Message serializer of streaming outputs.", default=None, type=str)
         # state
         run_parser.add_argument("--redis_host", help="Enter the host address for the Redis server.", default="localhost", type=str)
         run_parser.add_argument("--redis_port", help="Enter the port number for the Redis server.", default=6379, type=int)
@@ -82,16 +93,40 @@ class BoltCtl:
         run_parser.add_argument("--postgres_password", help="Provide the password for the PostgreSQL server.", default="password", type=str)
         run_parser.add_argument("--postgres_database", help="Specify the PostgreSQL database to be used.", default="mydatabase", type=str)
         run_parser.add_argument("--postgres_table", help="Specify the PostgreSQL table to be used.", default="mytable", type=str)
+        run_parser.add_argument("--sqlite_path", help="Specify the SQLite database file.", default="geniusrise.db", type=str)
+        run_parser.add_argument("--sqlite_table", help="Specify the SQLite table to be used.", default="geniusrise_state", type=str)
         run_parser.add_argument("--dynamodb_table_name", help="Provide the name of the DynamoDB table.", default="mytable", type=str)
         run_parser.add_argument("--dynamodb_region_name", help="Specify the AWS region for DynamoDB.", default="us-west-2", type=str)
         run_parser.add_argument("--prometheus_gateway", help="Specify the prometheus gateway URL.", default="localhost:9091", type=str)
+        run_parser.add_argument("--redis_expire", help="Seconds after which Redis state keys expire.", default=None, type=int)
+        run_parser.add_argument("--in_memory_shards", help="Number of lock-striped shards of the in-memory state.", default=None, type=int)
+        run_parser.add_argument("--in_memory_snapshot_path", help="File to snapshot the in-memory state to and reload it from on startup.", default=None, type=str)
+        run_parser.add_argument("--in_memory_snapshot_interval", help="Seconds between snapshots of the in-memory state.", default=None, type=float)
+        run_parser.add_argument("--in_memory_snapshot_format", choices=["pickle", "msgpack"], help="Encoding of the in-memory state snapshots.", default=None, type=str)
+        run_parser.add_argument("--state_write_behind", action="store_true", help="Flush state writes in the background instead of on every set.", default=None)
+        run_parser.add_argument("--state_flush_interval", help="Seconds between background state flushes.", default=None, type=float)
         # function
+        # metrics
+        run_parser.add_argument("--metrics_port", help="Serve Prometheus metrics on this port at /metrics while running.", default=None, type=int)
+        # profiling
+        run_parser.add_argument("--profile", nargs="?", const=True, default=None, type=str, help="Profile the method: wall time, CPU time and peak RSS, plus any comma-separated extra profilers given as --profile=cprofile,tracemalloc.")
+        run_parser.add_argument("--profile_dir", help="Folder the profile artifacts are written to.", default=None, type=str)
+        # logging
+        run_parser.add_argument("--log_format", choices=["text", "json"], help="Log colored text lines or structured JSON lines.", default=None, type=str)
+        run_parser.add_argument("--log_sink", help="Comma-separated sinks JSON logs are shipped to: file, kafka, state.", default=None, type=str)
+        run_parser.add_argument("--log_file", help="Log file of the file sink, rotated by size.", default=None, type=str)
+        run_parser.add_argument("--log_file_max_bytes", help="Size at which the log file is rotated.", default=None, type=int)
+        run_parser.add_argument("--log_kafka_topic", help="Kafka topic of the kafka log sink.", default=None, type=str)
+        run_parser.add_argument("--log_kafka_cluster_connection_string", help="Kafka connection string of the kafka log sink.", default=None, type=str)
+        # workers
+        run_parser.add_argument("--workers", help="Run the bolt in this many worker processes sharing the Kafka consumer group.", default=1, type=int)
+        run_parser.add_argument("--max_restarts", help="Restarts of a crashed worker before giving up on it.", default=5, type=int)
         run_parser.add_argument("method_name", help="The name of the method to execute on the bolt.", type=str)
         run_parser.add_argument("--args", nargs=argparse.REMAINDER, help="Additional keyword arguments to pass to the bolt.")
 
         deploy_parser = subparsers.add_parser("deploy", help="Run a spout remotely.", formatter_class=RichHelpFormatter)
         deploy_parser.add_argument("output_type", choices=["batch", "streaming", "stream_to_batch"], help="Choose the type of output data: batch or streaming.", default="batch")
-        deploy_parser.add_argument("state_type", choices=["none", "redis", "postgres", "dynamodb", "prometheus"], help="Select the type of state manager: none, redis, postgres, or dynamodb.", default="none")
+        deploy_parser.add_argument("state_type", choices=["none", "redis", "postgres", "sqlite", "dynamodb", "prometheus"], help="Select the type of state manager: none, redis, postgres, sqlite, or dynamodb.", default="none")
         deploy_parser.add_argument("deployment_type", choices=["k8s"], help="Choose the type of deployment.", default="k8s")
         # input
         deploy_parser.add_argument("--buffer_size", help="Specify the size of the buffer.", default=100, type=int)
@@ -118,6 +153,8 @@ class BoltCtl:
         deploy_parser.add_argument("--postgres_password", help="Provide the password for the PostgreSQL server.", default="password", type=str)
         deploy_parser.add_argument("--postgres_database", help="Specify the PostgreSQL database to be used.", default="mydatabase", type=str)
         deploy_parser.add_argument("--postgres_table", help="Specify the PostgreSQL table to be used.", default="mytable", type=str)
+        deploy_parser.add_argument("--sqlite_path", help="Specify the SQLite database file.", default="geniusrise.db", type=str)
+        deploy_parser.add_argument("--sqlite_table", help="Specify the SQLite table to be used.", default="geniusrise_state", type=str)
         deploy_parser.add_argument("--dynamodb_table_name", help="Provide the name of the DynamoDB table.", default="mytable", type=str)
         deploy_parser.add_argument("--dynamodb_region_name", help="Specify the AWS region for DynamoDB.", default="us-west-2", type=str)
         deploy_parser.add_argument("--prometheus_gateway", help="Specify the prometheus gateway URL.", default="localhost:9091", type=str)
@@ -164,11 +201,26 @@ class BoltCtl:
                     k: v
                     for k, v in vars(args).items()
                     if v is not None
-                    and k not in ["input_type", "output_type", "state_type", "args", "method_name", "deployment_type"]
+                    and k
+                    not in [
+                        "input_type",
+                        "output_type",
+                        "state_type",
+                        "args",
+                        "method_name",
+                        "deployment_type",
+                        "workers",
+                        "max_restarts",
+                    ]
                 }
                 other = args.args or []
                 other_args, other_kwargs = self.parse_args_kwargs(other)
+                if getattr(args, "workers", 1) > 1:
+                    return self.run_workers(args, other_args, other_kwargs, **kwargs)
+
                 self.bolt = self.create_bolt(args.input_type, args.output_type, args.state_type, **kwargs)
+                if getattr(args, "metrics_port", None):
+                    serve_metrics(self.bolt.state.registry, args.metrics_port)
 
                 # Pass the method_name from args to execute_bolt
                 result = self.execute_bolt(self.bolt, args.method_name, *other_args, **other_kwargs)
@@ -229,7 +281,7 @@ class BoltCtl:
         Args:
             input_type (str): The type of input ("batch" or "streaming").
             output_type (str): The type of output ("batch" or "streaming").
-            state_type (str): The type of state manager ("none", "redis", "postgres", or "dynamodb").
+            state_type (str): The type of state manager ("none", "redis", "postgres", "sqlite", or "dynamodb").
             **kwargs: Additional keyword arguments for initializing the bolt.
                 ```
                 Keyword Arguments:
@@ -274,6 +326,9 @@ class BoltCtl:
                     - postgres_password (str): The PostgreSQL password argument.
                     - postgres_database (str): The PostgreSQL database argument.
                     - postgres_table (str): The PostgreSQL table argument.
+                    SQLite state manager config:
+                    - sqlite_path (str): The SQLite database file.
+                    - sqlite_table (str): The SQLite table argument.
                     DynamoDB state manager config:
                     - dynamodb_table_name (str): The DynamoDB table name argument.
                     - dynamodb_region_name (str): The DynamoDB region name argument.
@@ -292,6 +347,56 @@ class BoltCtl:
             **kwargs,
         )
 
+    def run_workers(self, args, other_args: list, other_kwargs: dict, **kwargs):
+        """
+        Run the bolt in several worker processes, restarting the ones that crash.
+
+        Each worker creates its own bolt, so the workers join one Kafka consumer group and share the partitions
+        of the input topic. Workers get their own `worker-<index>` subfolders of the input and output folders,
+        so their files, like stream segments and upload manifests, do not clash. Metrics of the workers are
+        summed and served on `--metrics_port`, if given.
+
+        Args:
+            args (argparse.Namespace): Parsed command-line arguments.
+            other_args (list): Positional arguments to pass to the method.
+            other_kwargs (dict): Keyword arguments to pass to the method.
+            **kwargs: Keyword arguments for initializing the bolts.
+
+        Returns:
+            Dict[int, Optional[int]]: Last exit code of each worker, all 0.
+
+        Raises:
+            ValueError: If the input type is not read from Kafka.
+            RuntimeError: If any worker did not exit cleanly.
+        """
+        if args.input_type not in ["streaming", "stream_to_batch"]:
+            raise ValueError(f"Invalid input type for workers: {args.input_type}")
+
+        def create(index: int) -> Bolt:
+            folders = {
+                name: os.path.join(kwargs[name], f"worker-{index}")
+                for name in ["input_folder", "output_folder"]
+                if kwargs.get(name)
+            }
+            for folder in folders.values():
+                os.makedirs(folder, exist_ok=True)
+            return self.create_bolt(args.input_type, args.output_type, args.state_type, **{**kwargs, **folders})
+
+        pool = WorkerPool(
+            create,
+            workers=args.workers,
+            max_restarts=args.max_restarts,
+        )
+        if getattr(args, "metrics_port", None):
+            serve_metrics(pool.registry, args.metrics_port)
+
+        exitcodes = pool.run(args.method_name, *other_args, **other_kwargs)
+        failed = {index: code for index, code in exitcodes.items() if code != 0}
+        if failed:
+            raise RuntimeError(f"Workers of the bolt method {args.method_name} failed with exit codes {failed}")
+        self.log.info(emoji.emojize(f"Workers of the bolt method {args.method_name} exited: {exitcodes} :thumbs_up:"))
+        return exitcodes
+
     def execute_bolt(self, bolt: Bolt, method_name: str, *args, **kwargs):
         """
         Execute a method of a bolt.
@@ -338,6 +443,9 @@ class BoltCtl:
                     - postgres_password (str): The password for the PostgreSQL server.
                     - postgres_database (str): The PostgreSQL database to be used.
                     - postgres_table (str): The PostgreSQL table to be used.
+                    SQLite state manager config:
+                    - sqlite_path (str): The SQLite database file.
+                    - sqlite_table (str): The SQLite table to be used.
                     DynamoDB state manager config:
                     - dynamodb_table_name (str): The name of the DynamoDB table.
                     - dynamodb_region_name (str): The AWS region for DynamoDB.
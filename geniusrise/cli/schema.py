@@ -30,7 +30,7 @@ class ExtraKwargs(BaseModel):
 
 class StateArgs(BaseModel):
     """
-    This class defines the arguments for the state. Depending on the type of state (none, redis, postgres, dynamodb),
+    This class defines the arguments for the state. Depending on the type of state (none, redis, postgres, sqlite, dynamodb),
     different arguments are required.
     """
 
@@ -43,9 +43,24 @@ class StateArgs(BaseModel):
     postgres_password: Optional[str] = "postgres"
     postgres_database: Optional[str] = "geniusrise"
     postgres_table: Optional[str] = None
+    sqlite_path: Optional[str] = "geniusrise.db"
+    sqlite_table: Optional[str] = "geniusrise_state"
     dynamodb_table_name: Optional[str] = "geniusrise"
     dynamodb_region_name: Optional[str] = "ap-south-1"  # hah
     prometheus_gateway: Optional[str] = None
+    redis_expire: Optional[int] = None
+    in_memory_shards: Optional[int] = None
+    in_memory_snapshot_path: Optional[str] = None
+    in_memory_snapshot_interval: Optional[float] = None
+    in_memory_snapshot_format: Optional[str] = None
+    write_behind: Optional[bool] = None
+    flush_interval: Optional[float] = None
+
+    @validator("in_memory_snapshot_format")
+    def validate_in_memory_snapshot_format(cls, v, values, **kwargs):
+        if v is not None and v not in ["pickle", "msgpack"]:
+            raise ValueError("Invalid snapshot format")
+        return v
 
     class Config:
         extra = Extra.allow
@@ -53,7 +68,7 @@ class StateArgs(BaseModel):
 
 class State(BaseModel):
     """
-    This class defines the state of the spout or bolt. The state can be of type none, redis, postgres, or dynamodb.
+    This class defines the state of the spout or bolt. The state can be of type none, redis, postgres, sqlite, or dynamodb.
     """
 
     type: str
@@ -61,7 +76,7 @@ class State(BaseModel):
 
     @validator("type")
     def validate_type(cls, v, values, **kwargs):
-        if v not in ["none", "redis", "postgres", "dynamodb", "prometheus"]:
+        if v not in ["none", "redis", "postgres", "sqlite", "dynamodb", "prometheus"]:
             raise ValueError("Invalid state type")
         return v
 
@@ -74,6 +89,9 @@ class State(BaseModel):
             elif values["type"] == "postgres":
                 if not v or "postgres_table" not in v:
                     raise ValueError("Missing required fields for postgres state type")
+            elif values["type"] == "sqlite":
+                if not v or "sqlite_path" not in v:
+                    raise ValueError("Missing required fields for sqlite state type")
             elif values["type"] == "dynamodb":
                 if not v or "dynamodb_table_name" not in v:
                     raise ValueError("Missing required fields for dynamodb state type")
@@ -100,6 +118,31 @@ class OutputArgs(BaseModel):
     output_topic: Optional[str] = None
     kafka_servers: Optional[str] = None
     buffer_size: Optional[int] = 1000
+    output_format: Optional[str] = None
+    max_file_size: Optional[int] = None
+    buffer_max_bytes: Optional[int] = None
+    buffer_max_age: Optional[float] = None
+    background_flush: Optional[bool] = None
+    producer_profile: Optional[str] = None
+    serializer: Optional[str] = None
+
+    @validator("output_format")
+    def validate_output_format(cls, v, values, **kwargs):
+        if v is not None and v not in ["json", "jsonl", "jsonl.gz", "jsonl.zst", "parquet"]:
+            raise ValueError("Invalid output format")
+        return v
+
+    @validator("producer_profile")
+    def validate_producer_profile(cls, v, values, **kwargs):
+        if v is not None and v not in ["default", "throughput", "durable"]:
+            raise ValueError("Invalid producer profile")
+        return v
+
+    @validator("serializer")
+    def validate_serializer(cls, v, values, **kwargs):
+        if v is not None and v not in ["json", "orjson", "msgpack"]:
+            raise ValueError("Invalid serializer")
+        return v
 
     class Config:
         extra = Extra.allow
@@ -299,9 +342,53 @@ class Deploy(BaseModel):
         return v
 
 
+class Logging(BaseModel):
+    """
+    This class defines how a spout or bolt logs. Records are colored text or JSON lines, JSON lines can
+    also be shipped in batches to a file, a Kafka topic or the state.
+    """
+
+    format: Optional[str] = None
+    sink: Optional[str] = None
+    file: Optional[str] = None
+    file_max_bytes: Optional[int] = None
+    kafka_topic: Optional[str] = None
+    kafka_servers: Optional[str] = None
+
+    @validator("format")
+    def validate_format(cls, v, values, **kwargs):
+        if v is not None and v not in ["text", "json"]:
+            raise ValueError("Invalid log format")
+        return v
+
+    @validator("sink")
+    def validate_sink(cls, v, values, **kwargs):
+        for sink in filter(None, (v or "").split(",")):
+            if sink.strip() not in ["file", "kafka", "state"]:
+                raise ValueError(f"Invalid log sink {sink}")
+        return v
+
+
+class Profile(BaseModel):
+    """
+    This class defines the profiling of the method of a spout or bolt. Wall time, CPU time and peak RSS
+    are always recorded, tools adds comma-separated extra profilers: cprofile, tracemalloc.
+    """
+
+    tools: Optional[str] = None
+    dir: Optional[str] = None
+
+    @validator("tools")
+    def validate_tools(cls, v, values, **kwargs):
+        for tool in filter(None, (v or "").split(",")):
+            if tool.strip() not in ["cprofile", "tracemalloc"]:
+                raise ValueError(f"Invalid profiler {tool}")
+        return v
+
+
 class Spout(BaseModel):
     """
-    This class defines a spout. A spout has a name, method, optional arguments, output, state, and deployment.
+    This class defines a spout. A spout has a name, method, optional arguments, output, state, deployment, logging and profiling.
     """
 
     name: str
@@ -310,11 +397,13 @@ class Spout(BaseModel):
     output: Output
     state: Optional[State] = None
     deploy: Optional[Deploy] = None
+    logging: Optional[Logging] = None
+    profile: Optional[Profile] = None
 
 
 class Bolt(BaseModel):
     """
-    This class defines a bolt. A bolt has a name, method, optional arguments, input, output, state, and deployment.
+    This class defines a bolt. A bolt has a name, method, optional arguments, input, output, state, deployment, logging and profiling.
     """
 
     name: str
@@ -324,6 +413,8 @@ class Bolt(BaseModel):
     output: Output
     state: Optional[State] = None
     deploy: Optional[Deploy] = None
+    logging: Optional[Logging] = None
+    profile: Optional[Profile] = None
 
 
 class Geniusfile(BaseModel):
@@ -24,6 +24,7 @@ from rich_argparse import RichHelpFormatter
 
 from geniusrise.cli.discover import DiscoveredSpout
 from geniusrise.core import Spout
+from geniusrise.core.data import serve_metrics
 from geniusrise.runners.k8s import Deployment, Service, Job, CronJob
 
 
@@ -56,7 +57,7 @@ class SpoutCtl:
         # Create subparser for 'create' command
         create_parser = subparsers.add_parser("rise", help="Run a spout locally.", formatter_class=RichHelpFormatter)
         create_parser.add_argument("output_type", choices=["batch", "streaming", "stream_to_batch"], help="Choose the type of output data: batch or streaming.", default="batch")
-        create_parser.add_argument("state_type", choices=["none", "redis", "postgres", "dynamodb", "prometheus"], help="Select the type of state manager: none, redis, postgres, or dynamodb.", default="none")
+        create_parser.add_argument("state_type", choices=["none", "redis", "postgres", "sqlite", "dynamodb", "prometheus"], help="Select the type of state manager: none, redis, postgres, sqlite, or dynamodb.", default="none")
         create_parser.add_argument("--buffer_size", help="Specify the size of the buffer.", default=100, type=int)
         # output
         create_parser.add_argument("--output_folder", help="Specify the directory where output files should be stored temporarily.", default=tempfile.mkdtemp(), type=str)
@@ -64,6 +65,14 @@ class SpoutCtl:
         create_parser.add_argument("--output_kafka_cluster_connection_string", help="Kafka connection string for streaming spouts.", default="localhost:9094", type=str)
         create_parser.add_argument("--output_s3_bucket", help="Provide the name of the S3 bucket for output storage.", default="geniusrise-test", type=str)
         create_parser.add_argument("--output_s3_folder", help="Indicate the S3 folder for output storage.", default="geniusrise", type=str)
+        # output options
+        create_parser.add_argument("--output_format", choices=["json", "jsonl", "jsonl.gz", "jsonl.zst", "parquet"], help="Encoding of the files flushed by stream_to_batch outputs.", default=None, type=str)
+        create_parser.add_argument("--max_file_size", help="Maximum size in bytes of a flushed file.", default=None, type=int)
+        create_parser.add_argument("--buffer_max_bytes", help="Flush once the buffered messages reach this many bytes.", default=None, type=int)
+        create_parser.add_argument("--buffer_max_age", help="Flush once the oldest buffered message is this many seconds old.", default=None, type=float)
+        create_parser.add_argument("--background_flush", action="store_true", help="Write and upload flushed files on a background thread.", default=None)
+        create_parser.add_argument("--producer_profile", choices=["default", "throughput", "durable"], help="Kafka producer profile of streaming outputs.", default=None, type=str)
+        create_parser.add_argument("--serializer", choices=["json", "orjson", "msgpack"], help="Message serializer of streaming outputs.", default=None, type=str)
         # state
         create_parser.add_argument("--redis_host", help="Enter the host address for the Redis server.", default="localhost", type=str)
         create_parser.add_argument("--redis_port", help="Enter the port number for the Redis server.", default=6379, type=int)
@@ -74,16 +83,37 @@ class SpoutCtl:
         create_parser.add_argument("--postgres_password", help="Provide the password for the PostgreSQL server.", default="password", type=str)
         create_parser.add_argument("--postgres_database", help="Specify the PostgreSQL database to be used.", default="mydatabase", type=str)
         create_parser.add_argument("--postgres_table", help="Specify the PostgreSQL table to be used.", default="mytable", type=str)
+        create_parser.add_argument("--sqlite_path", help="Specify the SQLite database file.", default="geniusrise.db", type=str)
+        create_parser.add_argument("--sqlite_table", help="Specify the SQLite table to be used.", default="geniusrise_state", type=str)
         create_parser.add_argument("--dynamodb_table_name", help="Provide the name of the DynamoDB table.", default="mytable", type=str)
         create_parser.add_argument("--dynamodb_region_name", help="Specify the AWS region for DynamoDB.", default="us-west-2", type=str)
         create_parser.add_argument("--prometheus_gateway", help="Specify the prometheus gateway URL.", default="localhost:9091", type=str)
+        create_parser.add_argument("--redis_expire", help="Seconds after which Redis state keys expire.", default=None, type=int)
+        create_parser.add_argument("--in_memory_shards", help="Number of lock-striped shards of the in-memory state.", default=None, type=int)
+        create_parser.add_argument("--in_memory_snapshot_path", help="File to snapshot the in-memory state to and reload it from on startup.", default=None, type=str)
+        create_parser.add_argument("--in_memory_snapshot_interval", help="Seconds between snapshots of the in-memory state.", default=None, type=float)
+        create_parser.add_argument("--in_memory_snapshot_format", choices=["pickle", "msgpack"], help="Encoding of the in-memory state snapshots.", default=None, type=str)
+        create_parser.add_argument("--state_write_behind", action="store_true", help="Flush state writes in the background instead of on every set.", default=None)
+        create_parser.add_argument("--state_flush_interval", help="Seconds between background state flushes.", default=None, type=float)
         # function
+        # metrics
+        create_parser.add_argument("--metrics_port", help="Serve Prometheus metrics on this port at /metrics while running.", default=None, type=int)
+        # profiling
+        create_parser.add_argument("--profile", nargs="?", const=True, default=None, type=str, help="Profile the method: wall time, CPU time and peak RSS, plus any comma-separated extra profilers given as --profile=cprofile,tracemalloc.")
+        create_parser.add_argument("--profile_dir", help="Folder the profile artifacts are written to.", default=None, type=str)
+        # logging
+        create_parser.add_argument("--log_format", choices=["text", "json"], help="Log colored text lines or structured JSON lines.", default=None, type=str)
+        create_parser.add_argument("--log_sink", help="Comma-separated sinks JSON logs are shipped to: file, kafka, state.", default=None, type=str)
+        create_parser.add_argument("--log_file", help="Log file of the file sink, rotated by size.", default=None, type=str)
+        create_parser.add_argument("--log_file_max_bytes", help="Size at which the log file is rotated.", default=None, type=int)
+        create_parser.add_argument("--log_kafka_topic", help="Kafka topic of the kafka log sink.", default=None, type=str)
+        create_parser.add_argument("--log_kafka_cluster_connection_string", help="Kafka connection string of the kafka log sink.", default=None, type=str)
         create_parser.add_argument("method_name", help="The name of the method to execute on the spout.", type=str)
         create_parser.add_argument("--args", nargs=argparse.REMAINDER, help="Additional keyword arguments to pass to the spout.")
 
         deploy_parser = subparsers.add_parser("deploy", help="Run a spout remotely.", formatter_class=RichHelpFormatter)
         deploy_parser.add_argument("output_type", choices=["batch", "streaming", "stream_to_batch"], help="Choose the type of output data: batch or streaming.", default="batch")
-        deploy_parser.add_argument("state_type", choices=["none", "redis", "postgres", "dynamodb", "prometheus"], help="Select the type of state manager: none, redis, postgres, or dynamodb.", default="none")
+        deploy_parser.add_argument("state_type", choices=["none", "redis", "postgres", "sqlite", "dynamodb", "prometheus"], help="Select the type of state manager: none, redis, postgres, sqlite, or dynamodb.", default="none")
         deploy_parser.add_argument("deployment_type", choices=["k8s"], help="Choose the type of deployment.", default="k8s")
         # output
         deploy_parser.add_argument("--buffer_size", help="Specify the size of the buffer.", default=100, type=int)
@@ -102,6 +132,8 @@ class SpoutCtl:
         deploy_parser.add_argument("--postgres_password", help="Provide the password for the PostgreSQL server.", default="password", type=str)
         deploy_parser.add_argument("--postgres_database", help="Specify the PostgreSQL database to be used.", default="mydatabase", type=str)
         deploy_parser.add_argument("--postgres_table", help="Specify the PostgreSQL table to be used.", default="mytable", type=str)
+        deploy_parser.add_argument("--sqlite_path", help="Specify the SQLite database file.", default="geniusrise.db", type=str)
+        deploy_parser.add_argument("--sqlite_table", help="Specify the SQLite table to be used.", default="geniusrise_state", type=str)
         deploy_parser.add_argument("--dynamodb_table_name", help="Provide the name of the DynamoDB table.", default="mytable", type=str)
         deploy_parser.add_argument("--dynamodb_region_name", help="Specify the AWS region for DynamoDB.", default="us-west-2", type=str)
         deploy_parser.add_argument("--prometheus_gateway", help="Specify the prometheus gateway URL.", default="localhost:9091", type=str)
@@ -154,6 +186,8 @@ class SpoutCtl:
                 other = args.args or []
                 other_args, other_kwargs = self.parse_args_kwargs(other)
                 self.spout = self.create_spout(args.output_type, args.state_type, **kwargs)
+                if getattr(args, "metrics_port", None):
+                    serve_metrics(self.spout.state.registry, args.metrics_port)
 
                 # Pass the method_name from args to execute_spout
                 result = self.execute_spout(self.spout, args.method_name, *other_args, **other_kwargs)
@@ -209,7 +243,7 @@ class SpoutCtl:
 
         Args:
             output_type (str): The type of output ("batch" or "streaming").
-            state_type (str): The type of state manager ("none", "redis", "postgres", or "dynamodb").
+            state_type (str): The type of state manager ("none", "redis", "postgres", "sqlite", or "dynamodb").
             **kwargs: Additional keyword arguments for initializing the spout.
                 ```
                 Keyword Arguments:
@@ -236,6 +270,9 @@ class SpoutCtl:
                     - postgres_password (str): The password for the PostgreSQL server.
                     - postgres_database (str): The PostgreSQL database to be used.
                     - postgres_table (str): The PostgreSQL table to be used.
+                    SQLite state manager config:
+                    - sqlite_path (str): The SQLite database file.
+                    - sqlite_table (str): The SQLite table to be used.
                     DynamoDB state manager config:
                     - dynamodb_table_name (str): The name of the DynamoDB table.
                     - dynamodb_region_name (str): The AWS region for DynamoDB.
@@ -299,6 +336,9 @@ class SpoutCtl:
                     - postgres_password (str): The password for the PostgreSQL server.
                     - postgres_database (str): The PostgreSQL database to be used.
                     - postgres_table (str): The PostgreSQL table to be used.
+                    SQLite state manager config:
+                    - sqlite_path (str): The SQLite database file.
+                    - sqlite_table (str): The SQLite table to be used.
                     DynamoDB state manager config:
                     - dynamodb_table_name (str): The name of the DynamoDB table.
                     - dynamodb_region_name (str): The AWS region for DynamoDB.
@@ -3,7 +3,7 @@ import copy
 import pytest
 from pydantic import ValidationError
 
-from geniusrise.cli.schema import Geniusfile
+from geniusrise.cli.schema import Geniusfile, Logging, OutputArgs, Profile, State, StateArgs
 
 # Base YAML data for testing
 base_yaml_data = {
@@ -96,6 +96,15 @@ def test_missing_state_args_for_redis():
         Geniusfile(**data)
 
 
+def test_sqlite_state():
+    """Test that the SQLite state type requires a database file."""
+    with pytest.raises(ValidationError):
+        State(type="sqlite", args={})
+
+    state = State(type="sqlite", args={"sqlite_path": "/tmp/state.db"})
+    assert state.args.sqlite_table == "geniusrise_state"
+
+
 def test_missing_output_args_for_streaming():
     """Test that missing required fields for streaming output type raises a validation error."""
     data = copy.deepcopy(base_yaml_data)
@@ -110,3 +119,41 @@ def test_missing_deploy_args_for_ecs():
     data["spouts"]["github-batch"]["deploy"]["type"] = "ecs"
     with pytest.raises(ValidationError):
         Geniusfile(**data)
+
+
+def test_logging():
+    """Test that logging options are validated."""
+    log_config = Logging(format="json", sink="file,kafka", kafka_servers="kafka:9092")
+    assert log_config.sink == "file,kafka"
+
+    with pytest.raises(ValidationError):
+        Logging(format="xml")
+    with pytest.raises(ValidationError):
+        Logging(sink="carrier_pigeon")
+
+
+def test_profile():
+    """Test that profilers are validated."""
+    assert Profile(tools="cprofile,tracemalloc", dir="/tmp/profiles").dir == "/tmp/profiles"
+    with pytest.raises(ValidationError):
+        Profile(tools="pyinstrument")
+
+
+def test_output_options():
+    """Test that output options are validated."""
+    output_args = OutputArgs(output_format="jsonl.gz", background_flush=True, producer_profile="throughput")
+    assert output_args.background_flush is True
+    with pytest.raises(ValidationError):
+        OutputArgs(output_format="csv")
+    with pytest.raises(ValidationError):
+        OutputArgs(producer_profile="reckless")
+    with pytest.raises(ValidationError):
+        OutputArgs(serializer="xml")
+
+
+def test_state_options():
+    """Test that state options are validated."""
+    state_args = StateArgs(in_memory_snapshot_path="/tmp/state.snapshot", in_memory_shards=32, write_behind=True)
+    assert state_args.in_memory_shards == 32
+    with pytest.raises(ValidationError):
+        StateArgs(in_memory_snapshot_format="json")
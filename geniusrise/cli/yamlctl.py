@@ -17,7 +17,7 @@
 import argparse
 import logging
 import typing
-from typing import Dict, List
+from typing import Any, Dict, List, Optional
 
 # import os
 
@@ -27,7 +27,7 @@ from concurrent.futures import ThreadPoolExecutor, wait
 
 
 from geniusrise.cli.boltctl import BoltCtl
-from geniusrise.cli.schema import Bolt, Geniusfile, Spout
+from geniusrise.cli.schema import Bolt, Geniusfile, Logging, OutputArgs, Profile, Spout, StateArgs
 from geniusrise.cli.spoutctl import SpoutCtl
 
 
@@ -242,6 +242,70 @@ class YamlCtl:
             self.log.error(emoji.emojize(f":x: Invalid reference type {input_type}."))
             return None
 
+    @staticmethod
+    def _convert_logging(log_config: Optional[Logging]) -> List[str]:
+        if not log_config:
+            return []
+        options = {
+            "log_format": log_config.format,
+            "log_sink": log_config.sink,
+            "log_file": log_config.file,
+            "log_file_max_bytes": log_config.file_max_bytes,
+            "log_kafka_topic": log_config.kafka_topic,
+            "log_kafka_cluster_connection_string": log_config.kafka_servers,
+        }
+        return [f"--{option}={value}" for option, value in options.items() if value is not None]
+
+    @staticmethod
+    def _convert_profile(profile: Optional[Profile]) -> List[str]:
+        if not profile:
+            return []
+        profile_args = [f"--profile={profile.tools}" if profile.tools else "--profile"]
+        if profile.dir:
+            profile_args.append(f"--profile_dir={profile.dir}")
+        return profile_args
+
+    @staticmethod
+    def _convert_options(options: Dict[str, Any]) -> List[str]:
+        # Flags are passed bare when set, other options when given
+        return [
+            f"--{option}" if value is True else f"--{option}={value}"
+            for option, value in options.items()
+            if value is not None and value is not False
+        ]
+
+    @staticmethod
+    def _convert_output_options(output_args: Optional[OutputArgs]) -> List[str]:
+        if not output_args:
+            return []
+        return YamlCtl._convert_options(
+            {
+                "output_format": output_args.output_format,
+                "max_file_size": output_args.max_file_size,
+                "buffer_max_bytes": output_args.buffer_max_bytes,
+                "buffer_max_age": output_args.buffer_max_age,
+                "background_flush": output_args.background_flush,
+                "producer_profile": output_args.producer_profile,
+                "serializer": output_args.serializer,
+            }
+        )
+
+    @staticmethod
+    def _convert_state_options(state_args: Optional[StateArgs]) -> List[str]:
+        if not state_args:
+            return []
+        return YamlCtl._convert_options(
+            {
+                "redis_expire": state_args.redis_expire,
+                "in_memory_shards": state_args.in_memory_shards,
+                "in_memory_snapshot_path": state_args.in_memory_snapshot_path,
+                "in_memory_snapshot_interval": state_args.in_memory_snapshot_interval,
+                "in_memory_snapshot_format": state_args.in_memory_snapshot_format,
+                "state_write_behind": state_args.write_behind,
+                "state_flush_interval": state_args.flush_interval,
+            }
+        )
+
     # TODO: maybe create argparse namespaces instead of this nonsense
     @typing.no_type_check
     def _convert_spout(self, spout: Spout) -> List[str]:
@@ -273,12 +337,20 @@ class YamlCtl:
             spout_args.append(f"--postgres_password={spout.state.args.postgres_password}")
             spout_args.append(f"--postgres_database={spout.state.args.postgres_database}")
             spout_args.append(f"--postgres_table={spout.state.args.postgres_table}")
+        elif spout.state.type == "sqlite":
+            spout_args.append(f"--sqlite_path={spout.state.args.sqlite_path}")
+            spout_args.append(f"--sqlite_table={spout.state.args.sqlite_table}")
         elif spout.state.type == "dynamodb":
             spout_args.append(f"--dynamodb_table_name={spout.state.args.dynamodb_table_name}")
             spout_args.append(f"--dynamodb_region_name={spout.state.args.dynamodb_region_name}")
         elif spout.state.type == "prometheus":
             spout_args.append(f"--prometheus_gateway={spout.state.args.prometheus_gateway}")
 
+        spout_args += self._convert_output_options(spout.output.args)
+        spout_args += self._convert_state_options(spout.state.args)
+        spout_args += self._convert_logging(spout.logging)
+        spout_args += self._convert_profile(spout.profile)
+
         if spout.args:
             method_args = [f'{arg[0]}="{arg[1]}"' for arg in spout.args]
             spout_args.append("--args")
@@ -337,12 +409,20 @@ class YamlCtl:
             bolt_args.append(f"--postgres_password={bolt.state.args.postgres_password}")
             bolt_args.append(f"--postgres_database={bolt.state.args.postgres_database}")
             bolt_args.append(f"--postgres_table={bolt.state.args.postgres_table}")
+        elif bolt.state.type == "sqlite":
+            bolt_args.append(f"--sqlite_path={bolt.state.args.sqlite_path}")
+            bolt_args.append(f"--sqlite_table={bolt.state.args.sqlite_table}")
         elif bolt.state.type == "dynamodb":
             bolt_args.append(f"--dynamodb_table_name={bolt.state.args.dynamodb_table_name}")
             bolt_args.append(f"--dynamodb_region_name={bolt.state.args.dynamodb_region_name}")
         elif bolt.state.type == "prometheus":
             bolt_args.append(f"--prometheus_gateway={bolt.state.args.prometheus_gateway}")
 
+        bolt_args += self._convert_output_options(bolt.output.args)
+        bolt_args += self._convert_state_options(bolt.state.args)
+        bolt_args += self._convert_logging(bolt.logging)
+        bolt_args += self._convert_profile(bolt.profile)
+
         if bolt.args:
             method_args = [f'{arg[0]}="{arg[1]}"' for arg in bolt.args]
             bolt_args.append("--args")
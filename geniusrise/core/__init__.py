@@ -29,6 +29,7 @@ from geniusrise.core.state import (
     InMemoryState,
     PostgresState,
     RedisState,
+    SQLiteState,
     State,
 )
 from geniusrise.core.task import Task
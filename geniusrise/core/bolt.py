@@ -14,31 +14,36 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import os
 import tempfile
-from typing import Any
+from typing import Any, Dict, Optional
 
 from geniusrise.core.data import (
     BatchInput,
     BatchOutput,
+    FlushPolicy,
     BatchToStreamingInput,
     Input,
     Output,
+    RecordMetrics,
     StreamingInput,
     StreamingOutput,
     StreamToBatchInput,
     StreamToBatchOutput,
+    instrument_output,
 )
 from geniusrise.core.state import (
     DynamoDBState,
     InMemoryState,
     PostgresState,
     RedisState,
+    SQLiteState,
     State,
     PrometheusState,
 )
-from geniusrise.logging import setup_logger
+from geniusrise.logging import log_context, log_sinks, setup_logger
 
-from .task import Task
+from .task import Profiler, Task
 
 
 class Bolt(Task):
@@ -93,7 +98,35 @@ class Bolt(Task):
         self.output = output
         self.state = state
 
-        self.log = setup_logger(self.state)
+        self.log = setup_logger(
+            self.state,
+            sample_rate=kwargs.get("log_sample_rate", 1.0),
+            structured=kwargs.get("log_format", "text") == "json",
+            sinks=log_sinks(self.state, **kwargs),
+            batch_size=kwargs.get("log_batch_size", 100),
+            flush_interval=kwargs.get("log_flush_interval", 1.0),
+        )
+
+        # Opt-in per-record metrics, served on /metrics with `--metrics_port`
+        if kwargs.get("record_metrics", False) or kwargs.get("metrics_port"):
+            self.input.record_metrics = RecordMetrics(self.state.registry, "input", "processing")
+            instrument_output(self.output, RecordMetrics(self.state.registry, "output", "save"))
+
+        # Opt-in profiling of the executed methods
+        profile = kwargs.get("profile", False)
+        self.profiler: Optional[Profiler] = None
+        if profile:
+            output_folder = getattr(self.output, "output_folder", None)
+            self.profiler = Profiler(
+                self.state.registry,
+                tools=profile.split(",") if isinstance(profile, str) else (),
+                profile_dir=kwargs.get(
+                    "profile_dir",
+                    os.path.join(os.path.dirname(os.path.abspath(output_folder)), "profiles")
+                    if output_folder
+                    else None,
+                ),
+            )
 
     def __call__(self, method_name: str, *args, **kwargs) -> Any:
         """
@@ -109,47 +142,51 @@ class Bolt(Task):
         Returns:
             Any: The result of the method.
         """
-        try:
-            # Get the type of state manager
-            # state_type = self.state.get_state(self.id)
-
-            # Save the current set of class variables to the state manager
-            # self.state.set_state(self.id, {})
-
-            # Copy input data to local or connect to kafka and pass on the details
-            if type(self.input) is BatchInput:
-                self.input.copy_from_remote()
-                input_folder = self.input.get()
-                kwargs["input_folder"] = input_folder
-            elif type(self.input) is StreamingInput:
-                kafka_consumer = self.input.get()
-                kwargs["kafka_consumer"] = kafka_consumer
-            elif isinstance(self.input, StreamToBatchInput):
-                temp_folder = self.input.get()
-                kwargs["input_folder"] = temp_folder
-            elif isinstance(self.input, BatchToStreamingInput):
-                self.input.copy_from_remote()
-                iterator = self.input.iterator()
-                kwargs["kafka_consumer"] = iterator
-
-            # Execute the task's method
-            result = self.execute(method_name, *args, **kwargs)
-
-            # Flush the output data
-            self.output.flush()
-
-            # Store the state as successful in the state manager
-            state = {}
-            state["status"] = "success"
-            # self.state.set_state(self.id, state)
-
-            return result
-        except Exception as e:
-            state = {}
-            state["status"] = "failed"
-            # self.state.set_state(self.id, state)
-            self.log.exception(f"Failed to execute method '{method_name}': {e}")
-            raise
+        with log_context(task_id=self.id, task=self.__class__.__name__, method=method_name):
+            try:
+                # Get the type of state manager
+                # state_type = self.state.get_state(self.id)
+
+                # Save the current set of class variables to the state manager
+                # self.state.set_state(self.id, {})
+
+                # Copy input data to local or connect to kafka and pass on the details
+                if type(self.input) is BatchInput:
+                    self.input.copy_from_remote()
+                    input_folder = self.input.get()
+                    kwargs["input_folder"] = input_folder
+                elif type(self.input) is StreamingInput:
+                    kafka_consumer = self.input.get()
+                    kwargs["kafka_consumer"] = self.input.instrumented(kafka_consumer)
+                elif isinstance(self.input, StreamToBatchInput):
+                    temp_folder = self.input.get()
+                    kwargs["input_folder"] = temp_folder
+                elif isinstance(self.input, BatchToStreamingInput):
+                    self.input.copy_from_remote()
+                    iterator = self.input.iterator()
+                    kwargs["kafka_consumer"] = self.input.instrumented(iterator)
+
+                # Execute the task's method
+                if self.profiler:
+                    result = self.profiler.run(method_name, self.execute, method_name, *args, **kwargs)
+                else:
+                    result = self.execute(method_name, *args, **kwargs)
+
+                # Flush the output data
+                self.output.flush()
+
+                # Store the state as successful in the state manager
+                state = {}
+                state["status"] = "success"
+                # self.state.set_state(self.id, state)
+
+                return result
+            except Exception as e:
+                state = {}
+                state["status"] = "failed"
+                # self.state.set_state(self.id, state)
+                self.log.exception(f"Failed to execute method '{method_name}': {e}")
+                raise
 
     @staticmethod
     def create(klass: type, input_type: str, output_type: str, state_type: str, **kwargs) -> "Bolt":
@@ -166,7 +203,7 @@ class Bolt(Task):
             klass (type): The Bolt class to create.
             input_type (str): The type of input ("batch" or "streaming").
             output_type (str): The type of output ("batch" or "streaming").
-            state_type (str): The type of state manager ("none", "redis", "postgres", or "dynamodb").
+            state_type (str): The type of state manager ("none", "redis", "postgres", "sqlite", or "dynamodb").
             **kwargs: Additional keyword arguments for initializing the bolt.
                 ```
                 Keyword Arguments:
@@ -185,6 +222,8 @@ class Bolt(Task):
                     Streaming output:
                     - output_kafka_cluster_connection_string (str): The output Kafka servers argument.
                     - output_kafka_topic (str): The output kafka topic argument.
+                    - producer_profile (str): Kafka producer profile ("default", "throughput", "durable").
+                    - serializer (str): Message serializer ("json", "orjson", "msgpack").
                     Stream-to-Batch input:
                     - buffer_size (int): Number of messages to buffer.
                     - input_kafka_cluster_connection_string (str): The input Kafka servers argument.
@@ -200,10 +239,41 @@ class Bolt(Task):
                     - output_folder (str): The output folder argument.
                     - output_s3_bucket (str): The output bucket argument.
                     - output_s3_folder (str): The output S3 folder argument.
+                    - output_format (str): Encoding of flushed files ("json", "jsonl", "jsonl.gz", "jsonl.zst", "parquet").
+                    - max_file_size (int): Maximum size in bytes of a flushed file.
+                    - buffer_max_bytes (int): Flush once buffered messages reach this many bytes.
+                    - buffer_max_age (float): Flush once the oldest buffered message is this many seconds old.
+                    - background_flush (bool): Write and upload flushed files on a background thread.
+                    State manager config:
+                    - state_write_behind (bool): Flush state writes in the background instead of on every set.
+                    - state_flush_interval (float): Seconds between background state flushes.
+                    - state_log_capacity (int): Number of log lines the state keeps between writes.
+                    - log_sample_rate (float): Fraction of log lines below WARNING captured in the state.
+                    Metrics config:
+                    - record_metrics (bool): Record per-record counts, bytes and latencies in the state's registry.
+                    - metrics_port (int): Also serve the state's registry on this port at /metrics.
+                    Profiling config:
+                    - profile (bool | str): Profile executed methods, True for wall time, CPU time and peak RSS,
+                      or comma-separated extra profilers: "cprofile", "tracemalloc".
+                    - profile_dir (str): Folder of the profile artifacts, defaults to "profiles" next to the output folder.
+                    Logging config:
+                    - log_format (str): "text" for colored lines, "json" for structured JSON lines.
+                    - log_sink (str): Comma-separated sinks structured logs are shipped to: "file", "kafka", "state".
+                    - log_file (str): Log file of the file sink, rotated by size.
+                    - log_kafka_topic (str): Topic of the kafka sink.
+                    - log_kafka_cluster_connection_string (str): Kafka servers of the kafka sink.
+                    - log_batch_size (int): Log records shipped per batch.
+                    - log_flush_interval (float): Seconds after which a partial batch of log records is shipped.
+                    In-memory state manager config:
+                    - in_memory_shards (int): Number of lock-striped shards of the store.
+                    - in_memory_snapshot_path (str): File to snapshot the store to and reload it from on startup.
+                    - in_memory_snapshot_interval (float): Seconds between snapshots.
+                    - in_memory_snapshot_format (str): Snapshot encoding ("pickle", "msgpack").
                     Redis state manager config:
                     - redis_host (str): The Redis host argument.
                     - redis_port (str): The Redis port argument.
                     - redis_db (str): The Redis database argument.
+                    - redis_expire (int): Seconds after which state keys expire.
                     Postgres state manager config:
                     - postgres_host (str): The PostgreSQL host argument.
                     - postgres_port (str): The PostgreSQL port argument.
@@ -211,6 +281,9 @@ class Bolt(Task):
                     - postgres_password (str): The PostgreSQL password argument.
                     - postgres_database (str): The PostgreSQL database argument.
                     - postgres_table (str): The PostgreSQL table argument.
+                    SQLite state manager config:
+                    - sqlite_path (str): The SQLite database file.
+                    - sqlite_table (str): The SQLite table argument.
                     DynamoDB state manager config:
                     - dynamodb_table_name (str): The DynamoDB table name argument.
                     - dynamodb_region_name (str): The DynamoDB region name argument.
@@ -272,6 +345,8 @@ class Bolt(Task):
                 kwargs["output_kafka_cluster_connection_string"]
                 if "output_kafka_cluster_connection_string" in kwargs
                 else None,
+                profile=kwargs.get("producer_profile", "default"),
+                serializer=kwargs.get("serializer", "json"),
             )
         elif output_type == "stream_to_batch":
             output = StreamToBatchOutput(
@@ -279,19 +354,40 @@ class Bolt(Task):
                 bucket=kwargs["output_s3_bucket"] if "output_s3_bucket" in kwargs else None,
                 s3_folder=kwargs["output_s3_folder"] if "output_s3_folder" in kwargs else None,
                 buffer_size=int(kwargs.get("buffer_size", 1000)) if "buffer_size" in kwargs else 1,
+                output_format=kwargs.get("output_format", "json"),
+                max_file_size=kwargs.get("max_file_size", None),
+                flush_policy=FlushPolicy(
+                    max_count=int(kwargs.get("buffer_size", 1000)) if "buffer_size" in kwargs else 1,
+                    max_bytes=kwargs.get("buffer_max_bytes", None),
+                    max_age=kwargs.get("buffer_max_age", None),
+                ),
+                background=kwargs.get("background_flush", False),
             )
         else:
             raise ValueError(f"Invalid output type: {output_type}")
 
         # Create the state manager
         state: State
+        state_options: Dict[str, Any] = {
+            "write_behind": kwargs.get("state_write_behind", False),
+            "flush_interval": kwargs.get("state_flush_interval", 1.0),
+            "log_capacity": kwargs.get("state_log_capacity", 1000),
+        }
         if state_type == "none":
-            state = InMemoryState()
+            state = InMemoryState(
+                shards=kwargs.get("in_memory_shards", 16),
+                snapshot_path=kwargs.get("in_memory_snapshot_path", None),
+                snapshot_interval=kwargs.get("in_memory_snapshot_interval", None),
+                snapshot_format=kwargs.get("in_memory_snapshot_format", "pickle"),
+                **state_options,
+            )
         elif state_type == "redis":
             state = RedisState(
                 host=kwargs["redis_host"] if "redis_host" in kwargs else None,
                 port=kwargs["redis_port"] if "redis_port" in kwargs else None,
                 db=kwargs["redis_db"] if "redis_db" in kwargs else None,
+                expire=kwargs.get("redis_expire", None),
+                **state_options,
             )
         elif state_type == "postgres":
             state = PostgresState(
@@ -301,15 +397,24 @@ class Bolt(Task):
                 password=kwargs["postgres_password"] if "postgres_password" in kwargs else None,
                 database=kwargs["postgres_database"] if "postgres_database" in kwargs else None,
                 table=kwargs["postgres_table"] if "postgres_table" in kwargs else None,
+                **state_options,
+            )
+        elif state_type == "sqlite":
+            state = SQLiteState(
+                path=kwargs.get("sqlite_path", "geniusrise.db"),
+                table=kwargs.get("sqlite_table", "geniusrise_state"),
+                **state_options,
             )
         elif state_type == "dynamodb":
             state = DynamoDBState(
                 table_name=kwargs["dynamodb_table_name"] if "dynamodb_table_name" in kwargs else None,
                 region_name=kwargs["dynamodb_region_name"] if "dynamodb_region_name" in kwargs else None,
+                **state_options,
             )
         elif state_type == "prometheus":
             state = PrometheusState(
                 gateway=kwargs["prometheus_gateway"] if "prometheus_gateway" in kwargs else None,
+                **state_options,
             )
         else:
             raise ValueError(f"Invalid state type: {state_type}")
@@ -18,8 +18,9 @@ from .batch_input import BatchInput
 from .batch_output import BatchOutput
 from .batch_to_stream_input import BatchToStreamingInput
 from .input import Input
+from .instrumentation import InstrumentedIterator, RecordMetrics, instrument_output, serve_metrics
 from .output import Output
 from .stream_to_batch_input import StreamToBatchInput
-from .stream_to_batch_output import StreamToBatchOutput
+from .stream_to_batch_output import FlushPolicy, StreamToBatchOutput
 from .streaming_input import StreamingInput
 from .streaming_output import StreamingOutput
@@ -14,15 +14,23 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import json
 import logging
 import os
-from typing import Generator, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Generator, Optional
 
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from retrying import retry
 
 from .input import Input
 
+# Name of the download manifest kept inside the input folder
+MANIFEST_FILENAME = ".geniusrise_manifest.json"
+
 
 class FileNotExistError(Exception):
     """❌ Custom exception for file not existing."""
@@ -38,6 +46,9 @@ class BatchInput(Input):
         input_folder (str): Folder to read input files.
         bucket (str): S3 bucket name.
         s3_folder (str): Folder within the S3 bucket.
+        max_workers (int): Number of concurrent downloads in `copy_from_remote`.
+        multipart_threshold (int): Object size in bytes above which downloads are split into ranged GETs.
+        multipart_chunksize (int): Size in bytes of each ranged GET.
 
     Usage:
     ```python
@@ -46,11 +57,23 @@ class BatchInput(Input):
     content = config.read_file("example.txt")
     ```
 
+    Note:
+    - `copy_from_remote` keeps a manifest of downloaded objects in the input folder,
+      unchanged objects are skipped when it is run again.
+
     Raises:
         FileNotExistError: If the file does not exist.
     """
 
-    def __init__(self, input_folder: str, bucket: str, s3_folder: str) -> None:
+    def __init__(
+        self,
+        input_folder: str,
+        bucket: str,
+        s3_folder: str,
+        max_workers: int = 16,
+        multipart_threshold: int = 64 * 1024 * 1024,
+        multipart_chunksize: int = 16 * 1024 * 1024,
+    ) -> None:
         """
         🛠 Initialize a new batch input data.
 
@@ -58,13 +81,40 @@ class BatchInput(Input):
             input_folder (str): Folder to read input files from.
             bucket (str): S3 bucket name.
             s3_folder (str): Folder within the S3 bucket.
+            max_workers (int, optional): Number of concurrent downloads. Defaults to 16.
+            multipart_threshold (int, optional): Size in bytes above which ranged GETs are used. Defaults to 64MB.
+            multipart_chunksize (int, optional): Size in bytes of each ranged GET. Defaults to 16MB.
         """
         super(Input, self).__init__()
         self.input_folder = input_folder
         self.bucket = bucket
         self.s3_folder = s3_folder
+        self.max_workers = max_workers
+        self.multipart_threshold = multipart_threshold
+        self.multipart_chunksize = multipart_chunksize
+        self._s3_client: Any = None
+        self._s3_client_lock = threading.Lock()
         self.log = logging.getLogger(self.__class__.__name__)
 
+    @property
+    def s3_client(self) -> Any:
+        """
+        🔌 Shared S3 client, created on first use.
+
+        The client is thread-safe and its connection pool is sized to the number of download workers.
+
+        Returns:
+            Any: The boto3 S3 client.
+        """
+        if self._s3_client is None:
+            with self._s3_client_lock:
+                if self._s3_client is None:
+                    self._s3_client = boto3.client(
+                        "s3",
+                        config=Config(max_pool_connections=max(10, self.max_workers * 2)),
+                    )
+        return self._s3_client
+
     def get(self) -> str:
         """
         📥 Returns the input folder path.
@@ -104,7 +154,7 @@ class BatchInput(Input):
         count = 0
         for f in os.listdir(self.input_folder):
             file_path = os.path.join(self.input_folder, f)
-            if os.path.isfile(file_path):
+            if os.path.isfile(file_path) and f != MANIFEST_FILENAME:
                 if start is not None and count < start:
                     count += 1
                     continue
@@ -172,21 +222,132 @@ class BatchInput(Input):
         else:
             raise FileNotExistError(f"❌ Invalid file: {filename}")
 
+    def _manifest_path(self) -> str:
+        return os.path.join(self.input_folder, MANIFEST_FILENAME)
+
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        """
+        📒 Load the download manifest from the input folder.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Mapping of S3 key to its ETag, size and local mtime.
+        """
+        try:
+            with open(self._manifest_path()) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self, manifest: Dict[str, Dict[str, Any]]) -> None:
+        """
+        📒 Atomically write the download manifest to the input folder.
+
+        Args:
+            manifest (Dict[str, Dict[str, Any]]): Mapping of S3 key to its ETag, size and local mtime.
+        """
+        tmp_path = self._manifest_path() + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self._manifest_path())
+
+    @staticmethod
+    def _is_unchanged(entry: Optional[Dict[str, Any]], obj: Dict[str, Any], local_path: str) -> bool:
+        """
+        🔍 Check whether a previously downloaded object can be skipped.
+
+        Args:
+            entry (Optional[Dict[str, Any]]): The manifest entry of the object, if any.
+            obj (Dict[str, Any]): The object as returned by `list_objects_v2`.
+            local_path (str): Local path of the downloaded object.
+
+        Returns:
+            bool: True if the remote object and the local file are unchanged since the last download.
+        """
+        if not entry or not os.path.isfile(local_path):
+            return False
+        stat = os.stat(local_path)
+        return (
+            entry.get("etag") == obj["ETag"]
+            and entry.get("size") == obj["Size"]
+            and stat.st_size == obj["Size"]
+            and entry.get("mtime") == stat.st_mtime
+        )
+
+    def _download(self, key: str, local_path: str, transfer_config: TransferConfig) -> float:
+        """
+        📥 Download a single object, using ranged GETs for large objects.
+
+        Args:
+            key (str): The S3 key of the object.
+            local_path (str): Where to write the object.
+            transfer_config (TransferConfig): Multipart settings for the transfer.
+
+        Returns:
+            float: The local mtime of the downloaded file.
+        """
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        self.s3_client.download_file(self.bucket, key, local_path, Config=transfer_config)
+        return os.stat(local_path).st_mtime
+
     @retry(stop_max_attempt_number=3, wait_fixed=2000)
     def copy_from_remote(self) -> None:
         """
         🔄 Copy contents from a given S3 bucket and location to the input folder.
 
+        Objects are downloaded concurrently over a shared S3 client, large objects are fetched
+        with parallel ranged GETs, and objects whose ETag and size match the manifest from a
+        previous run are skipped. The manifest is saved even if some downloads fail, so a retry
+        resumes where the last attempt stopped.
+
         Raises:
             Exception: If no input folder is specified.
         """
-        if self.input_folder:
-            s3 = boto3.resource("s3")
-            _bucket = s3.Bucket(self.bucket)
-            prefix = self.s3_folder if self.s3_folder.endswith("/") else self.s3_folder + "/"
-            for obj in _bucket.objects.filter(Prefix=prefix):
-                if not os.path.exists(os.path.dirname(f"{self.input_folder}/{obj.key}")):
-                    os.makedirs(os.path.dirname(f"{self.input_folder}/{obj.key}"))
-                _bucket.download_file(obj.key, f"{self.input_folder}/{obj.key}")
-        else:
+        if not self.input_folder:
             raise Exception("❌ Input folder not specified.")
+
+        prefix = self.s3_folder if self.s3_folder.endswith("/") else self.s3_folder + "/"
+        transfer_config = TransferConfig(
+            multipart_threshold=self.multipart_threshold,
+            multipart_chunksize=self.multipart_chunksize,
+            max_concurrency=max(1, self.max_workers // 4),
+        )
+        manifest = self._load_manifest()
+
+        skipped = 0
+        failed = 0
+        error: Optional[Exception] = None
+        futures = {}
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+                    for obj in page.get("Contents", []):
+                        key = obj["Key"]
+                        if key.endswith("/"):
+                            continue
+                        local_path = os.path.join(self.input_folder, key)
+                        if self._is_unchanged(manifest.get(key), obj, local_path):
+                            skipped += 1
+                            continue
+                        future = executor.submit(self._download, key, local_path, transfer_config)
+                        futures[future] = obj
+
+                for future in as_completed(futures):
+                    obj = futures[future]
+                    try:
+                        mtime = future.result()
+                    except Exception as e:
+                        self.log.error(f"🚫 Failed to download {obj['Key']}: {e}")
+                        failed += 1
+                        error = error or e
+                        continue
+                    manifest[obj["Key"]] = {"etag": obj["ETag"], "size": obj["Size"], "mtime": mtime}
+        finally:
+            self._save_manifest(manifest)
+
+        self.log.info(
+            f"✅ Copied {len(futures) - failed} objects from s3://{self.bucket}/{prefix}, "
+            f"skipped {skipped} unchanged, {failed} failed."
+        )
+        if error:
+            raise error
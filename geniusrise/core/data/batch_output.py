@@ -14,16 +14,26 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import hashlib
 import json
 import logging
 import os
-from typing import Any, List, Optional
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
 
 import boto3
 import shortuuid
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 
 from .output import Output
 
+# Name of the upload manifest kept inside the output folder
+MANIFEST_FILENAME = ".geniusrise_upload_manifest.json"
+
 
 class BatchOutput(Output):
     """
@@ -33,6 +43,9 @@ class BatchOutput(Output):
         output_folder (str): Folder to save output files.
         bucket (str): S3 bucket name.
         s3_folder (str): Folder within the S3 bucket.
+        max_workers (int): Number of concurrent uploads in `copy_to_remote`.
+        multipart_chunksize (int): Part size in bytes for multipart uploads.
+        checksum (bool): Detect changed files by content hash instead of size and mtime.
 
     Usage:
     ```python
@@ -41,9 +54,21 @@ class BatchOutput(Output):
     files = config.list_files()
     content = config.read_file("example.json")
     ```
+
+    Note:
+    - `copy_to_remote` keeps a manifest of uploaded files in the output folder, keyed by their S3 destination,
+      only new or changed files are uploaded on subsequent flushes.
     """
 
-    def __init__(self, output_folder: str, bucket: str, s3_folder: str) -> None:
+    def __init__(
+        self,
+        output_folder: str,
+        bucket: str,
+        s3_folder: str,
+        max_workers: int = 16,
+        multipart_chunksize: int = 16 * 1024 * 1024,
+        checksum: bool = False,
+    ) -> None:
         """
         Initialize a new batch output data.
 
@@ -51,12 +76,39 @@ class BatchOutput(Output):
             output_folder (str): Folder to save output files.
             bucket (str): S3 bucket name.
             s3_folder (str): Folder within the S3 bucket.
+            max_workers (int, optional): Number of concurrent uploads. Defaults to 16.
+            multipart_chunksize (int, optional): Part size in bytes for multipart uploads. Defaults to 16MB.
+            checksum (bool, optional): Detect changes by content hash instead of size and mtime. Defaults to False.
         """
         self.output_folder = output_folder
         self.bucket = bucket
         self.s3_folder = s3_folder
+        self.max_workers = max_workers
+        self.multipart_chunksize = multipart_chunksize
+        self.checksum = checksum
+        self._s3_client: Any = None
+        self._s3_client_lock = threading.Lock()
         self.log = logging.getLogger(self.__class__.__name__)
 
+    @property
+    def s3_client(self) -> Any:
+        """
+        🔌 Shared S3 client, created on first use.
+
+        The client is thread-safe and its connection pool is sized to the number of upload workers.
+
+        Returns:
+            Any: The boto3 S3 client.
+        """
+        if self._s3_client is None:
+            with self._s3_client_lock:
+                if self._s3_client is None:
+                    self._s3_client = boto3.client(
+                        "s3",
+                        config=Config(max_pool_connections=max(10, self.max_workers * 2)),
+                    )
+        return self._s3_client
+
     def save(self, data: Any, filename: Optional[str] = None) -> None:
         """
         💾 Save data to a file in the output folder.
@@ -74,21 +126,149 @@ class BatchOutput(Output):
             self.log.exception(f"🚫 Failed to write data to file: {e}")
             raise
 
-    def copy_to_remote(self) -> None:
+    def _manifest_path(self) -> str:
+        return os.path.join(self.output_folder, MANIFEST_FILENAME)
+
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        """
+        📒 Load the upload manifest from the output folder.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Mapping of S3 destination to the fingerprint it was uploaded with.
+        """
+        try:
+            with open(self._manifest_path()) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self, manifest: Dict[str, Dict[str, Any]]) -> None:
+        """
+        📒 Atomically write the upload manifest to the output folder.
+
+        Args:
+            manifest (Dict[str, Dict[str, Any]]): Mapping of S3 destination to the fingerprint it was uploaded with.
+        """
+        # A temporary file of our own, several writers may share the output folder
+        fd, tmp_path = tempfile.mkstemp(dir=self.output_folder, prefix=MANIFEST_FILENAME + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(manifest, f)
+            os.replace(tmp_path, self._manifest_path())
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def _fingerprint(self, local_path: str) -> Dict[str, Any]:
+        """
+        🔍 Fingerprint a local file for change detection.
+
+        Args:
+            local_path (str): Path of the file.
+
+        Returns:
+            Dict[str, Any]: Size and mtime of the file, or its size and MD5 digest when `checksum` is set.
+        """
+        stat = os.stat(local_path)
+        if not self.checksum:
+            return {"size": stat.st_size, "mtime": stat.st_mtime}
+        digest = hashlib.md5()
+        with open(local_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return {"size": stat.st_size, "md5": digest.hexdigest()}
+
+    def _upload(self, local_path: str, s3_key: str, transfer_config: TransferConfig) -> Tuple[int, float]:
+        """
+        📤 Upload a single file, using multipart uploads for large files.
+
+        Args:
+            local_path (str): Path of the file.
+            s3_key (str): Destination key in the bucket.
+            transfer_config (TransferConfig): Multipart settings for the transfer.
+
+        Returns:
+            Tuple[int, float]: Number of bytes uploaded and the time it took in seconds.
+        """
+        start = time.time()
+        self.s3_client.upload_file(local_path, self.bucket, s3_key, Config=transfer_config)
+        return os.path.getsize(local_path), time.time() - start
+
+    def copy_to_remote(self) -> Dict[str, float]:
         """
         ☁️ Recursively copy all files and directories from the output folder to a given S3 bucket and folder.
+
+        Files are uploaded concurrently over a shared S3 client. Files that have not changed since
+        the last successful upload, according to the manifest in the output folder, are skipped.
+
+        Returns:
+            Dict[str, float]: Aggregate stats: files uploaded, files skipped, bytes, seconds and bytes per second.
         """
-        s3 = boto3.client("s3")
+        transfer_config = TransferConfig(
+            multipart_threshold=self.multipart_chunksize,
+            multipart_chunksize=self.multipart_chunksize,
+            max_concurrency=max(1, self.max_workers // 4),
+        )
+        manifest = self._load_manifest()
+
+        skipped = 0
+        total_bytes = 0
+        error: Optional[Exception] = None
+        futures = {}
+        start = time.time()
         try:
-            for root, _, files in os.walk(self.output_folder):
-                for filename in files:
-                    local_path = os.path.join(root, filename)
-                    relative_path = os.path.relpath(local_path, self.output_folder)
-                    s3_key = os.path.join(self.s3_folder, relative_path)
-                    s3.upload_file(local_path, self.bucket, s3_key)
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for root, _, files in os.walk(self.output_folder):
+                    for filename in files:
+                        local_path = os.path.join(root, filename)
+                        relative_path = os.path.relpath(local_path, self.output_folder)
+                        if relative_path.startswith(MANIFEST_FILENAME):
+                            continue
+                        s3_key = os.path.join(self.s3_folder, relative_path)
+                        destination = f"s3://{self.bucket}/{s3_key}"
+                        fingerprint = self._fingerprint(local_path)
+                        if manifest.get(destination) == fingerprint:
+                            skipped += 1
+                            continue
+                        future = executor.submit(self._upload, local_path, s3_key, transfer_config)
+                        futures[future] = (relative_path, destination, fingerprint)
+
+                for future in as_completed(futures):
+                    relative_path, destination, fingerprint = futures[future]
+                    try:
+                        size, seconds = future.result()
+                    except Exception as e:
+                        self.log.error(f"🚫 Failed to copy {relative_path} to S3: {e}")
+                        error = error or e
+                        continue
+                    total_bytes += size
+                    manifest[destination] = fingerprint
+                    self.log.debug(
+                        f"✅ Uploaded {relative_path}: {size} bytes in {seconds:.3f}s "
+                        f"({size / max(seconds, 1e-9) / 1024 ** 2:.2f} MB/s)."
+                    )
         except Exception as e:
             self.log.exception(f"🚫 Failed to copy files to S3: {e}")
             raise
+        finally:
+            if os.path.isdir(self.output_folder):
+                self._save_manifest(manifest)
+
+        elapsed = time.time() - start
+        stats = {
+            "files": len(futures),
+            "skipped": skipped,
+            "bytes": total_bytes,
+            "seconds": elapsed,
+            "bytes_per_second": total_bytes / max(elapsed, 1e-9),
+        }
+        self.log.info(
+            f"✅ Copied {len(futures)} files ({total_bytes} bytes) to s3://{self.bucket}/{self.s3_folder} "
+            f"in {elapsed:.3f}s ({stats['bytes_per_second'] / 1024 ** 2:.2f} MB/s), skipped {skipped} unchanged."
+        )
+        if error:
+            raise error
+        return stats
 
     def flush(self) -> None:
         """
@@ -106,7 +286,7 @@ class BatchOutput(Output):
         return [
             os.path.join(self.output_folder, f)
             for f in os.listdir(self.output_folder)
-            if os.path.isfile(os.path.join(self.output_folder, f))
+            if os.path.isfile(os.path.join(self.output_folder, f)) and not f.startswith(MANIFEST_FILENAME)
         ]
 
     def read_file(self, filename: str) -> str:
@@ -138,9 +318,8 @@ class BatchOutput(Output):
         Args:
             filename (str): The name of the file to copy.
         """
-        s3 = boto3.client("s3")
         try:
-            s3.upload_file(
+            self.s3_client.upload_file(
                 os.path.join(self.output_folder, filename),
                 self.bucket,
                 os.path.join(self.s3_folder, filename),
@@ -14,20 +14,32 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import asyncio
+import csv
 import json
 import logging
 import os
-import time
 from collections import namedtuple
-from queue import Queue
-from threading import Thread
-from typing import AsyncIterator, Callable, Dict, Iterator, Union
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from queue import Full, Queue
+from threading import Event, Thread
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Union
 
-from .batch_input import BatchInput
+from .batch_input import MANIFEST_FILENAME, BatchInput
 from .streaming_input import StreamingInput
 
 KafkaMessage = namedtuple("KafkaMessage", ["key", "value"])
 
+# Marks the end of the stream in the queue
+_END_OF_STREAM = object()
+
+
+class _ReaderError:
+    """Carries an exception from a reader thread to the consuming thread."""
+
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
 
 class BatchToStreamingInput(StreamingInput, BatchInput):
     """
@@ -47,6 +59,10 @@ class BatchToStreamingInput(StreamingInput, BatchInput):
 
     Note:
     - Ensure the Kafka cluster is running and accessible.
+    - Files are parsed by `num_readers` threads into a queue holding at most `queue_size` messages.
+      Messages from different files may interleave.
+    - `.jsonl` and `.ndjson` files yield one message per line, `.csv` files one message per row,
+      any other file is parsed as a single JSON document.
     """
 
     def __init__(
@@ -57,6 +73,8 @@ class BatchToStreamingInput(StreamingInput, BatchInput):
         input_topic: str = "",
         kafka_cluster_connection_string: str = "",
         group_id: str = "geniusrise",
+        queue_size: int = 1000,
+        num_readers: int = 4,
     ) -> None:
         """
         Initialize a new batch to streaming input data.
@@ -68,21 +86,92 @@ class BatchToStreamingInput(StreamingInput, BatchInput):
             bucket (str): S3 bucket name.
             s3_folder (str): Folder within the S3 bucket.
             group_id (str, optional): Kafka consumer group id. Defaults to "geniusrise".
+            queue_size (int, optional): Maximum number of parsed messages held in memory. Defaults to 1000.
+            num_readers (int, optional): Number of threads parsing files. Defaults to 4.
         """
         self.log = logging.getLogger(self.__class__.__name__)
         BatchInput.__init__(self, input_folder, bucket, s3_folder)
-        self.queue = Queue()  # type: ignore
+        self.queue_size = queue_size
+        self.num_readers = num_readers
+        self.queue: Queue = Queue(maxsize=queue_size)
 
-    def _enqueue_batch_data(self):
-        input_folder = self.input_folder
-        for root, _, files in os.walk(input_folder):
+    def _list_batch_files(self) -> List[str]:
+        """
+        📋 List all files under the input folder, recursively.
+
+        Returns:
+            List[str]: Paths of the files to stream.
+        """
+        file_paths = []
+        for root, _, files in os.walk(self.input_folder):
             for file_name in files:
                 file_path = os.path.join(root, file_name)
-                if os.path.isfile(file_path):
-                    with open(file_path) as f:
-                        item = json.loads(f.read())
-                        kafka_message = KafkaMessage(key=None, value=item)
-                        self.queue.put(kafka_message)
+                if file_name != MANIFEST_FILENAME and os.path.isfile(file_path):
+                    file_paths.append(file_path)
+        return file_paths
+
+    @staticmethod
+    def read_records(file_path: str) -> Iterator[Any]:
+        """
+        📖 Lazily parse the records of a file.
+
+        Args:
+            file_path (str): The file to read.
+
+        Yields:
+            Any: The records of the file, one per line for JSONL, one per row for CSV,
+            or the whole file as one JSON document otherwise.
+        """
+        with open(file_path, newline="") as f:
+            if file_path.endswith((".jsonl", ".ndjson")):
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+            elif file_path.endswith(".csv"):
+                yield from csv.DictReader(f)
+            else:
+                yield json.load(f)
+
+    @staticmethod
+    def _put(queue: Queue, item: Any, *stops: Event) -> bool:
+        """
+        ⏳ Put an item into the queue, blocking while it is full unless any of `stops` is set.
+
+        Returns:
+            bool: False if the stream was stopped before the item could be queued.
+        """
+        while not any(stop.is_set() for stop in stops):
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def _read_file(self, file_path: str, queue: Queue, *stops: Event) -> None:
+        for record in self.read_records(file_path):
+            if not self._put(queue, KafkaMessage(key=None, value=record), *stops):
+                return
+
+    def _enqueue_batch_data(self, queue: Queue, stop: Event) -> None:
+        """
+        📥 Parse every file on a pool of reader threads, then signal the end of the stream.
+
+        Args:
+            queue (Queue): The queue to put messages into.
+            stop (Event): Set by the consumer when it stops iterating.
+        """
+        failed = Event()
+        error = None
+        with ThreadPoolExecutor(max_workers=self.num_readers) as executor:
+            futures = [executor.submit(self._read_file, path, queue, stop, failed) for path in self._list_batch_files()]
+            for future in as_completed(futures):
+                error = future.exception()
+                if error:
+                    self.log.error(f"🚫 Failed to read batch data: {error}")
+                    failed.set()
+                    break
+        self._put(queue, _ReaderError(error) if error else _END_OF_STREAM, stop)
 
     def get(self):
         """
@@ -94,16 +183,21 @@ class BatchToStreamingInput(StreamingInput, BatchInput):
         Raises:
             Exception: If no Kafka consumer is available or an error occurs.
         """
-        # Read the batch data from the file
-        thread = Thread(target=self._enqueue_batch_data)
+        self.queue = Queue(maxsize=self.queue_size)
+        stop = Event()
+        thread = Thread(target=self._enqueue_batch_data, args=(self.queue, stop), daemon=True)
         thread.start()
 
-        time.sleep(1)
-        while True:
-            if not self.queue.empty():
-                yield self.queue.get()
-            else:
-                break
+        try:
+            while True:
+                item = self.queue.get()
+                if item is _END_OF_STREAM:
+                    break
+                if isinstance(item, _ReaderError):
+                    raise item.error
+                yield item
+        finally:
+            stop.set()
 
     def iterator(self) -> Iterator:
         """
@@ -120,22 +214,30 @@ class BatchToStreamingInput(StreamingInput, BatchInput):
 
     async def async_iterator(self) -> AsyncIterator[KafkaMessage]:  # type: ignore
         """
-        🔄 Asynchronous iterator method for yielding data from the Kafka consumer.
+        🔄 Asynchronous iterator method for yielding data from the batch files.
 
-        Yields:
-            KafkaMessage: The next message from the Kafka consumer.
+        Messages are taken off the reader queue on an executor thread, so the event loop is never blocked.
 
-        Raises:
-            Exception: If no Kafka consumer is available.
+        Yields:
+            KafkaMessage: The next message from the batch data.
         """
-        pass  # type: ignore
-
-    def ack(self) -> None:
+        loop = asyncio.get_running_loop()
+        iterator = self.get()
+        try:
+            while True:
+                message: Any = await loop.run_in_executor(None, next, iterator, _END_OF_STREAM)
+                if message is _END_OF_STREAM:
+                    return
+                yield message
+        finally:
+            iterator.close()
+
+    def ack(self, message: Optional[Any] = None) -> None:
         """
-        ✅ Acknowledge the processing of a Kafka message.
+        ✅ Acknowledge the processing of a Kafka message. Batch data has no offsets, so this does nothing.
 
         Args:
-            message (KafkaMessage): The Kafka message to acknowledge.
+            message (Optional[KafkaMessage]): The message to acknowledge.
 
         Raises:
             Exception: If an error occurs while acknowledging the message.
@@ -157,25 +259,40 @@ class BatchToStreamingInput(StreamingInput, BatchInput):
     def commit(self) -> None:
         pass
 
-    def filter_messages(self, filter_func: Callable) -> Iterator:
+    def filter_messages(self, filter_func: Callable, batched: bool = False, **batch_kwargs: Any) -> Iterator:
         """
-        🔍 Filter messages from the Kafka consumer based on a filter function.
+        🔍 Filter messages from the batch data based on a filter function.
 
         Args:
-            filter_func (callable): A function that takes a Kafka message and returns a boolean.
+            filter_func (callable): A function that takes a message and returns a boolean.
+            batched (bool, optional): Yield the filtered messages in lists instead of one at a time. Defaults to False.
+            **batch_kwargs: `max_records`, the number of messages filtered per list. Defaults to 500.
 
         Yields:
-            Kafka message: The next message from the Kafka consumer that passes the filter.
+            Kafka message: The next message that passes the filter, or the non-empty filtered list when `batched` is set.
 
         Raises:
-            Exception: If no Kafka consumer is available or an error occurs.
+            Exception: If an error occurs while reading the batch data.
         """
+        max_records = batch_kwargs.get("max_records", 500)
         try:
+            batch: List[Any] = []
             for message in self.get():
-                if filter_func(message):
-                    yield message
+                if not batched:
+                    if filter_func(message):
+                        yield message
+                    continue
+                batch.append(message)
+                if len(batch) >= max_records:
+                    filtered = [m for m in batch if filter_func(m)]
+                    if filtered:
+                        yield filtered
+                    batch = []
+            filtered = [m for m in batch if filter_func(m)]
+            if filtered:
+                yield filtered
         except Exception as e:
-            self.log.exception(f"🚫 Failed to filter messages from Kafka consumer: {e}")
+            self.log.exception(f"🚫 Failed to filter messages from batch data: {e}")
             raise
 
     def collect_metrics(self) -> Dict[str, Union[int, float]]:
@@ -188,4 +305,5 @@ class BatchToStreamingInput(StreamingInput, BatchInput):
         return {
             "request_latency_avg": 0,
             "request_latency_max": 0,
+            **(self.record_metrics.summary() if self.record_metrics else {}),
         }
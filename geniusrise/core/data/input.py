@@ -18,10 +18,12 @@ import logging
 import time
 from abc import ABC, abstractmethod
 from contextlib import contextmanager
-from typing import Any, Dict, Union
+from typing import Any, Dict, Iterable, Optional, Union
 
 from retrying import retry
 
+from .instrumentation import InstrumentedIterator, RecordMetrics
+
 
 class Input(ABC):
     """
@@ -31,8 +33,11 @@ class Input(ABC):
         log (logging.Logger): Logger instance.
         start_time (float): Start time for metrics.
         end_time (float): End time for metrics.
+        record_metrics (Optional[RecordMetrics]): Per-record metrics, recorded by `instrumented` if set.
     """
 
+    record_metrics: Optional[RecordMetrics] = None
+
     def __init__(self) -> None:
         self.log = logging.getLogger(self.__class__.__name__)
         self.start_time: float = -1.0
@@ -57,7 +62,26 @@ class Input(ABC):
         """
         self.end_time = time.time()
         latency = self.end_time - self.start_time
-        return {"latency": latency}
+        metrics: Dict[str, float] = {"latency": latency}
+        if self.record_metrics:
+            metrics.update(self.record_metrics.summary())
+        return metrics
+
+    def instrumented(self, records: Iterable[Any]) -> Iterable[Any]:
+        """
+        Wrap records handed to a bolt, to record their count, size, inter-arrival and processing time.
+
+        Args:
+            records (Iterable[Any]): The records, like a Kafka consumer.
+
+        Returns:
+            Iterable[Any]: The records, wrapped if `record_metrics` is set.
+        """
+        if self.record_metrics is None:
+            return records
+        if getattr(self, "start_time", -1.0) < 0:
+            self.start_time = time.time()
+        return InstrumentedIterator(records, self.record_metrics)
 
     def validate_data(self, data: Any) -> bool:
         """
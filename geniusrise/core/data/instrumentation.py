@@ -0,0 +1,199 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from prometheus_client import CollectorRegistry, Counter, Histogram, start_http_server
+
+# Per-record times range from microseconds to seconds
+LATENCY_BUCKETS = (1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+
+def _size(record: Any) -> int:
+    """
+    Size in bytes of a record, 0 if it cannot be told without encoding it.
+    """
+    size = getattr(record, "serialized_value_size", None)
+    if isinstance(size, int) and size >= 0:
+        return size
+    value = getattr(record, "value", record)
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    return 0
+
+
+class RecordMetrics:
+    """
+    📊 **RecordMetrics**: Prometheus metrics of the records flowing through an input or an output.
+
+    Counts records and bytes and observes the inter-arrival time of records and the time spent on
+    each record, processing it for inputs or saving it for outputs.
+
+    Attributes:
+        records (Counter): Records seen, exported as `<prefix>_records_total`.
+        bytes (Counter): Bytes of the records, where the size is known, exported as `<prefix>_bytes_total`.
+        inter_arrival (Histogram): Seconds between consecutive records.
+        latency (Histogram): Seconds spent on each record.
+
+    Usage:
+    ```python
+    metrics = RecordMetrics(state.registry, "input", "processing")
+    for message in InstrumentedIterator(consumer, metrics):
+        ...
+    ```
+    """
+
+    def __init__(self, registry: CollectorRegistry, prefix: str, latency: str) -> None:
+        """
+        Initialize the metrics.
+
+        Args:
+            registry (CollectorRegistry): Registry of the metrics, usually the state's.
+            prefix (str): Prefix of the metric names, like "input" or "output".
+            latency (str): What the time spent on a record is, like "processing" or "save".
+        """
+        self.records = Counter(f"{prefix}_records", f"Records of the {prefix}", registry=registry)
+        self.bytes = Counter(f"{prefix}_bytes", f"Bytes of the records of the {prefix}", registry=registry)
+        self.inter_arrival = Histogram(
+            f"{prefix}_inter_arrival_seconds",
+            f"Seconds between records of the {prefix}",
+            buckets=LATENCY_BUCKETS,
+            registry=registry,
+        )
+        self.latency = Histogram(
+            f"{prefix}_{latency}_seconds",
+            f"Seconds of {latency} per record of the {prefix}",
+            buckets=LATENCY_BUCKETS,
+            registry=registry,
+        )
+        self.count = 0
+        self.total_bytes = 0
+        self.first: Optional[float] = None
+        self.last: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def arrived(self, record: Any) -> float:
+        """
+        Count a record.
+
+        Args:
+            record (Any): The record.
+
+        Returns:
+            float: The arrival time, a `time.perf_counter()` value.
+        """
+        now = time.perf_counter()
+        size = _size(record)
+        with self._lock:
+            if self.last is not None:
+                self.inter_arrival.observe(now - self.last)
+            else:
+                self.first = now
+            self.last = now
+            self.count += 1
+            self.total_bytes += size
+        self.records.inc()
+        if size:
+            self.bytes.inc(size)
+        return now
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Summarize the records seen so far.
+
+        Returns:
+            Dict[str, float]: Number of records, bytes, and records per second between the first and last record.
+        """
+        with self._lock:
+            elapsed = (self.last - self.first) if self.first is not None and self.last is not None else 0.0
+            return {
+                "records": self.count,
+                "bytes": self.total_bytes,
+                "records_per_second": (self.count - 1) / elapsed if elapsed > 0 else 0.0,
+            }
+
+
+class InstrumentedIterator:
+    """
+    🔄 **InstrumentedIterator**: Wraps an iterator of records and records their metrics.
+
+    The time from handing out a record to the request for the next one is observed as the time
+    spent processing the record. Attributes other than iteration are passed through to the wrapped
+    object, so a wrapped `KafkaConsumer` can still be committed, sought, etc.
+    """
+
+    def __init__(self, records: Iterable[Any], metrics: RecordMetrics) -> None:
+        """
+        Args:
+            records (Iterable[Any]): The records, like a `KafkaConsumer` or a generator.
+            metrics (RecordMetrics): Where to record the metrics.
+        """
+        self._records = records
+        self._iterator: Optional[Iterator[Any]] = None
+        self._metrics = metrics
+        self._handed_out: Optional[float] = None
+
+    def __iter__(self) -> "InstrumentedIterator":
+        return self
+
+    def __next__(self) -> Any:
+        if self._handed_out is not None:
+            self._metrics.latency.observe(time.perf_counter() - self._handed_out)
+            self._handed_out = None
+        if self._iterator is None:
+            self._iterator = iter(self._records)
+        record = next(self._iterator)
+        self._handed_out = self._metrics.arrived(record)
+        return record
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.__dict__["_records"], name)
+
+
+def instrument_output(output: Any, metrics: RecordMetrics) -> None:
+    """
+    📤 Record the metrics of every record saved to an output, by wrapping its `save` method.
+
+    Args:
+        output (Output): The output.
+        metrics (RecordMetrics): Where to record the metrics.
+    """
+    save = output.save
+
+    def instrumented_save(data: Any, filename: Optional[str] = None) -> None:
+        started = metrics.arrived(data)
+        try:
+            save(data, filename)
+        finally:
+            metrics.latency.observe(time.perf_counter() - started)
+
+    output.save = instrumented_save
+
+
+def serve_metrics(registry: CollectorRegistry, port: int, addr: str = "0.0.0.0") -> None:
+    """
+    🌐 Serve the metrics of a registry on `http://<addr>:<port>/metrics`, from a daemon thread.
+
+    Args:
+        registry (CollectorRegistry): The registry to serve, usually the state's.
+        port (int): The port.
+        addr (str): The address to listen on. Defaults to all interfaces.
+    """
+    start_http_server(port, addr=addr, registry=registry)
+    logging.getLogger(__name__).info(f"📊 Serving metrics on http://{addr}:{port}/metrics")
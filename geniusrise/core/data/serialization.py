@@ -0,0 +1,102 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+from typing import Any, Callable, Dict, List
+
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None  # type: ignore
+
+try:
+    import msgpack  # type: ignore
+except ImportError:
+    msgpack = None
+
+
+def loads(data: bytes) -> Any:
+    """
+    📖 Decode a JSON document, with orjson when it is installed.
+
+    Args:
+        data (bytes): The encoded document.
+
+    Returns:
+        Any: The decoded document.
+    """
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
+def loads_many(values: List[bytes]) -> List[Any]:
+    """
+    📚 Decode many JSON documents, with orjson when it is installed.
+
+    Each document is decoded on its own, so a malformed document raises instead of being
+    merged with its neighbours into different records.
+
+    Args:
+        values (List[bytes]): The encoded documents.
+
+    Returns:
+        List[Any]: The decoded documents, in order.
+
+    Raises:
+        ValueError: If any document is malformed.
+    """
+    return [loads(value) for value in values]
+
+
+def _json_dumps(data: Any) -> bytes:
+    return json.dumps(data).encode("utf-8")
+
+
+def _orjson_dumps(data: Any) -> bytes:
+    return orjson.dumps(data)
+
+
+def _msgpack_dumps(data: Any) -> bytes:
+    return msgpack.packb(data, use_bin_type=True)
+
+
+SERIALIZERS: Dict[str, Callable[[Any], bytes]] = {
+    "json": _json_dumps,
+    "orjson": _orjson_dumps,
+    "msgpack": _msgpack_dumps,
+}
+
+
+def get_serializer(name: str) -> Callable[[Any], bytes]:
+    """
+    🔎 Look up a message serializer by name.
+
+    Args:
+        name (str): One of "json", "orjson" or "msgpack".
+
+    Returns:
+        Callable[[Any], bytes]: A function that encodes a message to bytes.
+
+    Raises:
+        ValueError: If the serializer is unknown or its optional dependency is not installed.
+    """
+    serializer = SERIALIZERS.get(name)
+    if serializer is None:
+        raise ValueError(f"Invalid serializer: {name}")
+    if serializer is _orjson_dumps and orjson is None:
+        raise ValueError("Serializer orjson requires the orjson package.")
+    if serializer is _msgpack_dumps and msgpack is None:
+        raise ValueError("Serializer msgpack requires the msgpack package.")
+    return serializer
@@ -18,7 +18,7 @@ import json
 import logging
 import os
 import tempfile
-from typing import List
+from typing import IO, Any, Iterable, List, Optional
 
 from .batch_input import BatchInput
 from .streaming_input import StreamingInput
@@ -37,6 +37,7 @@ class StreamToBatchInput(StreamingInput, BatchInput):
     Attributes:
         buffer_size (int): Number of messages to buffer.
         temp_folder (str): Temporary folder to store buffered messages.
+        segment_max_bytes (int): Size in bytes after which a new segment file is started.
 
     Usage:
     ```python
@@ -47,6 +48,10 @@ class StreamToBatchInput(StreamingInput, BatchInput):
     Note:
     - Ensure the Kafka cluster is running and accessible.
     - Adjust the `group_id` if needed.
+    - Messages are appended to newline-delimited JSON segment files (`segment_00000.jsonl`, ...) as they
+      are consumed, so memory use does not grow with `buffer_size`. Offsets are committed only after a
+      segment has been fsynced, auto-commit is disabled.
+    - Every `get` replaces the segments of the previous one, the temporary folder holds one batch.
     """
 
     def __init__(
@@ -58,6 +63,7 @@ class StreamToBatchInput(StreamingInput, BatchInput):
         s3_folder: str = "",
         buffer_size: int = 1000,
         group_id: str = "geniusrise",
+        segment_max_bytes: int = 64 * 1024 * 1024,
     ) -> None:
         """
         💥 Initialize a new buffered streaming input data.
@@ -67,8 +73,11 @@ class StreamToBatchInput(StreamingInput, BatchInput):
             kafka_cluster_connection_string (str): Kafka cluster connection string.
             buffer_size (int): Number of messages to buffer.
             group_id (str, optional): Kafka consumer group id. Defaults to "geniusrise".
+            segment_max_bytes (int, optional): Size in bytes after which a new segment is started. Defaults to 64MB.
         """
         self.buffer_size = buffer_size
+        self.segment_max_bytes = segment_max_bytes
+        self.segment_index = 0
         self.temp_folder = tempfile.mkdtemp()
         self.log = logging.getLogger(self.__class__.__name__)
         StreamingInput.__init__(
@@ -76,6 +85,7 @@ class StreamToBatchInput(StreamingInput, BatchInput):
             input_topic=input_topic,
             kafka_cluster_connection_string=kafka_cluster_connection_string,
             group_id=group_id,
+            enable_auto_commit=False,
         )
         # BatchInput.__init__(self, input_folder=input_folder, bucket=bucket, s3_folder=s3_folder)
 
@@ -88,35 +98,111 @@ class StreamToBatchInput(StreamingInput, BatchInput):
         ...
         """
         try:
-            buffered_messages = []
-            for i, message in enumerate(self):
-                if i >= self.buffer_size:
-                    break
+            buffered_messages: List[KafkaMessage] = []
+            for message in self:
                 buffered_messages.append(json.loads(message.value.decode("utf-8")))
+                if len(buffered_messages) >= self.buffer_size:
+                    break
             return buffered_messages
         except Exception as e:
             self.log.error(f"Kafka error occurred: {e}")
             raise
 
-    def store_to_temp(self, messages: List[KafkaMessage]) -> None:
+    def _clear_segments(self) -> None:
+        """
+        🧹 Remove the segments of the previous batch, so a batch step sees only new data.
+        """
+        for name in os.listdir(self.temp_folder):
+            if name.startswith("segment_") and name.endswith(".jsonl"):
+                os.remove(os.path.join(self.temp_folder, name))
+        self.segment_index = 0
+
+    def _open_segment(self) -> IO[bytes]:
+        """
+        📄 Open the next append-only segment file in the temporary folder.
+
+        Returns:
+            IO[bytes]: The segment file.
         """
-        💾 Store buffered messages to temporary folder.
+        path = os.path.join(self.temp_folder, f"segment_{self.segment_index:05d}.jsonl")
+        self.segment_index += 1
+        return open(path, "ab")
+
+    @staticmethod
+    def _seal_segment(segment: IO[bytes]) -> None:
+        """
+        🔒 Flush a segment to disk and close it.
 
         Args:
-            messages (List[KafkaMessage]): List of buffered Kafka messages.
+            segment (IO[bytes]): The segment file.
+        """
+        segment.flush()
+        os.fsync(segment.fileno())
+        segment.close()
+
+    def write_segments(self, values: Iterable[bytes], limit: Optional[int] = None) -> int:
         """
-        for i, message in enumerate(messages):
-            with open(os.path.join(self.temp_folder, f"message_{i}.json"), "w") as f:
-                json.dump(message, f)
+        💾 Append JSON-encoded values to segment files, one per line.
+
+        Raw newlines in a JSON document can only be insignificant whitespace, so they are
+        replaced instead of re-encoding the document. Every segment is fsynced when it is sealed,
+        offsets are committed only after a segment is sealed, never when writing it failed.
+
+        Args:
+            values (Iterable[bytes]): JSON-encoded values.
+            limit (Optional[int]): Stop after this many values.
+
+        Returns:
+            int: Number of values written.
+        """
+        count = 0
+        segment: Optional[IO[bytes]] = None
+        try:
+            for value in values:
+                if segment is None:
+                    segment = self._open_segment()
+                segment.write(value.replace(b"\n", b" ").replace(b"\r", b" ") + b"\n")
+                count += 1
+                if segment.tell() >= self.segment_max_bytes:
+                    self._seal_segment(segment)
+                    segment = None
+                    self.commit()
+                if limit is not None and count >= limit:
+                    break
+        except BaseException:
+            # The open segment may not be on disk, its messages are consumed again after a restart
+            if segment is not None:
+                segment.close()
+            raise
+        if segment is not None:
+            self._seal_segment(segment)
+            self.commit()
+        return count
+
+    def store_to_temp(self, messages: List[Any]) -> None:
+        """
+        💾 Store buffered messages to segment files in the temporary folder.
+
+        Args:
+            messages (List[Any]): List of buffered Kafka messages.
+        """
+        self._clear_segments()
+        self.write_segments((json.dumps(message).encode("utf-8") for message in messages))
 
     def get(self) -> str:
         """
-        📥 Get data from the input topic and buffer it into a temporary folder.
-        ...
+        📥 Get data from the input topic and stream it into segment files in a temporary folder.
+
+        At most `buffer_size` messages are consumed, without holding them in memory. The segments of
+        the previous call are removed first.
+
+        Returns:
+            str: The temporary folder containing the segment files.
         """
         try:
-            buffered_messages = self.buffer_messages()
-            self.store_to_temp(buffered_messages)
+            self._clear_segments()
+            count = self.write_segments((message.value for message in self.instrumented(self)), limit=self.buffer_size)
+            self.log.debug(f"✅ Stored {count} messages into {self.temp_folder}.")
             return self.temp_folder
         except Exception as e:
             self.log.error(f"An error occurred: {e}")
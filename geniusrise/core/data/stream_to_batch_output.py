@@ -14,13 +14,89 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import json
 import logging
-from typing import Any, List, Optional
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
 
 import shortuuid
+from retrying import Retrying
 
 from .batch_output import BatchOutput
 from .streaming_output import StreamingOutput
+from .writers import get_record_writer
+
+
+class FlushPolicy:
+    """
+    🚰 **FlushPolicy**: Decides when buffered messages should be flushed.
+
+    A flush is triggered by whichever limit is reached first.
+
+    Attributes:
+        max_count (Optional[int]): Flush once this many messages are buffered.
+        max_bytes (Optional[int]): Flush once the buffered messages are this large, measured as JSON.
+        max_age (Optional[float]): Flush once the oldest buffered message is this many seconds old.
+
+    Usage:
+    ```python
+    policy = FlushPolicy(max_count=1000, max_bytes=64 * 1024 * 1024, max_age=60)
+    config = StreamToBatchOutput("/path/to/output", "my_bucket", "s3/folder", 1000, flush_policy=policy)
+    ```
+    """
+
+    def __init__(
+        self,
+        max_count: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        max_age: Optional[float] = None,
+    ) -> None:
+        """
+        Initialize a new flush policy.
+
+        Args:
+            max_count (Optional[int], optional): Maximum number of buffered messages. Defaults to None.
+            max_bytes (Optional[int], optional): Maximum size of buffered messages in bytes. Defaults to None.
+            max_age (Optional[float], optional): Maximum age of the oldest buffered message in seconds. Defaults to None.
+        """
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+    def measure(self, data: Any) -> int:
+        """
+        Estimate the size of a message, only when a byte limit is set.
+
+        Args:
+            data (Any): The message.
+
+        Returns:
+            int: The size of the message encoded as JSON, or 0 without a byte limit.
+        """
+        return len(json.dumps(data, default=str)) if self.max_bytes else 0
+
+    def should_flush(self, count: int, size: int, age: float) -> bool:
+        """
+        Check whether the buffer should be flushed.
+
+        Args:
+            count (int): Number of buffered messages.
+            size (int): Size of buffered messages in bytes.
+            age (float): Age of the oldest buffered message in seconds.
+
+        Returns:
+            bool: True if any of the limits has been reached.
+        """
+        if count == 0:
+            return False
+        return (
+            (self.max_count is not None and count >= self.max_count)
+            or (self.max_bytes is not None and size >= self.max_bytes)
+            or (self.max_age is not None and age >= self.max_age)
+        )
 
 
 class StreamToBatchOutput(StreamingOutput, BatchOutput):
@@ -34,6 +110,10 @@ class StreamToBatchOutput(StreamingOutput, BatchOutput):
     Attributes:
         buffer_size (int): Number of messages to buffer.
         buffered_messages (List[Any]): List of buffered messages.
+        output_format (str): Encoding of flushed files: "json", "jsonl", "jsonl.gz", "jsonl.zst" or "parquet".
+        max_file_size (Optional[int]): Roll over to a new file once this many bytes have been written.
+        flush_policy (FlushPolicy): When to flush, defaults to every `buffer_size` messages.
+        background (bool): Whether flushes are written and uploaded on a background thread.
 
     Usage:
     ```python
@@ -41,6 +121,14 @@ class StreamToBatchOutput(StreamingOutput, BatchOutput):
     config.save({"key": "value"})
     config.flush()
     ```
+
+    Note:
+    - "jsonl.zst" requires `zstandard` and "parquet" requires `pyarrow`.
+    - With `background=True` the buffer is swapped out and handed to a flusher thread, so `save` does not
+      wait for S3. At most `max_pending` full buffers are queued, after that `save` blocks until one is uploaded.
+      Uploads are retried `max_retries` times with exponential backoff, files that still fail stay in the
+      output folder and the error is raised from the next `flush`.
+    - Files whose upload failed are uploaded again on every following flush, until they succeed.
     """
 
     def __init__(
@@ -51,6 +139,12 @@ class StreamToBatchOutput(StreamingOutput, BatchOutput):
         buffer_size: int,
         output_topic: str = "",
         kafka_servers: str = "",
+        output_format: str = "json",
+        max_file_size: Optional[int] = None,
+        flush_policy: Optional[FlushPolicy] = None,
+        background: bool = False,
+        max_pending: int = 2,
+        max_retries: int = 5,
     ) -> None:
         """
         💥 Initialize a new buffered streaming output data.
@@ -62,15 +156,44 @@ class StreamToBatchOutput(StreamingOutput, BatchOutput):
             bucket (str): S3 bucket name.
             s3_folder (str): Folder within the S3 bucket.
             buffer_size (int): Number of messages to buffer.
+            output_format (str, optional): Encoding of flushed files. Defaults to "json".
+            max_file_size (Optional[int], optional): Maximum size in bytes of a flushed file. Defaults to None.
+            flush_policy (Optional[FlushPolicy], optional): When to flush. Defaults to every `buffer_size` messages.
+            background (bool, optional): Flush on a background thread. Defaults to False.
+            max_pending (int, optional): Number of full buffers queued for the flusher thread. Defaults to 2.
+            max_retries (int, optional): Upload attempts per file. Defaults to 5.
         """
         self.log = logging.getLogger(self.__class__.__name__)
         BatchOutput.__init__(self, output_folder=output_folder, bucket=bucket, s3_folder=s3_folder)
         self.buffer_size = buffer_size
         self.buffered_messages: List[Any] = []
+        self.output_format = output_format
+        self.writer_class = get_record_writer(output_format)
+        self.max_file_size = max_file_size
+        self.flush_policy = flush_policy if flush_policy else FlushPolicy(max_count=buffer_size)
+        self.background = background
+        self.max_retries = max_retries
+
+        self.buffered_bytes = 0
+        self.buffer_started: Optional[float] = None
+        self.last_error: Optional[Exception] = None
+        self.failed_files: List[str] = []
+        self._lock = threading.RLock()
+        self._pending: queue.Queue = queue.Queue(maxsize=max(1, max_pending))
+        self._stopped = threading.Event()
+        self._in_flight = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        if self.background:
+            self._flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+            self._flusher.start()
+
+    def __del__(self):
+        if hasattr(self, "_stopped"):
+            self._stopped.set()
 
     def save(self, data: Any, filename: Optional[str] = None) -> None:
         """
-        📤 Buffer data into local memory until buffer size is reached.
+        📤 Buffer data into local memory until the flush policy triggers.
 
         Args:
             data (Any): The data to buffer.
@@ -79,23 +202,190 @@ class StreamToBatchOutput(StreamingOutput, BatchOutput):
         Raises:
             Exception: If no Kafka producer is available or an error occurs.
         """
-        self.buffered_messages.append(data)
-        if len(self.buffered_messages) >= self.buffer_size:
-            self.flush()
+        size = self.flush_policy.measure(data)
+        with self._lock:
+            if not self.buffered_messages:
+                self.buffer_started = time.time()
+            self.buffered_messages.append(data)
+            self.buffered_bytes += size
+            if not self._should_flush():
+                return
+            messages = self._swap_buffer()
+        self._hand_off(messages)
+
+    def _should_flush(self) -> bool:
+        age = time.time() - self.buffer_started if self.buffer_started else 0.0
+        return self.flush_policy.should_flush(len(self.buffered_messages), self.buffered_bytes, age)
+
+    def _swap_buffer(self) -> List[Any]:
+        """
+        🔀 Replace the active buffer with an empty one. Must be called with the lock held.
+
+        Returns:
+            List[Any]: The messages that were buffered.
+        """
+        messages = self.buffered_messages
+        self.buffered_messages = []
+        self.buffered_bytes = 0
+        self.buffer_started = None
+        return messages
+
+    def _hand_off(self, messages: List[Any]) -> None:
+        """
+        📨 Flush a full buffer, on the flusher thread if running in the background.
+
+        Blocks when `max_pending` buffers are already waiting to be uploaded.
+
+        Args:
+            messages (List[Any]): The messages to flush.
+        """
+        if self.background:
+            self._pending.put(messages)
+        else:
+            self._flush_messages(messages)
+
+    def _flush_messages(self, messages: List[Any]) -> None:
+        """
+        📤 Write messages to files and upload them with bounded retries, along with files that failed before.
+
+        Every file is attempted, the ones that still fail are kept for the next flush.
+
+        Args:
+            messages (List[Any]): The messages to flush.
+
+        Raises:
+            Exception: The first upload error, when not running in the background.
+        """
+        retrying = Retrying(
+            stop_max_attempt_number=self.max_retries,
+            wait_exponential_multiplier=500,
+            wait_exponential_max=30000,
+        )
+        with self._lock:
+            filenames, self.failed_files = self.failed_files, []
+        filenames += self.write_files(messages)
+
+        failed: List[str] = []
+        error: Optional[Exception] = None
+        for filename in filenames:
+            try:
+                retrying.call(self.copy_file_to_remote, filename)
+            except Exception as e:
+                self.log.error(f"🚫 Giving up on uploading {filename} for now, it is kept in {self.output_folder}: {e}")
+                failed.append(filename)
+                error = error or e
+        with self._lock:
+            self.failed_files = failed + self.failed_files
+
+        if error:
+            if not self.background:
+                raise error
+            self.last_error = error
+
+    def _flush_periodically(self) -> None:
+        """
+        🔁 Flusher thread: uploads handed-off buffers and enforces the age limit.
+        """
+        interval = min(1.0, self.flush_policy.max_age) if self.flush_policy.max_age else 1.0
+        while not self._stopped.is_set():
+            try:
+                messages = self._pending.get(timeout=interval)
+            except queue.Empty:
+                with self._in_flight:
+                    with self._lock:
+                        messages = self._swap_buffer() if self._should_flush() else []
+                    if messages:
+                        self._flush_in_background(messages)
+                continue
+            try:
+                with self._in_flight:
+                    self._flush_in_background(messages)
+            finally:
+                self._pending.task_done()
+
+    def _flush_in_background(self, messages: List[Any]) -> None:
+        try:
+            self._flush_messages(messages)
+        except Exception as e:
+            self.log.exception(f"🚫 Failed to flush messages: {e}")
+            self.last_error = e
+
+    def write_files(self, messages: List[Any]) -> List[str]:
+        """
+        ✍️ Stream messages into one or more files in the output folder.
+
+        Messages are encoded one at a time, a new file is started whenever `max_file_size` is reached.
+
+        Args:
+            messages (List[Any]): The messages to write.
+
+        Returns:
+            List[str]: Names of the written files, relative to the output folder.
+        """
+        filenames: List[str] = []
+        writer = None
+        try:
+            for message in messages:
+                if writer is None:
+                    filename = f"{shortuuid.uuid()}.{self.writer_class.extension}"
+                    writer = self.writer_class(os.path.join(self.output_folder, filename))
+                writer.write(message)
+                if self.max_file_size and writer.bytes_written >= self.max_file_size:
+                    writer.close()
+                    filenames.extend(os.path.basename(path) for path in writer.paths)
+                    writer = None
+        finally:
+            if writer is not None:
+                writer.close()
+                filenames.extend(os.path.basename(path) for path in writer.paths)
+        self.log.debug(f"✅ Wrote {len(messages)} messages into {len(filenames)} files in {self.output_folder}.")
+        return filenames
 
     def flush(self) -> None:
         """
-        🔄 Flush the output by saving buffered messages to a file and copying it to S3.
+        🔄 Flush the output by saving buffered messages to files and copying them to S3.
+
+        In background mode this waits until every handed-off buffer has been uploaded.
 
         Raises:
             Exception: If no Kafka producer is available or an error occurs.
         """
-        if self.buffered_messages:
-            # Generate a unique filename
-            filename = str(shortuuid.uuid()) + ".json"
-            # Save buffered messages to a file in the output folder
-            BatchOutput.save(self, self.buffered_messages, filename)
-            # Copy the file to S3
-            self.copy_file_to_remote(filename)
-            # Clear the buffer
-            self.buffered_messages.clear()
+        with self._lock:
+            messages = self._swap_buffer()
+            retry = bool(self.failed_files)
+        if messages or retry:
+            self._hand_off(messages)
+        if self.background:
+            self._pending.join()
+            with self._in_flight:
+                pass
+            if self.last_error:
+                error, self.last_error = self.last_error, None
+                raise error
+
+    def collect_metrics(self) -> Dict[str, int]:
+        """
+        📊 Collect buffering metrics, messages are flushed to S3 rather than produced to Kafka.
+
+        Returns:
+            Dict[str, int]: Messages and bytes buffered, buffers waiting to be uploaded and files whose upload failed.
+        """
+        with self._lock:
+            return {
+                "buffered": len(self.buffered_messages),
+                "buffered_bytes": self.buffered_bytes,
+                "pending": self._pending.qsize(),
+                "failed_files": len(self.failed_files),
+            }
+
+    def close(self) -> None:
+        """
+        🚪 Flush any buffered messages and stop the background flusher.
+        """
+        try:
+            self.flush()
+        finally:
+            self._stopped.set()
+            if self._flusher is not None:
+                self._flusher.join()
+                self._flusher = None
@@ -14,14 +14,21 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import asyncio
 import logging
-from typing import Any, AsyncIterator, Callable, Dict, Iterator, Union
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Set, TypeAlias, Union
 
 from kafka import KafkaConsumer, TopicPartition
+from kafka.consumer.fetcher import ConsumerRecord
+from kafka.structs import OffsetAndMetadata
 
 from .input import Input
+from .serialization import loads_many
 
-KafkaMessage = dict
+KafkaMessage: TypeAlias = ConsumerRecord
 
 
 class KafkaConnectionError(Exception):
@@ -30,6 +37,212 @@ class KafkaConnectionError(Exception):
     pass
 
 
+class CommitManager:
+    """
+    📌 **CommitManager**: Tracks processed offsets and commits them in the background.
+
+    Processed offsets are recorded per partition and committed asynchronously once `commit_every`
+    messages have been processed or `commit_interval_ms` has passed since the last commit, whichever
+    comes first. Only offsets of processed messages are committed, so delivery is at-least-once.
+    Messages that may finish out of order are registered with `track` when handed out, a partition
+    is then committed only up to its lowest tracked offset that is not processed yet.
+    The consumer must not auto-commit.
+
+    The consumer is not thread-safe. While `poll_thread` is set, commits due on other threads are left
+    to that thread, which runs them with `run_requested` before it polls again.
+
+    Attributes:
+        consumer (KafkaConsumer): The consumer whose offsets are committed.
+        commit_every (int): Number of processed messages that triggers a commit.
+        commit_interval_ms (int): Time in milliseconds after which a commit is triggered.
+        poll_thread (Optional[int]): Identifier of the thread that owns the consumer, if it polls on its own thread.
+    """
+
+    def __init__(self, consumer: KafkaConsumer, commit_every: int = 1000, commit_interval_ms: int = 5000) -> None:
+        """
+        Initialize a new commit manager.
+
+        Args:
+            consumer (KafkaConsumer): The consumer whose offsets are committed.
+            commit_every (int, optional): Commit after this many processed messages. Defaults to 1000.
+            commit_interval_ms (int, optional): Commit after this many milliseconds. Defaults to 5000.
+        """
+        self.log = logging.getLogger(self.__class__.__name__)
+        self.consumer = consumer
+        self.commit_every = commit_every
+        self.commit_interval_ms = commit_interval_ms
+
+        self.processed: Dict[TopicPartition, int] = {}
+        # Highest processed offset + 1, and tracked offsets not processed yet
+        self.highest: Dict[TopicPartition, int] = {}
+        self.in_flight: Dict[TopicPartition, Set[int]] = {}
+        self.committed: Dict[TopicPartition, int] = {}
+        self.first_processed: Dict[TopicPartition, int] = {}
+        self.uncommitted = 0
+        self.last_commit = time.time()
+
+        self.commits = 0
+        self.commit_failures = 0
+        self.commit_latency_total = 0.0
+        self.commit_latency_max = 0.0
+        self.poll_thread: Optional[int] = None
+        self._commit_requested = False
+        self._mark_consumed_requested = False
+        self._lock = threading.Lock()
+
+    def _foreign_thread(self) -> bool:
+        return self.poll_thread is not None and threading.get_ident() != self.poll_thread
+
+    def track(self, tp: TopicPartition, offset: int) -> None:
+        """
+        📍 Register a message handed out for processing, its partition is not committed past it until it is marked.
+
+        Args:
+            tp (TopicPartition): The partition of the message.
+            offset (int): The offset of the message.
+        """
+        with self._lock:
+            self.in_flight.setdefault(tp, set()).add(offset)
+
+    def mark(self, tp: TopicPartition, offset: int, count: int = 1) -> None:
+        """
+        ✅ Record that a message has been processed.
+
+        Untracked messages also stand for everything before them in their partition. With tracked
+        messages in flight, the partition's processed offset only moves up to the lowest one unfinished.
+
+        Args:
+            tp (TopicPartition): The partition of the message.
+            offset (int): The offset of the message.
+            count (int, optional): Number of messages this mark covers. Defaults to 1.
+        """
+        with self._lock:
+            self.first_processed.setdefault(tp, offset)
+            self.highest[tp] = max(self.highest.get(tp, -1), offset + 1)
+            pending = self.in_flight.get(tp, set())
+            pending.discard(offset)
+            watermark = min(pending) if pending else self.highest[tp]
+            if watermark > self.processed.get(tp, -1):
+                self.processed[tp] = watermark
+            self.uncommitted += count
+        self.maybe_commit()
+
+    def mark_consumed(self) -> None:
+        """
+        ✅ Record everything consumed so far, on all assigned partitions, as processed.
+        """
+        if self._foreign_thread():
+            with self._lock:
+                self._mark_consumed_requested = True
+            return
+        with self._lock:
+            for tp in self.consumer.assignment():
+                self.processed[tp] = self.consumer.position(tp)
+                self.highest[tp] = max(self.highest.get(tp, -1), self.processed[tp])
+                self.first_processed.setdefault(tp, self.processed[tp])
+                self.in_flight.pop(tp, None)
+            self.uncommitted += 1
+        self.maybe_commit()
+
+    def _pending_offsets(self) -> Dict[TopicPartition, OffsetAndMetadata]:
+        return {
+            tp: OffsetAndMetadata(offset, None)
+            for tp, offset in self.processed.items()
+            if offset > self.committed.get(tp, -1)
+        }
+
+    def _record_latency(self, start: float) -> None:
+        latency = time.time() - start
+        self.commits += 1
+        self.commit_latency_total += latency
+        self.commit_latency_max = max(self.commit_latency_max, latency)
+
+    def maybe_commit(self) -> None:
+        """
+        ⏱️ Commit asynchronously if enough messages were processed or enough time has passed.
+        """
+        if self.uncommitted >= self.commit_every or (time.time() - self.last_commit) * 1000 >= self.commit_interval_ms:
+            if self._foreign_thread():
+                with self._lock:
+                    self._commit_requested = True
+            else:
+                self.commit_async()
+
+    def run_requested(self) -> None:
+        """
+        📬 Run the marks and commits requested from other threads. Called by the thread that owns the consumer.
+        """
+        with self._lock:
+            mark_consumed, self._mark_consumed_requested = self._mark_consumed_requested, False
+            commit, self._commit_requested = self._commit_requested, False
+        if mark_consumed:
+            self.mark_consumed()
+        elif commit:
+            self.commit_async()
+
+    def commit_async(self) -> None:
+        """
+        📤 Commit processed offsets without waiting for the broker.
+        """
+        with self._lock:
+            offsets = self._pending_offsets()
+            self.uncommitted = 0
+            self.last_commit = time.time()
+        if not offsets:
+            return
+        start = time.time()
+
+        def on_commit(committed_offsets: Dict[TopicPartition, OffsetAndMetadata], response: Any) -> None:
+            if isinstance(response, Exception):
+                self.commit_failures += 1
+                self.log.warning(f"🚫 Failed to commit offsets, they will be retried: {response}")
+                return
+            self._record_latency(start)
+            with self._lock:
+                for tp, offset_and_metadata in committed_offsets.items():
+                    self.committed[tp] = max(self.committed.get(tp, -1), offset_and_metadata.offset)
+
+        self.consumer.commit_async(offsets=offsets, callback=on_commit)
+
+    def commit_sync(self) -> None:
+        """
+        📤 Commit processed offsets and wait for the broker to acknowledge them.
+        """
+        with self._lock:
+            offsets = self._pending_offsets()
+            self.uncommitted = 0
+            self.last_commit = time.time()
+        if not offsets:
+            return
+        start = time.time()
+        self.consumer.commit(offsets=offsets)
+        self._record_latency(start)
+        with self._lock:
+            for tp, offset_and_metadata in offsets.items():
+                self.committed[tp] = max(self.committed.get(tp, -1), offset_and_metadata.offset)
+
+    def metrics(self) -> Dict[str, Union[int, float]]:
+        """
+        📊 Commit metrics.
+
+        Returns:
+            Dict[str, Union[int, float]]: Commit lag (processed but uncommitted messages, summed over
+            partitions), commit count, failures and average and maximum commit latency in seconds.
+        """
+        with self._lock:
+            lag = sum(
+                offset - self.committed.get(tp, self.first_processed.get(tp, offset))
+                for tp, offset in self.processed.items()
+            )
+        return {
+            "commit_lag": lag,
+            "commits": self.commits,
+            "commit_failures": self.commit_failures,
+            "commit_latency_avg": self.commit_latency_total / self.commits if self.commits else 0.0,
+            "commit_latency_max": self.commit_latency_max,
+        }
+
+
 class StreamingInput(Input):
     """
     📡 **StreamingInput**: Manages streaming input data.
@@ -43,11 +256,27 @@ class StreamingInput(Input):
     config = StreamingInput("my_topic", "localhost:9094")
     for message in config.iterator():
         print(message.value)
+
+    # or, from a coroutine, with up to 64 messages in flight
+    await config.process_async(handle_message, concurrency=64)
+
+    # or commit only what has been processed, at-least-once
+    config = StreamingInput("my_topic", "localhost:9094", enable_auto_commit=False)
+    for message in config.iterator():
+        handle_message(message)
+        config.ack(message)
+
+    # or in batches of decoded records, one list per partition
+    for batch in config.iter_batches(max_records=256, max_wait_ms=100):
+        model.predict([message.value for message in batch])
     ```
 
     Note:
     - Ensure the Kafka cluster is running and accessible.
     - Adjust the `group_id` if needed.
+    - Offsets are auto-committed by the consumer by default. With `enable_auto_commit=False` only
+      acknowledged offsets are committed, by the `CommitManager`, and `process_async` acknowledges
+      each message once its handler succeeded.
     """
 
     def __init__(
@@ -55,6 +284,8 @@ class StreamingInput(Input):
         input_topic: str,
         kafka_cluster_connection_string: str,
         group_id: str = "geniusrise",
+        commit_every: int = 1000,
+        commit_interval_ms: int = 5000,
         **kwargs,
     ) -> None:
         """
@@ -64,6 +295,11 @@ class StreamingInput(Input):
             input_topic (str): Kafka topic to consume data.
             kafka_cluster_connection_string (str): Kafka cluster connection string.
             group_id (str, optional): Kafka consumer group id. Defaults to "geniusrise".
+            commit_every (int, optional): Commit acknowledged offsets after this many messages. Defaults to 1000.
+            commit_interval_ms (int, optional): Commit acknowledged offsets after this many milliseconds.
+                Defaults to 5000.
+            **kwargs: Additional arguments for the `KafkaConsumer`. With `enable_auto_commit=False`, offsets
+                are only committed once acknowledged with `ack`. Defaults to auto-commit, `ack` is then a no-op.
         """
         super(Input, self).__init__()
         self.log = logging.getLogger(self.__class__.__name__)
@@ -71,6 +307,9 @@ class StreamingInput(Input):
         self.kafka_cluster_connection_string = kafka_cluster_connection_string
         self.group_id = group_id
 
+        # Auto-commit also commits offsets of messages consumed but not processed yet, acks are opt-in
+        self.auto_commit = kwargs.pop("enable_auto_commit", True)
+
         try:
             self.consumer = KafkaConsumer(
                 self.input_topic,
@@ -78,12 +317,22 @@ class StreamingInput(Input):
                 group_id=self.group_id,
                 max_poll_interval_ms=600000,  # 10 minutes
                 session_timeout_ms=10000,  # 10 seconds
+                enable_auto_commit=self.auto_commit,
                 **kwargs,
             )
         except Exception as e:
             self.log.exception(f"🚫 Failed to create Kafka consumer: {e}")
             raise KafkaConnectionError("Failed to connect to Kafka.")
 
+        self.commit_manager = CommitManager(
+            self.consumer,
+            commit_every=commit_every,
+            commit_interval_ms=commit_interval_ms,
+        )
+
+        # The consumer is not thread-safe, async consumption polls it on this single thread
+        self._poll_executor: Optional[ThreadPoolExecutor] = None
+
     def __del__(self):
         self.close()
 
@@ -126,39 +375,199 @@ class StreamingInput(Input):
         else:
             raise KafkaConnectionError("No Kafka consumer available.")
 
-    async def async_iterator(self) -> AsyncIterator[KafkaMessage]:
+    async def async_iterator(self, max_records: int = 500) -> AsyncIterator[KafkaMessage]:
         """
         🔄 Asynchronous iterator method for yielding data from the Kafka consumer.
 
+        The synchronous consumer is polled on a dedicated executor thread, so the event loop is never
+        blocked on the broker. Like `iterator`, this stops after `consumer_timeout_ms` without messages.
+
+        Args:
+            max_records (int, optional): Maximum number of messages fetched per poll. Defaults to 500.
+
         Yields:
             KafkaMessage: The next message from the Kafka consumer.
 
         Raises:
             Exception: If no Kafka consumer is available.
         """
-        if self.consumer:
+        if not self.consumer:
+            raise KafkaConnectionError("No Kafka consumer available.")
+
+        if self._poll_executor is None:
+            self._poll_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kafka-poll")
+        loop = asyncio.get_running_loop()
+        timeout_ms = self.consumer.config.get("consumer_timeout_ms", float("inf"))
+        last_message = time.time()
+
+        def poll() -> Dict[TopicPartition, List[KafkaMessage]]:
+            # Acks arrive on the event loop thread, their commits run here, next to the polls
+            self.commit_manager.poll_thread = threading.get_ident()
+            self.commit_manager.run_requested()
+            return self.consumer.poll(timeout_ms=min(1000, timeout_ms), max_records=max_records)
+
+        try:
+            while True:
+                records = await loop.run_in_executor(self._poll_executor, poll)
+                if not records:
+                    if (time.time() - last_message) * 1000 >= timeout_ms:
+                        return
+                    continue
+                last_message = time.time()
+                for tp, messages in records.items():
+                    for message in messages:
+                        if not self.auto_commit:
+                            # Handlers may finish out of order, commits must not pass unfinished messages
+                            self.commit_manager.track(tp, message.offset)
+                        yield message
+        except Exception as e:
+            self.log.exception(f"🚫 Failed to iterate over Kafka consumer: {e}")
+            raise
+        finally:
+            # Hand the consumer back, after any poll still running and the commits requested meanwhile
+            self.commit_manager.poll_thread = None
+            await loop.run_in_executor(self._poll_executor, self.commit_manager.run_requested)
+
+    async def process_async(
+        self,
+        handler: Callable[[KafkaMessage], Awaitable[Any]],
+        concurrency: int = 64,
+        max_records: int = 500,
+    ) -> int:
+        """
+        ⚡ Run an async handler over the stream with many messages in flight.
+
+        At most `concurrency` handler calls run at once, consumption pauses while that many are pending.
+        Without auto-commit, each message is acknowledged once its handler succeeded, offsets are
+        committed up to the first message still running or failed.
+
+        Args:
+            handler (Callable[[KafkaMessage], Awaitable[Any]]): Coroutine function called with each message.
+            concurrency (int, optional): Maximum number of in-flight messages. Defaults to 64.
+            max_records (int, optional): Maximum number of messages fetched per poll. Defaults to 500.
+
+        Returns:
+            int: Number of messages processed.
+
+        Raises:
+            Exception: The first exception raised by the handler.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        pending: set = set()
+        errors: list = []
+        processed = 0
+
+        async def run(message: KafkaMessage) -> None:
             try:
-                async for message in self.consumer:
-                    yield message
+                await handler(message)
+                if not self.auto_commit:
+                    self.ack(message)
             except Exception as e:
-                self.log.exception(f"🚫 Failed to iterate over Kafka consumer: {e}")
-                raise
-        else:
-            raise KafkaConnectionError("No Kafka consumer available.")
+                errors.append(e)
+            finally:
+                semaphore.release()
+
+        try:
+            async for message in self.async_iterator(max_records=max_records):
+                await semaphore.acquire()
+                if errors:
+                    raise errors[0]
+                task = asyncio.create_task(run(message))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+                processed += 1
+            if pending:
+                await asyncio.gather(*pending)
+            if errors:
+                raise errors[0]
+        finally:
+            for task in pending:
+                task.cancel()
+        return processed
+
+    def iter_batches(
+        self,
+        max_records: int = 500,
+        max_wait_ms: int = 1000,
+        commit: bool = True,
+    ) -> Iterator[List[KafkaMessage]]:
+        """
+        📦 Iterate over the stream in batches of decoded messages.
+
+        Messages are polled until `max_records` are fetched or `max_wait_ms` has passed, their values
+        are decoded from JSON in one pass per partition, and a list is yielded for every partition.
+        When `commit` is set and auto-commit is off, a batch is acknowledged once the caller asks for the next
+        batch, i.e. after it has been processed, and committed by the `CommitManager`. Like `iterator`, this
+        stops after `consumer_timeout_ms` without messages.
+
+        Args:
+            max_records (int, optional): Maximum number of messages per poll cycle. Defaults to 500.
+            max_wait_ms (int, optional): Maximum time in milliseconds to wait to fill a batch. Defaults to 1000.
+            commit (bool, optional): Acknowledge each batch after it is processed. Defaults to True.
+
+        Yields:
+            List[KafkaMessage]: Messages of one partition, with `value` decoded.
+
+        Raises:
+            Exception: If no Kafka consumer is available or an error occurs.
+        """
+        if not self.consumer:
+            raise KafkaConnectionError("🚫 No Kafka consumer available.")
+
+        timeout_ms = self.consumer.config.get("consumer_timeout_ms", float("inf"))
+        last_message = time.time()
+        try:
+            while True:
+                records: Dict[TopicPartition, List[Any]] = {}
+                count = 0
+                deadline = time.time() + max_wait_ms / 1000
+                while count < max_records:
+                    remaining_ms = int((deadline - time.time()) * 1000)
+                    if remaining_ms <= 0:
+                        break
+                    polled = self.consumer.poll(timeout_ms=remaining_ms, max_records=max_records - count)
+                    for tp, messages in polled.items():
+                        records.setdefault(tp, []).extend(messages)
+                        count += len(messages)
+
+                if not count:
+                    if (time.time() - last_message) * 1000 >= timeout_ms:
+                        return
+                    continue
+                last_message = time.time()
+
+                for tp, messages in records.items():
+                    values = loads_many([message.value for message in messages])
+                    yield [message._replace(value=value) for message, value in zip(messages, values)]
+                    if commit and not self.auto_commit:
+                        self.commit_manager.mark(tp, messages[-1].offset, count=len(messages))
+        except Exception as e:
+            self.log.exception(f"🚫 Failed to iterate over Kafka consumer in batches: {e}")
+            raise
 
-    def ack(self) -> None:
+    def ack(self, message: Optional[KafkaMessage] = None) -> None:
         """
         ✅ Acknowledge the processing of a Kafka message.
 
+        Acknowledged offsets are committed asynchronously by the `CommitManager`, in batches of
+        `commit_every` messages or every `commit_interval_ms`. `close` commits whatever is left.
+        With auto-commit on, the consumer commits on its own and acknowledging does nothing.
+
         Args:
-            message (KafkaMessage): The Kafka message to acknowledge.
+            message (Optional[KafkaMessage]): The Kafka message to acknowledge. If not given, everything
+                consumed so far is acknowledged.
 
         Raises:
             Exception: If an error occurs while acknowledging the message.
         """
+        if self.auto_commit:
+            return
         try:
-            self.consumer.commit()
-            self.log.info("Acknowledged")
+            if message is not None:
+                self.commit_manager.mark(TopicPartition(message.topic, message.partition), message.offset)
+            else:
+                self.commit_manager.mark_consumed()
+            self.log.debug("Acknowledged")
         except Exception as e:
             raise KafkaConnectionError(f"🚫 Failed to acknowledge message: {e}")
 
@@ -188,16 +597,24 @@ class StreamingInput(Input):
 
     def close(self) -> None:
         """
-        🚪 Close the Kafka consumer.
+        🚪 Commit acknowledged offsets and close the Kafka consumer.
 
         Raises:
             Exception: If an error occurs while closing the consumer.
         """
         if self.consumer:
+            try:
+                if getattr(self, "commit_manager", None) and not getattr(self, "auto_commit", True):
+                    self.commit_manager.commit_sync()
+            except Exception as e:
+                self.log.error(f"🚫 Failed to commit offsets on close: {e}")
             try:
                 self.consumer.close()
             except Exception as e:
                 self.log.debug(f"🚫 Failed to close Kafka consumer: {e}")
+        if getattr(self, "_poll_executor", None):
+            self._poll_executor.shutdown(wait=False)  # type: ignore
+            self._poll_executor = None
 
     def seek(self, target_offset: int) -> None:
         if self.consumer:
@@ -248,24 +665,34 @@ class StreamingInput(Input):
             except Exception as e:
                 raise KafkaConnectionError(f"🚫 Failed to commit offsets: {e}")
 
-    def filter_messages(self, filter_func: Callable) -> Iterator:
+    def filter_messages(self, filter_func: Callable, batched: bool = False, **batch_kwargs: Any) -> Iterator:
         """
         🔍 Filter messages from the Kafka consumer based on a filter function.
 
         Args:
             filter_func (callable): A function that takes a Kafka message and returns a boolean.
+            batched (bool, optional): Filter the batches of `iter_batches` instead of single messages,
+                the filter then receives messages with decoded values. Defaults to False.
+            **batch_kwargs: Keyword arguments passed to `iter_batches`.
 
         Yields:
-            Kafka message: The next message from the Kafka consumer that passes the filter.
+            Kafka message: The next message from the Kafka consumer that passes the filter,
+            or the non-empty filtered batch when `batched` is set.
 
         Raises:
             Exception: If no Kafka consumer is available or an error occurs.
         """
         if self.consumer:
             try:
-                for message in self.consumer:
-                    if filter_func(message):
-                        yield message
+                if batched:
+                    for batch in self.iter_batches(**batch_kwargs):
+                        filtered = [message for message in batch if filter_func(message)]
+                        if filtered:
+                            yield filtered
+                else:
+                    for message in self.consumer:
+                        if filter_func(message):
+                            yield message
             except Exception as e:
                 self.log.exception(f"🚫 Failed to filter messages from Kafka consumer: {e}")
                 raise
@@ -288,6 +715,8 @@ class StreamingInput(Input):
             return {
                 "request_latency_avg": request_latency_avg,
                 "request_latency_max": request_latency_max,
+                **self.commit_manager.metrics(),
+                **(self.record_metrics.summary() if self.record_metrics else {}),
             }
         else:
             raise KafkaConnectionError("No Kafka consumer available.")
@@ -14,13 +14,35 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import json
 import logging
-from typing import Any, List, Optional
+import threading
+from typing import Any, Dict, List, Optional, Union
 
 from kafka import KafkaProducer
+from kafka.codec import has_lz4
 
 from .output import Output
+from .serialization import get_serializer
+
+# Producer settings for common workloads, individual settings can still be overridden
+PRODUCER_PROFILES: Dict[str, Dict[str, Any]] = {
+    # kafka-python defaults: no lingering, 16KB batches, uncompressed, leader acks
+    "default": {},
+    # Larger, compressed batches: a little latency for many more records per request
+    "throughput": {
+        "linger_ms": 20,
+        "batch_size": 256 * 1024,
+        "compression_type": "lz4" if has_lz4() else "gzip",
+        "acks": 1,
+        "buffer_memory": 64 * 1024 * 1024,
+    },
+    # Wait for all in-sync replicas and keep ordering across retries
+    "durable": {
+        "acks": "all",
+        "retries": 5,
+        "max_in_flight_requests_per_connection": 1,
+    },
+}
 
 
 class StreamingOutput(Output):
@@ -36,24 +58,73 @@ class StreamingOutput(Output):
     config = StreamingOutput("my_topic", "localhost:9094")
     config.save({"key": "value"}, "ignored_filename")
     config.flush()
+
+    # batched, compressed and encoded with orjson
+    config = StreamingOutput("my_topic", "localhost:9094", profile="throughput", serializer="orjson")
+    config.save_bulk(records)
+    config.flush()
     ```
 
     Note:
     - Ensure the Kafka cluster is running and accessible.
     """
 
-    def __init__(self, output_topic: str, kafka_servers: str) -> None:
+    def __init__(
+        self,
+        output_topic: str,
+        kafka_servers: str,
+        profile: str = "default",
+        serializer: str = "json",
+        linger_ms: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        compression_type: Optional[str] = None,
+        acks: Optional[Union[int, str]] = None,
+        **kwargs,
+    ) -> None:
         """
         Initialize a new streaming output data.
 
         Args:
             output_topic (str): Kafka topic to ingest data.
             kafka_servers (str): Kafka bootstrap servers.
+            profile (str, optional): Producer profile, one of "default", "throughput" or "durable".
+                Defaults to "default".
+            serializer (str, optional): Message serializer, one of "json", "orjson" or "msgpack". Defaults to "json".
+            linger_ms (Optional[int], optional): Time to wait for more records before sending a batch.
+            batch_size (Optional[int], optional): Maximum size of a batch in bytes.
+            compression_type (Optional[str], optional): Batch compression, "gzip", "lz4", "snappy" or "zstd".
+            acks (Optional[Union[int, str]], optional): Acknowledgements required per request, 0, 1 or "all".
+            **kwargs: Additional arguments for the `KafkaProducer`.
+
+        Raises:
+            ValueError: If the profile or the serializer is unknown.
         """
         self.output_topic = output_topic
         self.log = logging.getLogger(self.__class__.__name__)
+        self.producer = None
+        if profile not in PRODUCER_PROFILES:
+            raise ValueError(f"Invalid producer profile: {profile}")
+        self.serialize = get_serializer(serializer)
+
+        self.sent = 0
+        self.delivered = 0
+        self.failed = 0
+        self.last_error: Optional[Exception] = None
+        self._delivery_lock = threading.Lock()
+
+        overrides = {
+            "linger_ms": linger_ms,
+            "batch_size": batch_size,
+            "compression_type": compression_type,
+            "acks": acks,
+        }
+        config = {
+            **PRODUCER_PROFILES[profile],
+            **{k: v for k, v in overrides.items() if v is not None},
+            **kwargs,
+        }
         try:
-            self.producer = KafkaProducer(bootstrap_servers=kafka_servers)
+            self.producer = KafkaProducer(bootstrap_servers=kafka_servers, **config)
         except Exception as e:
             self.log.exception(f"🚫 Failed to create Kafka producer: {e}")
             raise
@@ -62,6 +133,31 @@ class StreamingOutput(Output):
     def __del__(self):
         self.close()
 
+    def _on_delivery(self, record_metadata: Any) -> None:
+        with self._delivery_lock:
+            self.delivered += 1
+
+    def _on_error(self, error: Exception) -> None:
+        with self._delivery_lock:
+            self.failed += 1
+            self.last_error = error
+        self.log.error(f"🚫 Failed to deliver message to {self.output_topic} topic: {error}")
+
+    def _send(self, value: Any, key: Any = None, partition: Optional[int] = None) -> None:
+        """
+        📨 Serialize and send a message, delivery is accounted for by callbacks.
+        """
+        future = self.producer.send(  # type: ignore
+            self.output_topic,
+            value=self.serialize(value),
+            key=self.serialize(key) if key is not None else None,
+            partition=partition,
+        )
+        with self._delivery_lock:
+            self.sent += 1
+        future.add_callback(self._on_delivery)
+        future.add_errback(self._on_error)
+
     def save(self, data: Any, filename: Optional[str] = None) -> None:
         """
         📤 Ingest data into the Kafka topic.
@@ -75,7 +171,7 @@ class StreamingOutput(Output):
         """
         if self.producer:
             try:
-                self.producer.send(self.output_topic, bytes(json.dumps(data).encode("utf-8")))
+                self._send(data)
                 self.log.debug(f"✅ Inserted the data into {self.output_topic} topic.")
             except Exception as e:
                 self.log.exception(f"🚫 Failed to send data to Kafka topic: {e}")
@@ -89,10 +185,14 @@ class StreamingOutput(Output):
         🔄 Flush the output by flushing the Kafka producer.
 
         Raises:
-            Exception: If no Kafka producer is available.
+            Exception: If no Kafka producer is available, or the last failed delivery since the previous flush.
         """
         if self.producer:
             self.producer.flush()
+            with self._delivery_lock:
+                error, self.last_error = self.last_error, None
+            if error:
+                raise error
         else:
             self.log.exception("🚫 No Kafka producer available.")
             raise
@@ -110,11 +210,7 @@ class StreamingOutput(Output):
         """
         if self.producer:
             try:
-                self.producer.send(
-                    self.output_topic,
-                    key=bytes(json.dumps(key).encode("utf-8")),
-                    value=bytes(json.dumps(value).encode("utf-8")),
-                )
+                self._send(value, key=key)
                 self.log.debug(f"✅ Inserted the key-value pair into {self.output_topic} topic.")
             except Exception as e:
                 self.log.exception(f"🚫 Failed to send key-value pair to Kafka topic: {e}")
@@ -123,6 +219,21 @@ class StreamingOutput(Output):
             self.log.exception("🚫 No Kafka producer available.")
             raise
 
+    def collect_metrics(self) -> Dict[str, int]:
+        """
+        📊 Collect delivery metrics of the Kafka producer.
+
+        Returns:
+            Dict[str, int]: Messages sent, delivered, failed and still pending delivery.
+        """
+        with self._delivery_lock:
+            return {
+                "sent": self.sent,
+                "delivered": self.delivered,
+                "failed": self.failed,
+                "pending": self.sent - self.delivered - self.failed,
+            }
+
     def close(self) -> None:
         """
         🚪 Close the Kafka producer.
@@ -170,11 +281,7 @@ class StreamingOutput(Output):
         """
         if self.producer:
             try:
-                self.producer.send(
-                    self.output_topic,
-                    value=bytes(json.dumps(value).encode("utf-8")),
-                    partition=partition,
-                )
+                self._send(value, partition=partition)
                 self.log.debug(f"✅ Inserted the message into partition {partition} of {self.output_topic} topic.")
             except Exception as e:
                 self.log.exception(f"🚫 Failed to send message to Kafka topic: {e}")
@@ -187,6 +294,9 @@ class StreamingOutput(Output):
         """
         📦 Send multiple messages at once to the Kafka topic.
 
+        Messages are only queued in the producer, which batches them according to its profile.
+        Call `flush` to wait for their delivery.
+
         Args:
             messages (list): The messages to send.
 
@@ -196,7 +306,7 @@ class StreamingOutput(Output):
         if self.producer:
             try:
                 for message in messages:
-                    self.producer.send(self.output_topic, bytes(json.dumps(message).encode("utf-8")))
+                    self._send(message)
                 self.log.debug(f"✅ Inserted {len(messages)} messages into {self.output_topic} topic.")
             except Exception as e:
                 self.log.exception(f"🚫 Failed to send messages to Kafka topic: {e}")
@@ -0,0 +1,298 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import gzip
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import IO, Any, Dict, List, Optional, Type
+
+try:
+    import zstandard  # type: ignore
+except ImportError:
+    zstandard = None  # type: ignore
+
+try:
+    import pyarrow  # type: ignore
+    import pyarrow.parquet  # type: ignore
+except ImportError:
+    pyarrow = None
+
+
+class RecordWriter(ABC):
+    """
+    ✍️ **RecordWriter**: Streams records into a file one at a time.
+
+    Records are encoded and written as they arrive, so a whole batch is never serialized into memory at once.
+
+    Attributes:
+        extension (str): File extension of the format.
+        path (str): Path of the file being written.
+        paths (List[str]): Paths of all files written, more than one if the writer rolled over to a new file.
+        records_written (int): Number of records written so far.
+    """
+
+    extension: str = ""
+
+    def __init__(self, path: str) -> None:
+        """
+        Open a new file for writing.
+
+        Args:
+            path (str): Path of the file to write.
+        """
+        self.path = path
+        self.paths: List[str] = [path]
+        self.records_written = 0
+
+    @abstractmethod
+    def write(self, record: Any) -> None:
+        """
+        Encode and write a single record.
+
+        Args:
+            record (Any): The record to write.
+        """
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        """
+        Flush any pending data and close the file.
+        """
+        pass
+
+    @property
+    def bytes_written(self) -> int:
+        """
+        Number of bytes written to disk so far, after compression.
+
+        Returns:
+            int: The size of the file.
+        """
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def __enter__(self) -> "RecordWriter":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+class JSONWriter(RecordWriter):
+    """
+    📄 Writes records as a single JSON array, element by element.
+    """
+
+    extension = "json"
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self.file: IO[str] = open(path, "w")
+        self.file.write("[")
+
+    def write(self, record: Any) -> None:
+        if self.records_written:
+            self.file.write(",")
+        json.dump(record, self.file)
+        self.records_written += 1
+
+    def close(self) -> None:
+        if not self.file.closed:
+            self.file.write("]")
+            self.file.close()
+
+    @property
+    def bytes_written(self) -> int:
+        return self.file.tell() if not self.file.closed else super().bytes_written
+
+
+class JSONLinesWriter(RecordWriter):
+    """
+    📄 Writes records as newline-delimited JSON, optionally compressed.
+    """
+
+    extension = "jsonl"
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self.raw: IO[bytes] = open(path, "wb")
+        self.stream: IO[bytes] = self._wrap(self.raw)
+
+    def _wrap(self, raw: IO[bytes]) -> IO[bytes]:
+        """
+        Wrap the raw file with a compressor.
+
+        Args:
+            raw (IO[bytes]): The raw file.
+
+        Returns:
+            IO[bytes]: The stream to write encoded records to.
+        """
+        return raw
+
+    def write(self, record: Any) -> None:
+        self.stream.write(json.dumps(record).encode("utf-8") + b"\n")
+        self.records_written += 1
+
+    def close(self) -> None:
+        if not self.raw.closed:
+            if self.stream is not self.raw:
+                self.stream.close()
+            self.raw.close()
+
+    @property
+    def bytes_written(self) -> int:
+        return self.raw.tell() if not self.raw.closed else super().bytes_written
+
+
+class GzipJSONLinesWriter(JSONLinesWriter):
+    """
+    🗜️ Writes gzip-compressed newline-delimited JSON.
+    """
+
+    extension = "jsonl.gz"
+
+    def _wrap(self, raw: IO[bytes]) -> IO[bytes]:
+        return gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6)  # type: ignore
+
+
+class ZstdJSONLinesWriter(JSONLinesWriter):
+    """
+    🗜️ Writes zstd-compressed newline-delimited JSON. Requires `zstandard`.
+    """
+
+    extension = "jsonl.zst"
+
+    def _wrap(self, raw: IO[bytes]) -> IO[bytes]:
+        return zstandard.ZstdCompressor().stream_writer(raw, closefd=False)  # type: ignore
+
+
+class ParquetWriter(RecordWriter):
+    """
+    🏛️ Writes records as a columnar Parquet file, one row group at a time. Requires `pyarrow`.
+
+    Records that are not dictionaries are stored in a single `value` column. The schema of the file is
+    inferred from its first row group. When later records no longer fit it, with new keys or values of
+    another type, the writer closes the file and continues in a new part file next to it.
+    The size of the rows not yet written is estimated from their JSON encoding.
+    """
+
+    extension = "parquet"
+
+    def __init__(self, path: str, row_group_size: int = 10000, row_group_bytes: int = 64 * 1024 * 1024) -> None:
+        """
+        Args:
+            path (str): Path of the file to write.
+            row_group_size (int): Rows per row group. Defaults to 10000.
+            row_group_bytes (int): Estimated bytes per row group. Defaults to 64MB.
+        """
+        super().__init__(path)
+        self.row_group_size = row_group_size
+        self.row_group_bytes = row_group_bytes
+        self.rows: List[Dict[str, Any]] = []
+        self.buffered_bytes = 0
+        self.writer: Any = None
+
+    def write(self, record: Any) -> None:
+        row = record if isinstance(record, dict) else {"value": record}
+        self.rows.append(row)
+        self.buffered_bytes += len(json.dumps(row, default=str))
+        self.records_written += 1
+        if len(self.rows) >= self.row_group_size or self.buffered_bytes >= self.row_group_bytes:
+            self._write_row_group()
+
+    def _conform(self, rows: List[Dict[str, Any]]) -> Any:
+        """
+        Build a table of rows with the schema of the file.
+
+        Args:
+            rows (List[Dict[str, Any]]): The rows.
+
+        Returns:
+            Any: The table, or None if the rows do not fit the schema.
+        """
+        schema = self.writer.schema
+        names = set(schema.names)
+        if any(key not in names for row in rows for key in row):
+            return None
+        try:
+            return pyarrow.Table.from_pylist(rows, schema=schema)
+        except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+            return None
+
+    def _write_row_group(self) -> None:
+        """
+        Write the pending rows as a row group, in a new part file if their schema drifted.
+        """
+        if not self.rows:
+            return
+        table = None
+        if self.writer is not None:
+            table = self._conform(self.rows)
+            if table is None:
+                self.writer.close()
+                self.writer = None
+                self.path = f"{self.paths[0][: -len(self.extension) - 1]}-{len(self.paths)}.{self.extension}"
+                self.paths.append(self.path)
+        if self.writer is None:
+            table = pyarrow.Table.from_pylist(self.rows)
+            self.writer = pyarrow.parquet.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+        self.rows.clear()
+        self.buffered_bytes = 0
+
+    def close(self) -> None:
+        self._write_row_group()
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    @property
+    def bytes_written(self) -> int:
+        return super().bytes_written + self.buffered_bytes
+
+
+RECORD_WRITERS: Dict[str, Type[RecordWriter]] = {
+    "json": JSONWriter,
+    "jsonl": JSONLinesWriter,
+    "jsonl.gz": GzipJSONLinesWriter,
+    "jsonl.zst": ZstdJSONLinesWriter,
+    "parquet": ParquetWriter,
+}
+
+
+def get_record_writer(output_format: str) -> Type[RecordWriter]:
+    """
+    🔎 Look up the writer for an output format.
+
+    Args:
+        output_format (str): One of "json", "jsonl", "jsonl.gz", "jsonl.zst" or "parquet".
+
+    Returns:
+        Type[RecordWriter]: The writer class.
+
+    Raises:
+        ValueError: If the format is unknown or its optional dependency is not installed.
+    """
+    writer: Optional[Type[RecordWriter]] = RECORD_WRITERS.get(output_format)
+    if writer is None:
+        raise ValueError(f"Invalid output format: {output_format}")
+    if writer is ZstdJSONLinesWriter and zstandard is None:
+        raise ValueError("Output format jsonl.zst requires the zstandard package.")
+    if writer is ParquetWriter and pyarrow is None:
+        raise ValueError("Output format parquet requires the pyarrow package.")
+    return writer
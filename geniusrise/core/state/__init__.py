@@ -15,8 +15,11 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from .base import State
-from .dynamo import DynamoDBState
+from .metrics import MetricsHistory, SystemSampler
+from .dynamo import DynamoDBState, VersionConflictError
 from .memory import InMemoryState
+from .sqlite import SQLiteState
 from .postgres import PostgresState
 from .redis import RedisState
 from .prometheus import PrometheusState
+from .cache import CachedState, cached
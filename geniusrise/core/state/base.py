@@ -14,18 +14,28 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import atexit
 import time
 import logging
 import threading
-import socket
-import GPUtil
-import platform
+import weakref
+from collections import deque
 from datetime import datetime
-import psutil
 from abc import ABC, abstractmethod
-from typing import Dict, Optional, Any, Callable
+from typing import Dict, Iterable, Optional, Any, Callable
 from prometheus_client import Counter, Gauge, Summary, CollectorRegistry
 
+from .metrics import MetricsHistory, Sample, SystemSampler
+
+# State managers to close when the interpreter exits, to flush pending writes or save snapshots
+_closing_states: "weakref.WeakSet[State]" = weakref.WeakSet()
+
+
+@atexit.register
+def _close_states() -> None:
+    for state in list(_closing_states):
+        state.close()
+
 
 class State(ABC):
     """
@@ -33,6 +43,8 @@ class State(ABC):
 
     A state manager is responsible for getting and setting state, capturing metrics, and logging.
     It provides an interface for state management and also captures various system metrics.
+    System metrics are sampled by one `SystemSampler` per process, see `SystemSampler.configure`
+    to change its interval or turn it off.
 
     Attributes:
         read_ops (Counter): Counter for read operations.
@@ -45,11 +57,34 @@ class State(ABC):
         virtual_memory (str): virtual memory available.
         gpu_count (str):  GPU count visible.
         gpu_memory (str):  GPU memory available.
-        buffer (Dict[str, Any]): Buffer for state data.
+        sampler (SystemSampler): The process-wide system metrics sampler.
+        host_info (Dict[str, Any]): Static host information, captured once.
+        metrics_history (MetricsHistory): Bounded history of CPU and memory samples.
+        buffer (Dict[str, Any]): State set but not yet written to storage, keyed by dirty key.
+        log_capacity (int): Number of log lines kept between state writes, older lines are dropped.
+        logs_dropped (Counter): Counter for log lines dropped from the full log buffer.
+        logs_sampled_out (Counter): Counter for log lines skipped by log sampling.
+        write_behind (bool): Whether writes are flushed in the background instead of on every set.
         log (logging.Logger): Logger for capturing logs.
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        metrics_capacity: int = 3600,
+        write_behind: bool = False,
+        flush_interval: float = 1.0,
+        log_capacity: int = 1000,
+    ) -> None:
+        """
+        Initialize a new state manager.
+
+        Args:
+            metrics_capacity (int): Number of metric samples kept between state writes. Defaults to 3600.
+            write_behind (bool): Buffer writes and flush them every `flush_interval` seconds and on close,
+                repeated sets of a key are coalesced into one write. Defaults to False.
+            flush_interval (float): Seconds between background flushes in write-behind mode. Defaults to 1.
+            log_capacity (int): Number of log lines kept between state writes. Defaults to 1000.
+        """
         # Logger
         self.log = logging.getLogger(self.__class__.__name__)
 
@@ -62,36 +97,39 @@ class State(ABC):
         self.process_time = Summary("process_time", "Time spent processing", registry=self.registry)
         self.cpu_usage = Gauge("cpu_usage", "CPU usage", registry=self.registry)
         self.memory_usage = Gauge("memory_usage", "Memory usage", registry=self.registry)
-
-        # Python VM Metrics
-        self.python_version = platform.python_version()
-        self.cpu_count = psutil.cpu_count()
-        self.virtual_memory = psutil.virtual_memory().total / (1024**3)
-
-        # PyTorch and GPU Metrics
-        try:
-            gpus = GPUtil.getgpus()
-        except Exception as e:
-            gpus = None
-            self.log.debug(f"Nvidia gpus not available {e}")
-        if gpus:
-            self.gpu_count = len(gpus)
-            self.gpu_memory = [x.memoryTotal for x in gpus]
-        else:
-            self.gpu_count = 0
-            self.gpu_memory = [0]
-
-        # Buffer for periodic flush or destructor
+        self.logs_dropped = Counter(
+            "logs_dropped", "Log lines dropped from the full log buffer", registry=self.registry
+        )
+        self.logs_sampled_out = Counter("logs_sampled_out", "Log lines skipped by sampling", registry=self.registry)
+
+        # Host information does not change, it is probed once per process
+        self.sampler = SystemSampler.instance()
+        self.host_info = self.sampler.host_info()
+        self.hostname = self.host_info["hostname"]
+        self.system_info = self.host_info["system_info"]
+        self.python_version = self.host_info["python_version"]
+        self.cpu_count = self.host_info["cpu_count"]
+        self.virtual_memory = self.host_info["virtual_memory"]
+        self.gpu_count = self.host_info["gpu_count"]
+        self.gpu_memory = self.host_info["gpu_memory"]
+
+        # Dirty keys, flushed on every set or periodically in write-behind mode
         self.buffer: Dict[str, Any] = {}
-
-        # Metrics capture thread and buffer
+        self._buffer_lock = threading.Lock()
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval
+        self._stopped = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        if self.write_behind:
+            self._flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+            self._flusher.start()
+            _closing_states.add(self)
+
+        # Metrics buffers, periodic samples come from the process-wide sampler
         self.metrics_buffer: Dict[str, Any] = {}
-        self.metrics_capture_thread = threading.Thread(target=self.capture_metrics_periodically)
-        self.metrics_capture_thread.daemon = True
-        self.metrics_capture_thread.start()
-
-        self.hostname = socket.gethostname()
-        self.system_info = platform.uname()
+        self.log_capacity = log_capacity
+        self.metrics_history = MetricsHistory(capacity=metrics_capacity)
+        self.sampler.subscribe(self.record_sample)
 
     @abstractmethod
     def get(self, key: str) -> Optional[Dict[str, Any]]:
@@ -117,6 +155,32 @@ class State(ABC):
         """
         pass
 
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Get the states associated with several keys.
+
+        Backends that can read many keys in one round trip override this, by default keys are read one by one.
+
+        Args:
+            keys (Iterable[str]): The keys to get the states for.
+
+        Returns:
+            Dict[str, Optional[Dict[str, Any]]]: The state of each key, None for missing keys.
+        """
+        return {key: self.get(key) for key in keys}
+
+    def set_many(self, items: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Set the states associated with several keys.
+
+        Backends that can write many keys in one round trip override this, by default keys are written one by one.
+
+        Args:
+            items (Dict[str, Dict[str, Any]]): The state to set for each key.
+        """
+        for key, value in items.items():
+            self.set(key, value)
+
     def get_state(self, key: str) -> Optional[Dict[str, Any]]:
         """
         Get the state associated with a key and capture metrics.
@@ -130,7 +194,10 @@ class State(ABC):
             Optional[Dict[str, Any]]: The state associated with the key.
         """
         self.read_ops.inc()
-        state = self.get(key)
+        with self._buffer_lock:
+            state = self.buffer.get(key)
+        if state is None:
+            state = self.get(key)
         self.capture_metrics()
         return state
 
@@ -139,6 +206,8 @@ class State(ABC):
         Set the state associated with a key and capture metrics.
 
         This method wraps the abstract `set` method to provide additional functionality like metrics capturing.
+        The metrics summary is stored under "metrics" and the log lines captured since the last write, if any,
+        under "logs". The key is marked dirty and written right away, or by the next flush in write-behind mode.
 
         Args:
             key (str): The key to set the state for.
@@ -148,22 +217,54 @@ class State(ABC):
         # Most have an atomic update but i guess none have an atomic update inside a json?
         # Otherwise we need to be content with the assumption that each task will have a unique uuid task id and hence a single instance
         self.write_ops.inc()
-        value["metrics"] = self.metrics_buffer.get("metrics_history", [])
-        self.buffer[key] = value
-        self.flush_buffer()
+        value["metrics"] = self.metrics_summary()
+        logs = self.metrics_buffer.pop("logs", None)
+        if logs:
+            value["logs"] = list(logs)
+        with self._buffer_lock:
+            self.buffer[key] = value
         self.flush_metrics()
+        if not self.write_behind:
+            self.flush_buffer()
 
     def flush_buffer(self) -> None:
         """
         Flush the buffer to the state storage.
 
-        This method is responsible for writing the buffered state data to the underlying storage mechanism.
+        This method writes the dirty keys to the underlying storage mechanism with `set_many`. If the
+        write fails the keys stay dirty, unless they were set again in the meantime.
+        """
+        if not hasattr(self, "buffer"):
+            return
+        with self._buffer_lock:
+            dirty, self.buffer = self.buffer, {}
+        if not dirty:
+            return
+        try:
+            self.set_many(dirty)
+        except Exception:
+            with self._buffer_lock:
+                for key, value in dirty.items():
+                    self.buffer.setdefault(key, value)
+            raise
+
+    def _flush_periodically(self) -> None:
         """
-        if hasattr(self, "buffer"):
-            for key, value in self.buffer.items():
-                self.set(key, value)
-        # we never clear the buffer, we assume the user keeps setting different values
-        # self.buffer.clear()
+        Write-behind thread: flushes the dirty keys every `flush_interval` seconds.
+        """
+        while not self._stopped.wait(self.flush_interval):
+            try:
+                self.flush_buffer()
+            except Exception as e:
+                self.log.error(f"Failed to flush state, will retry: {e}")
+
+    def close(self) -> None:
+        """
+        Flush the dirty keys and stop the write-behind thread.
+        """
+        if hasattr(self, "_stopped"):
+            self._stopped.set()
+        self.flush_buffer()
 
     def __del__(self) -> None:
         """
@@ -171,61 +272,69 @@ class State(ABC):
 
         This ensures that any buffered state data is not lost when the object is deleted.
         """
-        self.flush_buffer()
+        self.close()
 
     def capture_metrics(self) -> None:
         """
         Capture system metrics.
 
-        This method captures various system metrics like CPU usage, memory usage, etc., and stores them in a buffer.
+        This method records the shared sampler's latest sample when the history has been flushed since,
+        so that the next state write carries metrics. It never samples by itself and does nothing while
+        sampling is turned off.
         """
-        metrics = {
-            "cpu_usage": psutil.cpu_percent(),
-            "memory_usage": psutil.virtual_memory().percent,
-            "hostname": socket.gethostname(),
-            "system_info": platform.uname(),
-            "timestamp": datetime.utcnow().isoformat(),
-            "python_version": self.python_version,
-            "cpu_count": self.cpu_count,
-            "virtual_memory": self.virtual_memory,
-            "gpu_count": self.gpu_count,
-            "gpu_memory": self.gpu_memory,
-        }
-        self.metrics_buffer.setdefault("metrics_history", []).append(metrics)
+        sample = self.sampler.latest
+        if self.sampler.enabled and sample is not None and not len(self.metrics_history):
+            self.record_sample(sample)
 
-    def capture_metrics_periodically(self, interval=1):
+    def record_sample(self, sample: Sample) -> None:
         """
-        Periodically capture metrics.
+        Record a system metrics sample.
 
-        This method runs in a separate thread and captures system metrics at regular intervals.
+        This method receives the periodic samples of the shared `SystemSampler`.
 
         Args:
-            interval (int): Time interval in seconds.
+            sample (Sample): (timestamp, cpu_usage, memory_usage).
+        """
+        timestamp, cpu_usage, memory_usage = sample
+        self.cpu_usage.set(cpu_usage)
+        self.memory_usage.set(memory_usage)
+        self.metrics_history.append(timestamp, cpu_usage, memory_usage)
+
+    def metrics_summary(self) -> Dict[str, Any]:
         """
-        while True:
-            self.capture_metrics()
-            time.sleep(interval)
+        Summarize the metrics captured since the last state write.
+
+        Returns:
+            Dict[str, Any]: Host information and min, max, mean and p95 of CPU and memory usage.
+        """
+        return {**self.host_info, **self.metrics_history.aggregate()}
 
     def flush_metrics(self) -> None:
         """
-        Flush the metrics buffer to the state storage.
+        Reset the metrics buffer and history.
 
-        This method is responsible for writing the buffered metrics data to the underlying storage mechanism.
+        Called by `set_state` once their summary and captured log lines are part of the state being written.
         """
         self.metrics_buffer.clear()
+        self.metrics_history.clear()
 
     def capture_log(self, log_entry: str) -> None:
         """
         Capture log entries.
 
-        This method captures log entries and timestamps, storing them in a buffer for later use.
+        This method captures log entries and timestamps, storing them in a ring buffer of
+        `log_capacity` entries until the next `set_state` writes them along with the state.
+        Once full, the oldest entries are dropped and counted.
 
         Args:
             log_entry (str): The log entry to capture.
         """
-        self.metrics_buffer.setdefault("logs", []).append(
-            {"log": log_entry, "timestamp": datetime.utcnow().isoformat()}
-        )
+        logs = self.metrics_buffer.get("logs")
+        if logs is None:
+            logs = self.metrics_buffer["logs"] = deque(maxlen=self.log_capacity)
+        if len(logs) == logs.maxlen:
+            self.logs_dropped.inc()
+        logs.append({"log": log_entry, "timestamp": datetime.utcnow().isoformat()})
 
     def time_function(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
         """
@@ -0,0 +1,252 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple, Type
+
+from prometheus_client import Counter, Gauge
+
+from .base import State
+
+
+class CachedState:
+    """
+    🧊 **CachedState**: A read-through LRU cache in front of a state manager.
+
+    Mix it in before a `State` backend. Reads are served from memory while fresh, at most
+    `cache_size` keys are kept and the least recently used key is evicted first. Each key expires
+    `cache_ttl` seconds after it was read from the backend, or after its own TTL if one was set
+    with `set_key_ttl`. Writes go to the backend and invalidate the cached key. Cached states are
+    copies, so mutating a state that was read never changes the cache.
+
+    Hits, misses and evictions are counted in the state manager's Prometheus `registry`.
+
+    ## Usage:
+    ```python
+    class CachedRedisState(CachedState, RedisState):
+        pass
+
+    manager = CachedRedisState(host="localhost", port=6379, db=0, cache_size=10000, cache_ttl=30)
+    # or
+    manager = cached(RedisState)(host="localhost", port=6379, db=0)
+    ```
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        cache_size: int = 1024,
+        cache_ttl: Optional[float] = 60,
+        max_key_ttls: int = 65536,
+        **kwargs: Any,
+    ) -> None:
+        """
+        💥 Initialize the cache, then the state manager it is mixed into.
+
+        Args:
+            *args: Arguments for the state manager.
+            cache_size (int): Maximum number of cached keys. Defaults to 1024.
+            cache_ttl (Optional[float]): Seconds a key stays cached, None to keep keys until evicted. Defaults to 60.
+            max_key_ttls (int): Maximum number of keys with their own TTL, the least recently set one falls back
+                to `cache_ttl` first. Defaults to 65536.
+            **kwargs: Keyword arguments for the state manager.
+        """
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.max_key_ttls = max_key_ttls
+        self.key_ttls: "OrderedDict[str, Optional[float]]" = OrderedDict()
+        self._cache: "OrderedDict[str, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._writes = 0
+        super().__init__(*args, **kwargs)  # type: ignore
+
+        registry = self.registry  # type: ignore
+        self.cache_hits = Counter("cache_hits", "Number of state reads served from the cache", registry=registry)
+        self.cache_misses = Counter("cache_misses", "Number of state reads that went to the backend", registry=registry)
+        self.cache_evictions = Counter("cache_evictions", "Number of keys evicted from the cache", registry=registry)
+        self.cache_keys = Gauge("cache_keys", "Number of keys in the cache", registry=registry)
+
+    def set_key_ttl(self, key: str, ttl: Optional[float]) -> None:
+        """
+        ⏳ Set how long a key stays cached, overriding `cache_ttl`.
+
+        Args:
+            key (str): The key.
+            ttl (Optional[float]): Seconds the key stays cached, None to keep it until evicted.
+        """
+        with self._cache_lock:
+            self.key_ttls[key] = ttl
+            self.key_ttls.move_to_end(key)
+            while len(self.key_ttls) > self.max_key_ttls:
+                self.key_ttls.popitem(last=False)
+            self._cache.pop(key, None)
+
+    def _lookup(self, key: str, now: float) -> Tuple[bool, Any]:
+        # Caller holds the cache lock
+        entry = self._cache.get(key)
+        if entry is not None:
+            expires, value = entry
+            if expires is None or expires > now:
+                self._cache.move_to_end(key)
+                return True, copy.deepcopy(value)
+            del self._cache[key]
+        return False, None
+
+    def get(self, key: str, **kwargs: Any) -> Optional[Dict]:
+        """
+        📖 Get the state associated with a key, from the cache if it is fresh.
+
+        Args:
+            key (str): The key to get the state for.
+            **kwargs: Backend-specific read options, such as `fields` of `PostgresState.get`. Reads with
+                options are partial, they go to the backend and are not cached.
+
+        Returns:
+            Optional[Dict]: The state associated with the key, or None if not found.
+        """
+        if any(value is not None for value in kwargs.values()):
+            self.cache_misses.inc()
+            return super().get(key, **kwargs)  # type: ignore
+        now = time.monotonic()
+        with self._cache_lock:
+            hit, value = self._lookup(key, now)
+            writes = self._writes
+        if hit:
+            self.cache_hits.inc()
+            return value
+
+        self.cache_misses.inc()
+        value = super().get(key)  # type: ignore
+        if value is not None:
+            self._put(key, value, now, writes)
+        return value
+
+    def set(self, key: str, value: Dict) -> None:
+        """
+        📝 Set the state associated with a key in the backend and invalidate its cached copy.
+
+        Args:
+            key (str): The key to set the state for.
+            value (Dict): The state to set.
+        """
+        self._invalidate_written([key])
+        try:
+            super().set(key, value)  # type: ignore
+        finally:
+            self._invalidate_written([key])
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Optional[Dict]]:
+        """
+        📖 Get the states associated with several keys, reading only uncached keys from the backend.
+
+        Args:
+            keys (Iterable[str]): The keys to get the states for.
+
+        Returns:
+            Dict[str, Optional[Dict]]: The state of each key, None for missing keys.
+        """
+        keys = list(keys)
+        now = time.monotonic()
+        states: Dict[str, Optional[Dict]] = {}
+        missing = []
+        with self._cache_lock:
+            for key in keys:
+                hit, value = self._lookup(key, now)
+                if hit:
+                    states[key] = value
+                else:
+                    missing.append(key)
+            writes = self._writes
+        self.cache_hits.inc(len(states))
+        if missing:
+            self.cache_misses.inc(len(missing))
+            backend_get_many = super().get_many  # type: ignore
+            if getattr(backend_get_many, "__func__", None) is State.get_many:
+                # The default reads keys one by one through get, which would count them again
+                fetched = {key: super(CachedState, self).get(key) for key in missing}  # type: ignore
+            else:
+                fetched = backend_get_many(missing)
+            for key, value in fetched.items():
+                states[key] = value
+                if value is not None:
+                    self._put(key, value, now, writes)
+        return {key: states[key] for key in keys}
+
+    def set_many(self, items: Dict[str, Dict]) -> None:
+        """
+        📝 Set the states associated with several keys in the backend and invalidate their cached copies.
+
+        Args:
+            items (Dict[str, Dict]): The state to set for each key.
+        """
+        self._invalidate_written(items)
+        try:
+            super().set_many(items)  # type: ignore
+        finally:
+            self._invalidate_written(items)
+
+    def _invalidate_written(self, keys: Iterable[str]) -> None:
+        # Reads that overlap a write must not cache what they read
+        with self._cache_lock:
+            self._writes += 1
+            for key in keys:
+                self._cache.pop(key, None)
+            self.cache_keys.set(len(self._cache))
+
+    def _put(self, key: str, value: Any, now: float, writes: int) -> None:
+        # The caller keeps the value it read, the cache keeps its own copy
+        value = copy.deepcopy(value)
+        with self._cache_lock:
+            # A write since the read started may have made the value stale, do not cache it
+            if writes != self._writes:
+                return
+            ttl = self.key_ttls.get(key, self.cache_ttl)
+            self._cache[key] = (now + ttl if ttl is not None else None, value)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+                self.cache_evictions.inc()
+            self.cache_keys.set(len(self._cache))
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """
+        🧹 Drop a key, or every key, from the cache.
+
+        Args:
+            key (Optional[str]): The key to drop, all keys if None.
+        """
+        with self._cache_lock:
+            if key is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(key, None)
+            self.cache_keys.set(len(self._cache))
+
+
+def cached(klass: Type[State]) -> Type[State]:
+    """
+    🧊 Create a cached variant of a state manager class.
+
+    Args:
+        klass (Type[State]): The state manager class, e.g. `RedisState`.
+
+    Returns:
+        Type[State]: A subclass of `klass` with `CachedState` mixed in.
+    """
+    return type(f"Cached{klass.__name__}", (CachedState, klass), {})  # type: ignore
@@ -14,18 +14,53 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from typing import Dict, Optional
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Optional, Tuple
 
 import boto3
 import jsonpickle
+from botocore.exceptions import ClientError
 
 from geniusrise.core.state import State
 
 
+class VersionConflictError(Exception):
+    """❌ A conditional write found a different version than expected."""
+
+    pass
+
+
+def _to_dynamo(value: Any) -> Any:
+    """
+    🔄 Convert a JSON-like value to DynamoDB attribute values, floats become Decimals.
+    """
+    return json.loads(json.dumps(value, default=str), parse_float=Decimal)
+
+
+def _from_dynamo(value: Any) -> Any:
+    """
+    🔄 Convert DynamoDB attribute values back, Decimals become ints or floats.
+    """
+    if isinstance(value, dict):
+        return {k: _from_dynamo(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_from_dynamo(v) for v in value]
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return value
+
+
 class DynamoDBState(State):
     """
     🗄️ **DynamoDBState**: A state manager that stores state in DynamoDB.
 
+    States are stored as native DynamoDB maps, next to a version number that is bumped on every
+    write. Reads of many keys use batch requests, writes of many keys run concurrently, conditional
+    writes on the version give optimistic concurrency.
+
     Attributes:
         dynamodb (boto3.resources.factory.dynamodb.ServiceResource): The DynamoDB service resource.
         table (boto3.resources.factory.dynamodb.Table): The DynamoDB table.
@@ -36,21 +71,43 @@ class DynamoDBState(State):
     manager.set_state("key123", {"status": "active"})
     state = manager.get_state("key123")
     print(state)  # Outputs: {"status": "active"}
+
+    # optimistic concurrency
+    state, version = manager.get_versioned("key123")
+    state["status"] = "idle"
+    try:
+        manager.set_versioned("key123", state, version=version)
+    except VersionConflictError:
+        ...  # someone else wrote key123 in the meantime, read it again and retry
+
+    # batches
+    manager.set_many({"key1": {"status": "active"}, "key2": {"status": "idle"}})
+    states = manager.get_many(["key1", "key2"])
     ```
 
     Note:
     - Ensure DynamoDB is accessible and the table exists.
     """
 
-    def __init__(self, table_name: str, region_name: str) -> None:
+    # batch_get_item accepts at most 100 keys per request
+    BATCH_GET_SIZE = 100
+
+    def __init__(
+        self, table_name: str, region_name: str, max_retries: int = 8, write_concurrency: int = 16, **kwargs
+    ) -> None:
         """
         💥 Initialize a new DynamoDB state manager.
 
         Args:
             table_name (str): The name of the DynamoDB table.
             region_name (str): The name of the AWS region.
+            max_retries (int): Retries of unprocessed batch items, with exponential backoff. Defaults to 8.
+            write_concurrency (int): Writes in flight at once in `set_many`. Defaults to 16.
+            **kwargs: Additional arguments for `State`, like `write_behind` and `flush_interval`.
         """
-        super().__init__()
+        super().__init__(**kwargs)
+        self.max_retries = max_retries
+        self.write_concurrency = write_concurrency
         try:
             self.dynamodb = boto3.resource("dynamodb", region_name=region_name)
             self.table = self.dynamodb.Table(table_name)
@@ -60,15 +117,22 @@ class DynamoDBState(State):
             self.dynamodb = None
             self.table = None
 
-    def get(self, key: str) -> Optional[Dict]:
+    @staticmethod
+    def _decode(item: Dict[str, Any]) -> Dict:
+        # Items written before states were stored as maps hold a jsonpickle string
+        if "state" not in item and "value" in item:
+            return jsonpickle.decode(item["value"])
+        return _from_dynamo(item["state"])
+
+    def get_versioned(self, key: str) -> Tuple[Optional[Dict], int]:
         """
-        📖 Get the state associated with a key.
+        📖 Get the state associated with a key and its version.
 
         Args:
             key (str): The key to get the state for.
 
         Returns:
-            Dict: The state associated with the key, or None if not found.
+            Tuple[Optional[Dict], int]: The state, or None if not found, and its version, 0 if not found.
 
         Raises:
             Exception: If there's an error accessing DynamoDB.
@@ -76,7 +140,10 @@ class DynamoDBState(State):
         if self.table:
             try:
                 response = self.table.get_item(Key={"id": key})
-                return jsonpickle.decode(response["Item"]["value"]) if "Item" in response else None
+                if "Item" not in response:
+                    return None, 0
+                item = response["Item"]
+                return self._decode(item), int(item.get("version", 0))
             except Exception as e:
                 self.log.exception(f"🚫 Failed to get state from DynamoDB: {e}")
                 raise
@@ -84,6 +151,57 @@ class DynamoDBState(State):
             self.log.exception("🚫 No DynamoDB table.")
             raise
 
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        📖 Get the state associated with a key.
+
+        Args:
+            key (str): The key to get the state for.
+
+        Returns:
+            Dict: The state associated with the key, or None if not found.
+
+        Raises:
+            Exception: If there's an error accessing DynamoDB.
+        """
+        return self.get_versioned(key)[0]
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Optional[Dict]]:
+        """
+        📖 Get the states associated with several keys with `batch_get_item`.
+
+        Keys are read in batches of 100, unprocessed keys are retried with exponential backoff.
+
+        Args:
+            keys (Iterable[str]): The keys to get the states for.
+
+        Returns:
+            Dict[str, Optional[Dict]]: The state of each key, None for missing keys.
+
+        Raises:
+            Exception: If there's an error accessing DynamoDB, or keys are still unprocessed after `max_retries`.
+        """
+        keys = list(dict.fromkeys(keys))
+        found: Dict[str, Dict] = {}
+        try:
+            for start in range(0, len(keys), self.BATCH_GET_SIZE):
+                end = start + self.BATCH_GET_SIZE
+                request: Dict[str, Any] = {self.table.name: {"Keys": [{"id": key} for key in keys[start:end]]}}
+                for attempt in range(self.max_retries + 1):
+                    response = self.dynamodb.batch_get_item(RequestItems=request)
+                    for item in response["Responses"].get(self.table.name, []):
+                        found[item["id"]] = self._decode(item)
+                    request = response.get("UnprocessedKeys") or {}
+                    if not request:
+                        break
+                    if attempt == self.max_retries:
+                        raise RuntimeError(f"{len(request[self.table.name]['Keys'])} keys still unprocessed")
+                    time.sleep(min(0.05 * 2**attempt, 5))
+        except Exception as e:
+            self.log.exception(f"🚫 Failed to get state from DynamoDB: {e}")
+            raise
+        return {key: found.get(key) for key in keys}
+
     def set(self, key: str, value: Dict) -> None:
         """
         📝 Set the state associated with a key.
@@ -95,12 +213,92 @@ class DynamoDBState(State):
         Raises:
             Exception: If there's an error accessing DynamoDB.
         """
+        self.set_versioned(key, value)
+
+    @staticmethod
+    def _update_arguments(key: str, value: Dict) -> Dict[str, Any]:
+        """
+        🔧 Build the `update_item` arguments that write a state and bump its version.
+        """
+        return {
+            "Key": {"id": key},
+            "UpdateExpression": "SET #state = :state, #version = if_not_exists(#version, :zero) + :one REMOVE #value",
+            "ExpressionAttributeNames": {"#state": "state", "#version": "version", "#value": "value"},
+            "ExpressionAttributeValues": {":state": _to_dynamo(value), ":zero": 0, ":one": 1},
+            "ReturnValues": "UPDATED_NEW",
+        }
+
+    def set_versioned(self, key: str, value: Dict, version: Optional[int] = None) -> int:
+        """
+        📝 Set the state associated with a key and bump its version.
+
+        Args:
+            key (str): The key to set the state for.
+            value (Dict): The state to set.
+            version (Optional[int]): Only write if the stored version is still this one, as returned by
+                `get_versioned`. Defaults to None, write unconditionally.
+
+        Returns:
+            int: The new version.
+
+        Raises:
+            VersionConflictError: If `version` is given and the stored version differs.
+            Exception: If there's an error accessing DynamoDB.
+        """
         if self.table:
+            arguments = self._update_arguments(key, value)
+            if version is not None:
+                if version:
+                    arguments["ConditionExpression"] = "#version = :expected"
+                    arguments["ExpressionAttributeValues"][":expected"] = version
+                else:
+                    arguments["ConditionExpression"] = "attribute_not_exists(#version)"
             try:
-                self.table.put_item(Item={"id": key, "value": jsonpickle.encode(value)})
+                response = self.table.update_item(**arguments)
+                return int(response["Attributes"]["version"])
+            except ClientError as e:
+                if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                    raise VersionConflictError(f"State for key {key} is no longer at version {version}")
+                self.log.exception(f"🚫 Failed to set state in DynamoDB: {e}")
+                raise
             except Exception as e:
                 self.log.exception(f"🚫 Failed to set state in DynamoDB: {e}")
                 raise
+            finally:
+                # Drop a cached copy, if a cache is mixed in, it is stale after a write or a conflict
+                invalidate = getattr(self, "invalidate", None)
+                if invalidate:
+                    invalidate(key)
         else:
             self.log.exception("🚫 No DynamoDB table.")
             raise
+
+    def set_many(self, items: Dict[str, Dict]) -> None:
+        """
+        📝 Set the states associated with several keys, `write_concurrency` writes at a time.
+
+        Each key is written with its own `update_item` so its version is bumped like in `set`, and
+        `set_versioned` of other writers keeps detecting the change. Batch writes would replace
+        whole items and lose the version.
+
+        Args:
+            items (Dict[str, Dict]): The state to set for each key.
+
+        Raises:
+            Exception: If there's an error accessing DynamoDB.
+        """
+        if not items:
+            return
+        # The low-level client is thread-safe, the table resource is not
+        client = self.table.meta.client
+
+        def write(key: str, value: Dict) -> None:
+            client.update_item(TableName=self.table.name, **self._update_arguments(key, value))
+
+        try:
+            with ThreadPoolExecutor(max_workers=min(self.write_concurrency, len(items))) as executor:
+                for future in [executor.submit(write, key, value) for key, value in items.items()]:
+                    future.result()
+        except Exception as e:
+            self.log.exception(f"🚫 Failed to set state in DynamoDB: {e}")
+            raise
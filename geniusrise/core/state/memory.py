@@ -14,19 +14,106 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from typing import Dict, Optional
+import os
+import pickle
+import tempfile
+import threading
+from typing import Any, Dict, Iterator, List, MutableMapping, Optional
 
 from geniusrise.core.state import State
+from geniusrise.core.state.base import _closing_states
+
+try:
+    import msgpack  # type: ignore
+except ImportError:
+    msgpack = None
+
+
+class ShardedStore(MutableMapping):
+    """
+    🧩 **ShardedStore**: A dict split into shards, each guarded by its own lock.
+
+    Threads working on keys in different shards do not contend for a lock.
+
+    ## Attributes:
+    - `shards` (List[Dict[str, Any]]): The shards, a key lives in shard `hash(key) % len(shards)`.
+    """
+
+    def __init__(self, shards: int = 16) -> None:
+        """
+        💥 Initialize an empty sharded store.
+
+        Args:
+            shards (int): Number of shards. Defaults to 16.
+        """
+        self.shards: List[Dict[str, Any]] = [{} for _ in range(max(1, shards))]
+        self._locks = [threading.Lock() for _ in self.shards]
+
+    def _shard(self, key: str) -> int:
+        return hash(key) % len(self.shards)
+
+    def __getitem__(self, key: str) -> Any:
+        i = self._shard(key)
+        with self._locks[i]:
+            return self.shards[i][key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        i = self._shard(key)
+        with self._locks[i]:
+            self.shards[i][key] = value
+
+    def __delitem__(self, key: str) -> None:
+        i = self._shard(key)
+        with self._locks[i]:
+            del self.shards[i][key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.snapshot())
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self.shards)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        📸 Copy the whole store at one point in time, holding every shard lock while copying.
+
+        Returns:
+            Dict[str, Any]: A shallow copy of the store.
+        """
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            return {key: value for shard in self.shards for key, value in shard.items()}
+        finally:
+            for lock in self._locks:
+                lock.release()
+
+    def update_all(self, items: Dict[str, Any]) -> None:
+        """
+        📥 Add many items, taking each shard lock once.
+
+        Args:
+            items (Dict[str, Any]): The items to add.
+        """
+        by_shard: Dict[int, Dict[str, Any]] = {}
+        for key, value in items.items():
+            by_shard.setdefault(self._shard(key), {})[key] = value
+        for i, shard_items in by_shard.items():
+            with self._locks[i]:
+                self.shards[i].update(shard_items)
 
 
 class InMemoryState(State):
     """
     🧠 **InMemoryState**: A state manager that stores state in memory.
 
-    This manager is useful for temporary storage or testing purposes. Since it's in-memory, the data will be lost once the application stops.
+    This manager is useful for temporary storage or testing purposes. The store is sharded with a lock per
+    shard, so it can be shared by many threads. Without a `snapshot_path` the data will be lost once the
+    application stops. With one, the store is written to that file periodically and on close, and loaded
+    from it on startup, which makes it a fast checkpoint store for single-node deployments.
 
     ## Attributes:
-    - `store` (Dict[str, Dict]): The in-memory store for states.
+    - `store` (ShardedStore): The in-memory store for states.
 
     ## Usage:
     ```python
@@ -34,19 +121,55 @@ class InMemoryState(State):
     manager.set_state("user123", {"status": "active"})
     state = manager.get_state("user123")
     print(state)  # Outputs: {"status": "active"}
+
+    # survives restarts
+    manager = InMemoryState(snapshot_path="/var/lib/bolt/state.pickle", snapshot_interval=30)
     ```
 
-    Remember, this is an in-memory store. Do not use it for persistent storage!
+    Remember, snapshots are local files. Use a database backend for state shared across nodes!
     """
 
-    store: Dict[str, Dict]
+    store: ShardedStore
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        shards: int = 16,
+        snapshot_path: Optional[str] = None,
+        snapshot_interval: Optional[float] = None,
+        snapshot_format: str = "pickle",
+        **kwargs,
+    ) -> None:
         """
         💥 Initialize a new in-memory state manager.
+
+        Args:
+            shards (int): Number of lock-striped shards of the store. Defaults to 16.
+            snapshot_path (Optional[str]): File to load the store from on startup and to snapshot it to.
+                Defaults to None, no persistence.
+            snapshot_interval (Optional[float]): Seconds between snapshots. Defaults to None, only snapshot on close.
+            snapshot_format (str): "pickle" or "msgpack". Defaults to "pickle".
+            **kwargs: Additional arguments for `State`, like `write_behind` and `flush_interval`.
+
+        Raises:
+            ValueError: If the snapshot format is unknown or msgpack is not installed.
         """
-        super().__init__()
-        self.store = {}
+        if snapshot_format not in ("pickle", "msgpack"):
+            raise ValueError(f"Invalid snapshot format: {snapshot_format}")
+        if snapshot_format == "msgpack" and msgpack is None:
+            raise ValueError("Snapshot format msgpack requires the msgpack package.")
+        self.store = ShardedStore(shards)
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_format = snapshot_format
+        self._snapshot_lock = threading.Lock()
+        super().__init__(**kwargs)
+
+        if self.snapshot_path:
+            self.load_snapshot()
+            _closing_states.add(self)
+            if self.snapshot_interval:
+                self._snapshotter = threading.Thread(target=self._snapshot_periodically, daemon=True)
+                self._snapshotter.start()
 
     def get(self, key: str) -> Optional[Dict]:
         """
@@ -80,3 +203,74 @@ class InMemoryState(State):
         """
         self.store[key] = value
         self.log.debug(f"✅ Set state for key: {key}")
+
+    def set_many(self, items: Dict[str, Dict]) -> None:
+        """
+        📝 Set the states associated with several keys.
+
+        Args:
+            items (Dict[str, Dict]): The state to set for each key.
+        """
+        self.store.update_all(items)
+        self.log.debug(f"✅ Set state for {len(items)} keys")
+
+    def save_snapshot(self) -> None:
+        """
+        💾 Write a consistent snapshot of the store to `snapshot_path`.
+
+        The snapshot is written to a temporary file that replaces the previous snapshot, so a crash
+        mid-write never leaves a truncated snapshot behind.
+        """
+        if not self.snapshot_path:
+            return
+        with self._snapshot_lock:
+            data = self.store.snapshot()
+            directory = os.path.dirname(os.path.abspath(self.snapshot_path))
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    if self.snapshot_format == "msgpack":
+                        f.write(msgpack.packb(data, use_bin_type=True))
+                    else:
+                        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.snapshot_path)
+            except Exception:
+                os.unlink(temp_path)
+                raise
+        self.log.debug(f"💾 Saved {len(data)} keys to {self.snapshot_path}")
+
+    def load_snapshot(self) -> None:
+        """
+        📂 Load the store from `snapshot_path`, if the file exists.
+        """
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return
+        with open(self.snapshot_path, "rb") as f:
+            if self.snapshot_format == "msgpack":
+                data = msgpack.unpackb(f.read(), raw=False)
+            else:
+                data = pickle.load(f)
+        self.store.update_all(data)
+        self.log.info(f"📂 Loaded {len(data)} keys from {self.snapshot_path}")
+
+    def _snapshot_periodically(self) -> None:
+        """
+        🔁 Snapshot thread: saves the store every `snapshot_interval` seconds until closed.
+        """
+        while not self._stopped.wait(self.snapshot_interval):
+            try:
+                self.flush_buffer()
+                self.save_snapshot()
+            except Exception as e:
+                self.log.error(f"🚫 Failed to save snapshot: {e}")
+
+    def close(self) -> None:
+        """
+        🚪 Flush buffered state and save a final snapshot.
+        """
+        super().close()
+        if getattr(self, "snapshot_path", None):
+            self.save_snapshot()
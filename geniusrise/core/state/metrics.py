@@ -0,0 +1,294 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import math
+import platform
+import socket
+import threading
+import time
+import weakref
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import GPUtil
+import psutil
+
+Sample = Tuple[float, float, float]
+
+
+class MetricsHistory:
+    """
+    Fixed-capacity ring buffer of system metric samples.
+
+    Samples are stored as parallel arrays of floats (timestamp, CPU usage, memory usage),
+    so memory use is bounded by `capacity` however long the process runs. Once the buffer is
+    full, the oldest samples are overwritten.
+
+    Attributes:
+        capacity (int): Maximum number of samples kept.
+    """
+
+    FIELDS = ("timestamp", "cpu_usage", "memory_usage")
+
+    def __init__(self, capacity: int = 3600) -> None:
+        """
+        Initialize a new metrics history.
+
+        Args:
+            capacity (int): Maximum number of samples kept. Defaults to 3600, an hour of samples at one per second.
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._columns = {field: array("d", bytes(8 * capacity)) for field in self.FIELDS}
+        self._next = 0
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, timestamp: float, cpu_usage: float, memory_usage: float) -> None:
+        """
+        Add a sample, overwriting the oldest one if the buffer is full.
+
+        Args:
+            timestamp (float): Unix timestamp of the sample.
+            cpu_usage (float): CPU usage in percent.
+            memory_usage (float): Memory usage in percent.
+        """
+        with self._lock:
+            self._columns["timestamp"][self._next] = timestamp
+            self._columns["cpu_usage"][self._next] = cpu_usage
+            self._columns["memory_usage"][self._next] = memory_usage
+            self._next = (self._next + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+
+    def clear(self) -> None:
+        """
+        Drop all samples.
+        """
+        with self._lock:
+            self._next = 0
+            self._size = 0
+
+    def samples(self) -> Dict[str, List[float]]:
+        """
+        Get the samples, oldest first.
+
+        Returns:
+            Dict[str, List[float]]: One list of values per field.
+        """
+        with self._lock:
+            start = (self._next - self._size) % self.capacity
+            end = start + self._size
+            if end <= self.capacity:
+                return {field: column[start:end].tolist() for field, column in self._columns.items()}
+            return {
+                field: column[start:].tolist() + column[: self._next].tolist()
+                for field, column in self._columns.items()
+            }
+
+    @staticmethod
+    def _rollup(values: List[float]) -> Dict[str, float]:
+        ordered = sorted(values)
+        return {
+            "min": ordered[0],
+            "max": ordered[-1],
+            "mean": sum(ordered) / len(ordered),
+            # nearest-rank percentile
+            "p95": ordered[max(0, math.ceil(0.95 * len(ordered)) - 1)],
+        }
+
+    def aggregate(self) -> Dict[str, Any]:
+        """
+        Compute min, max, mean and p95 of the samples.
+
+        Returns:
+            Dict[str, Any]: The aggregates per metric, plus the number of samples and
+            the first and last timestamps. Empty if there are no samples.
+        """
+        samples = self.samples()
+        if not samples["timestamp"]:
+            return {}
+        return {
+            "samples": len(samples["timestamp"]),
+            "since": samples["timestamp"][0],
+            "until": samples["timestamp"][-1],
+            "cpu_usage": self._rollup(samples["cpu_usage"]),
+            "memory_usage": self._rollup(samples["memory_usage"]),
+        }
+
+
+class SystemSampler:
+    """
+    Process-wide sampler of system metrics.
+
+    One sampler thread serves every state manager in the process: it starts on the first
+    subscription, samples CPU and memory usage every `interval` seconds and hands each sample
+    to all subscribers. Static host information is probed once and cached.
+
+    Usage:
+    ```python
+    SystemSampler.instance().configure(interval=5)  # or None to turn sampling off
+    SystemSampler.instance().subscribe(lambda sample: print(sample))
+    ```
+
+    Attributes:
+        interval (Optional[float]): Seconds between samples, sampling is off if None or not positive.
+        latest (Optional[Sample]): The most recent (timestamp, cpu_usage, memory_usage) sample.
+    """
+
+    _instance: Optional["SystemSampler"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, interval: Optional[float] = 1.0) -> None:
+        """
+        Initialize a new sampler, use `SystemSampler.instance()` to get the shared one.
+
+        Args:
+            interval (Optional[float]): Seconds between samples. Defaults to 1.
+        """
+        self.log = logging.getLogger(self.__class__.__name__)
+        self.interval = interval
+        self.latest: Optional[Sample] = None
+        self._host_info: Optional[Dict[str, Any]] = None
+        self._subscribers: List[Callable[[], Optional[Callable[[Sample], None]]]] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    @classmethod
+    def instance(cls) -> "SystemSampler":
+        """
+        Get the process-wide sampler.
+
+        Returns:
+            SystemSampler: The shared sampler.
+        """
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.interval and self.interval > 0)
+
+    def host_info(self) -> Dict[str, Any]:
+        """
+        Get static host information, probed on the first call only.
+
+        Returns:
+            Dict[str, Any]: Hostname, uname, Python version, CPU count, memory and GPUs.
+        """
+        with self._lock:
+            if self._host_info is None:
+                try:
+                    gpus = GPUtil.getgpus()
+                except Exception as e:
+                    gpus = None
+                    self.log.debug(f"Nvidia gpus not available {e}")
+                self._host_info = {
+                    "hostname": socket.gethostname(),
+                    "system_info": platform.uname()._asdict(),
+                    "python_version": platform.python_version(),
+                    "cpu_count": psutil.cpu_count(),
+                    "virtual_memory": psutil.virtual_memory().total / (1024**3),
+                    "gpu_count": len(gpus) if gpus else 0,
+                    "gpu_memory": [x.memoryTotal for x in gpus] if gpus else [0],
+                }
+            return self._host_info
+
+    @staticmethod
+    def sample() -> Sample:
+        """
+        Take one sample of CPU and memory usage.
+
+        Returns:
+            Sample: (timestamp, cpu_usage, memory_usage).
+        """
+        return time.time(), psutil.cpu_percent(), psutil.virtual_memory().percent
+
+    def subscribe(self, callback: Callable[[Sample], None]) -> None:
+        """
+        Receive every sample, starting the sampler thread if needed.
+
+        Bound methods are held weakly, so subscribing does not keep their object alive.
+
+        Args:
+            callback (Callable[[Sample], None]): Called with each sample on the sampler thread.
+        """
+        ref: Callable[[], Optional[Callable[[Sample], None]]]
+        try:
+            ref = weakref.WeakMethod(callback)  # type: ignore
+        except TypeError:
+            ref = lambda: callback  # noqa: E731
+        with self._lock:
+            self._subscribers.append(ref)
+        self._start()
+
+    def unsubscribe(self, callback: Callable[[Sample], None]) -> None:
+        """
+        Stop receiving samples.
+
+        Args:
+            callback (Callable[[Sample], None]): A previously subscribed callback.
+        """
+        with self._lock:
+            self._subscribers = [ref for ref in self._subscribers if ref() not in (None, callback)]
+
+    def configure(self, interval: Optional[float]) -> None:
+        """
+        Change the sampling interval.
+
+        Args:
+            interval (Optional[float]): Seconds between samples, None or 0 turns sampling off.
+        """
+        self.interval = interval
+        # Stop the running thread, it may be waiting out the previous interval
+        self._stopped.set()
+        self._start()
+
+    def _start(self) -> None:
+        with self._lock:
+            running = self._thread and self._thread.is_alive() and not self._stopped.is_set()
+            if not self.enabled or not self._subscribers or running:
+                return
+            self._stopped = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run, args=(self._stopped,), name=self.__class__.__name__, daemon=True
+            )
+            self._thread.start()
+
+    def _run(self, stopped: threading.Event) -> None:
+        while not stopped.is_set():
+            try:
+                self.latest = self.sample()
+            except Exception as e:
+                self.log.debug(f"Could not sample system metrics: {e}")
+            else:
+                with self._lock:
+                    callbacks = [ref() for ref in self._subscribers]
+                    self._subscribers = [ref for ref, callback in zip(self._subscribers, callbacks) if callback]
+                for callback in callbacks:
+                    if callback:
+                        try:
+                            callback(self.latest)
+                        except Exception as e:
+                            self.log.debug(f"Metrics subscriber failed: {e}")
+            stopped.wait(self.interval or 1.0)
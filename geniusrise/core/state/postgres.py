@@ -15,23 +15,46 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import json
-from typing import Dict, Optional
+import re
+import threading
+from contextlib import contextmanager
 from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, TypeVar, Union
 
 import jsonpickle
 import psycopg2
+import psycopg2.extensions
+import psycopg2.extras
+import psycopg2.pool
 
 from geniusrise.core.state import State
 
+T = TypeVar("T")
+
+
+class _Connection(psycopg2.extensions.connection):
+    """
+    A connection that remembers which statements have been prepared on it.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.prepared: Set[str] = set()
+
 
 class PostgresState(State):
     """
     🗄️ **PostgresState**: A state manager that stores state in a PostgreSQL database.
 
     This manager provides a persistent storage solution using a PostgreSQL database.
+    States are stored as native JSONB, so single fields can be read and updated in place.
+    Rows written by earlier versions hold a jsonpickle string and are marked by the `encoding`
+    column; they are still read, converted when first updated in place, or all at once by `migrate`.
+    Connections come from a thread-safe pool, so one manager can be shared by many threads,
+    and dropped connections are replaced transparently.
 
     ## Attributes:
-    - `conn` (psycopg2.extensions.connection): The PostgreSQL connection.
+    - `pool` (psycopg2.pool.ThreadedConnectionPool): The PostgreSQL connection pool.
 
     ## Usage:
     ```python
@@ -39,6 +62,14 @@ class PostgresState(State):
     manager.set_state("user123", {"status": "active"})
     state = manager.get_state("user123")
     print(state)  # Outputs: {"status": "active"}
+
+    # upsert many keys in one transaction
+    manager.set_many({"user123": {"status": "active"}, "user456": {"status": "idle"}})
+
+    # change or fetch single fields without moving the whole state
+    manager.update_fields("user123", {"status": "idle", "profile.name": "Jane"})
+    manager.increment("user123", "logins")
+    manager.get("user123", fields=["status", "profile.name"])
     ```
 
 
@@ -53,6 +84,9 @@ class PostgresState(State):
         password: str,
         database: str,
         table: str = "geniusrise_state",
+        min_connections: int = 1,
+        max_connections: int = 10,
+        **kwargs,
     ) -> None:
         """
         💥 Initialize a new PostgreSQL state manager.
@@ -64,57 +98,269 @@ class PostgresState(State):
             password (str): The user's password.
             database (str): The database to connect to.
             table (str, optional): The table to use. Defaults to "geniusrise_state".
+            min_connections (int, optional): Connections kept open in the pool. Defaults to 1.
+            max_connections (int, optional): Maximum connections in the pool, further threads wait. Defaults to 10.
+            **kwargs: Additional arguments for `State`, like `write_behind` and `flush_interval`.
         """
-        super().__init__()
+        super().__init__(**kwargs)
         self.table = table
+        statement = re.sub(r"\W", "_", table)
+        self._get_statement = f"geniusrise_get_{statement}"
+        self._set_statement = f"geniusrise_set_{statement}"
+        self._slots = threading.BoundedSemaphore(max_connections)
         try:
-            self.conn = psycopg2.connect(host=host, port=port, user=user, password=password, database=database)
+            self.pool = psycopg2.pool.ThreadedConnectionPool(
+                min_connections,
+                max_connections,
+                host=host,
+                port=port,
+                user=user,
+                password=password,
+                database=database,
+                connection_factory=_Connection,
+            )
         except psycopg2.Error as e:
             self.log.exception(f"🚫 Failed to connect to PostgreSQL: {e}")
             raise
-            self.conn = None
         try:
-            with self.conn.cursor() as cur:
-                cur.execute(
+            self._run(
+                lambda cur: cur.execute(
                     f"""
                     CREATE TABLE IF NOT EXISTS {self.table} (
                         key TEXT PRIMARY KEY,
                         value JSONB,
+                        encoding TEXT NOT NULL DEFAULT 'jsonpickle',
                         created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
                         updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
                     );
+                    ALTER TABLE {self.table} ADD COLUMN IF NOT EXISTS encoding TEXT NOT NULL DEFAULT 'jsonpickle';
                     """
-                )
-            self.conn.commit()
+                ),
+                prepare=False,
+            )
         except psycopg2.Error as e:
             self.log.exception(f"🚫 Failed to create table in PostgreSQL: {e}")
             raise
 
-    def get(self, key: str) -> Optional[Dict]:
+    @contextmanager
+    def _connection(self) -> Iterator[_Connection]:
+        """
+        🔌 Borrow a connection from the pool, waiting if all of them are in use.
+        """
+        with self._slots:
+            conn = self.pool.getconn()
+            broken = False
+            try:
+                if conn.closed:
+                    self.pool.putconn(conn, close=True)
+                    conn = self.pool.getconn()
+                yield conn
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                broken = True
+                raise
+            finally:
+                if not broken and not conn.closed and conn.status != psycopg2.extensions.STATUS_READY:
+                    conn.rollback()
+                self.pool.putconn(conn, close=broken or bool(conn.closed))
+
+    def _run(self, work: Callable[[Any], T], prepare: bool = True) -> T:
+        """
+        🔁 Run `work` with a cursor in a transaction, retrying once on a fresh connection if the connection dropped.
+        """
+        for attempt in range(2):
+            try:
+                with self._connection() as conn:
+                    if prepare:
+                        self._prepare(conn)
+                    with conn.cursor() as cur:
+                        result = work(cur)
+                    conn.commit()
+                    return result
+            except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                if attempt:
+                    raise
+                self.log.warning(f"🔌 Lost the PostgreSQL connection, reconnecting: {e}")
+        raise AssertionError("unreachable")
+
+    def _prepare(self, conn: _Connection) -> None:
+        """
+        📋 Prepare the get and set statements on a connection, once per connection.
+        """
+        if self._set_statement in conn.prepared:
+            return
+        with conn.cursor() as cur:
+            cur.execute(
+                f"PREPARE {self._get_statement} (text) AS SELECT value, encoding FROM {self.table} WHERE key = $1"
+            )
+            cur.execute(
+                f"""
+                PREPARE {self._set_statement} (text, jsonb, timestamptz) AS
+                INSERT INTO {self.table} (key, value, encoding, created_at, updated_at)
+                VALUES ($1, $2, 'json', $3, $3)
+                ON CONFLICT (key)
+                DO UPDATE SET value = EXCLUDED.value, encoding = EXCLUDED.encoding, updated_at = EXCLUDED.updated_at
+                """
+            )
+        conn.commit()
+        conn.prepared.update({self._get_statement, self._set_statement})
+
+    @staticmethod
+    def _encode(value: Any) -> str:
+        try:
+            return json.dumps(value, allow_nan=False)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid state: {e}, PostgresState stores plain JSON values only.") from e
+
+    @staticmethod
+    def _decode(value: Any, encoding: str = "json") -> Any:
+        # Rows written before values were stored as native JSONB hold {"data": <jsonpickle string>}
+        if encoding == "jsonpickle" and isinstance(value, dict) and isinstance(value.get("data"), str):
+            return jsonpickle.decode(value["data"])
+        return value
+
+    def _migrate_row(self, cur: Any, key: str) -> None:
+        """
+        🔄 Convert a key's row to native JSONB if it holds a legacy jsonpickle string, locking it until commit.
+        """
+        cur.execute(f"SELECT value FROM {self.table} WHERE key = %s AND encoding = 'jsonpickle' FOR UPDATE", (key,))
+        result = cur.fetchone()
+        if result:
+            cur.execute(
+                f"UPDATE {self.table} SET value = %s::jsonb, encoding = 'json' WHERE key = %s",
+                (self._encode(self._decode(result[0], "jsonpickle")), key),
+            )
+
+    def migrate(self, batch_size: int = 1000) -> int:
+        """
+        🔄 Convert all rows written by earlier versions from jsonpickle strings to native JSONB.
+
+        Args:
+            batch_size (int, optional): Rows converted per transaction. Defaults to 1000.
+
+        Returns:
+            int: The number of rows converted.
+
+        Raises:
+            Exception: If there's an error accessing PostgreSQL.
+        """
+
+        def work(cur: Any) -> int:
+            cur.execute(
+                f"SELECT key, value FROM {self.table} WHERE encoding = 'jsonpickle' LIMIT %s FOR UPDATE SKIP LOCKED",
+                (batch_size,),
+            )
+            rows = [(key, self._encode(self._decode(value, "jsonpickle"))) for key, value in cur.fetchall()]
+            psycopg2.extras.execute_values(
+                cur,
+                f"""
+                UPDATE {self.table} AS t SET value = v.value::jsonb, encoding = 'json'
+                FROM (VALUES %s) AS v (key, value)
+                WHERE t.key = v.key
+                """,
+                rows,
+                page_size=batch_size,
+            )
+            return len(rows)
+
+        migrated = 0
+        try:
+            while True:
+                count = self._run(work, prepare=False)
+                migrated += count
+                if count < batch_size:
+                    break
+        except psycopg2.Error as e:
+            self.log.exception(f"🚫 Failed to migrate state in PostgreSQL: {e}")
+            raise
+        self.log.info(f"🔄 Migrated {migrated} legacy states to native JSONB")
+        return migrated
+
+    @staticmethod
+    def _path(field: str) -> List[str]:
+        return field.split(".")
+
+    @classmethod
+    def _project(cls, value: Any, field: str) -> Any:
+        for part in cls._path(field):
+            if isinstance(value, dict):
+                value = value.get(part)
+            elif isinstance(value, list) and part.lstrip("-").isdigit() and -len(value) <= int(part) < len(value):
+                value = value[int(part)]
+            else:
+                return None
+        return value
+
+    def get(self, key: str, fields: Optional[List[str]] = None) -> Optional[Dict]:
         """
         📖 Get the state associated with a key.
 
         Args:
             key (str): The key to get the state for.
+            fields (Optional[List[str]]): Only fetch these fields, nested fields are separated by dots,
+                e.g. `["offsets.partition_0", "status"]`. Defaults to None, the whole state.
 
         Returns:
-            Dict: The state associated with the key, or None if not found.
+            Dict: The state associated with the key, or None if not found. With `fields`, a dict of each
+            field to its value, None for missing fields.
 
         Raises:
             Exception: If there's an error accessing PostgreSQL.
         """
-        if self.conn:
-            try:
-                with self.conn.cursor() as cur:
-                    cur.execute(f"SELECT value FROM {self.table} WHERE key = %s", (key,))
-                    result = cur.fetchone()
-                    return jsonpickle.decode(result[0]["data"]) if result else None
-            except psycopg2.Error as e:
-                self.log.exception(f"🚫 Failed to get state from PostgreSQL: {e}")
-                raise
-        else:
-            self.log.exception("🚫 No PostgreSQL connection.")
+
+        def work(cur: Any) -> Optional[Dict]:
+            if fields is None:
+                cur.execute(f"EXECUTE {self._get_statement} (%s)", (key,))
+                result = cur.fetchone()
+                return self._decode(*result) if result else None
+            # Project on the server, only the requested fields are sent back
+            columns = ", ".join(["value #> %s"] * len(fields))
+            cur.execute(
+                f"SELECT encoding, {columns} FROM {self.table} WHERE key = %s",
+                [self._path(field) for field in fields] + [key],
+            )
+            result = cur.fetchone()
+            if not result:
+                return None
+            if result[0] == "jsonpickle":
+                # Legacy rows can only be read whole
+                cur.execute(f"EXECUTE {self._get_statement} (%s)", (key,))
+                state = self._decode(*cur.fetchone())
+                return {field: self._project(state, field) for field in fields}
+            return dict(zip(fields, result[1:]))
+
+        try:
+            return self._run(work)
+        except psycopg2.Error as e:
+            self.log.exception(f"🚫 Failed to get state from PostgreSQL: {e}")
+            raise
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Optional[Dict]]:
+        """
+        📖 Get the states associated with several keys in one query.
+
+        Args:
+            keys (Iterable[str]): The keys to get the states for.
+
+        Returns:
+            Dict[str, Optional[Dict]]: The state of each key, None for missing keys.
+
+        Raises:
+            Exception: If there's an error accessing PostgreSQL.
+        """
+        keys = list(keys)
+        if not keys:
+            return {}
+
+        def work(cur: Any) -> Dict[str, Any]:
+            cur.execute(f"SELECT key, value, encoding FROM {self.table} WHERE key = ANY(%s)", (keys,))
+            return {key: self._decode(value, encoding) for key, value, encoding in cur.fetchall()}
+
+        try:
+            found = self._run(work)
+        except psycopg2.Error as e:
+            self.log.exception(f"🚫 Failed to get state from PostgreSQL: {e}")
             raise
+        return {key: found.get(key) for key in keys}
 
     def set(self, key: str, value: Dict) -> None:
         """
@@ -127,22 +373,164 @@ class PostgresState(State):
         Raises:
             Exception: If there's an error accessing PostgreSQL.
         """
-        if self.conn:
-            try:
-                with self.conn.cursor() as cur:
-                    data = {"data": jsonpickle.encode(value)}
-                    cur.execute(
-                        f"""
-                        INSERT INTO {self.table} (key, value, created_at, updated_at)
-                        VALUES (%s, %s, %s, %s)
-                        ON CONFLICT (key)
-                        DO UPDATE SET value = EXCLUDED.value, updated_at = %s;
-                        """,
-                        (key, json.dumps(data), datetime.utcnow(), datetime.utcnow(), datetime.utcnow()),
-                    )
-                self.conn.commit()
-            except psycopg2.Error as e:
-                self.log.exception(f"🚫 Failed to set state in PostgreSQL: {e}")
-                raise
-        else:
-            self.log.error("🚫 No PostgreSQL connection.")
+        try:
+            self._run(
+                lambda cur: cur.execute(
+                    f"EXECUTE {self._set_statement} (%s, %s, %s)", (key, self._encode(value), datetime.utcnow())
+                )
+            )
+        except psycopg2.Error as e:
+            self.log.exception(f"🚫 Failed to set state in PostgreSQL: {e}")
+            raise
+
+    def set_many(self, items: Dict[str, Dict]) -> None:
+        """
+        📝 Upsert the states associated with several keys in a single transaction.
+
+        Args:
+            items (Dict[str, Dict]): The state to set for each key.
+
+        Raises:
+            Exception: If there's an error accessing PostgreSQL.
+        """
+        if not items:
+            return
+        now = datetime.utcnow()
+        rows = [(key, self._encode(value), now, now) for key, value in items.items()]
+        try:
+            self._run(
+                lambda cur: psycopg2.extras.execute_values(
+                    cur,
+                    f"""
+                    INSERT INTO {self.table} (key, value, encoding, created_at, updated_at)
+                    VALUES %s
+                    ON CONFLICT (key)
+                    DO UPDATE SET value = EXCLUDED.value, encoding = EXCLUDED.encoding, updated_at = EXCLUDED.updated_at
+                    """,
+                    rows,
+                    template="(%s, %s, 'json', %s, %s)",
+                    page_size=1000,
+                ),
+                prepare=False,
+            )
+        except psycopg2.Error as e:
+            self.log.exception(f"🚫 Failed to set state in PostgreSQL: {e}")
+            raise
+
+    def _update_in_place(
+        self,
+        key: str,
+        expression: str,
+        params: List[Any],
+        initial: Dict,
+        returning: str = "value",
+        returning_params: Optional[List[Any]] = None,
+    ) -> Any:
+        """
+        ✏️ Set a key's value to a SQL expression of `t.value` in one statement, or to `initial` if the key is new.
+        """
+        # Pending writes of the key must land before it is changed in place
+        if key in self.buffer:
+            self.flush_buffer()
+        now = datetime.utcnow()
+
+        def work(cur: Any) -> Any:
+            # A legacy row is converted first, so the expression patches the state and not its wrapper
+            self._migrate_row(cur, key)
+            cur.execute(
+                f"""
+                INSERT INTO {self.table} AS t (key, value, encoding, created_at, updated_at)
+                VALUES (%s, %s::jsonb, 'json', %s, %s)
+                ON CONFLICT (key)
+                DO UPDATE SET value = {expression}, updated_at = EXCLUDED.updated_at
+                RETURNING {returning}
+                """,
+                [key, self._encode(initial), now, now] + params + (returning_params or []),
+            )
+            return cur.fetchone()[0]
+
+        try:
+            result = self._run(work, prepare=False)
+        except psycopg2.Error as e:
+            self.log.exception(f"🚫 Failed to update state in PostgreSQL: {e}")
+            raise
+        # Drop a cached copy, if a cache is mixed in
+        invalidate = getattr(self, "invalidate", None)
+        if invalidate:
+            invalidate(key)
+        return result
+
+    @classmethod
+    def _nest(cls, patch: Dict[str, Any]) -> Dict:
+        nested: Dict[str, Any] = {}
+        for field, value in patch.items():
+            *parents, last = cls._path(field)
+            node = nested
+            for parent in parents:
+                node = node.setdefault(parent, {})
+            node[last] = value
+        return nested
+
+    def update_fields(self, key: str, patch: Dict[str, Any]) -> Dict:
+        """
+        ✏️ Update some fields of a state atomically, without reading and rewriting the whole state.
+
+        Top-level fields are merged with `||`, nested fields (separated by dots) are set with `jsonb_set`,
+        their parent objects must already exist. A new key is created from the patch.
+
+        Args:
+            key (str): The key to update.
+            patch (Dict[str, Any]): The value of each field to set, e.g. `{"status": "done", "offsets.p0": 42}`.
+
+        Returns:
+            Dict: The updated state.
+
+        Raises:
+            Exception: If there's an error accessing PostgreSQL.
+        """
+        top_level = {field: value for field, value in patch.items() if "." not in field}
+        expression = "COALESCE(t.value, '{}'::jsonb) || %s::jsonb"
+        params: List[Any] = [self._encode(top_level)]
+        for field, value in patch.items():
+            if "." in field:
+                expression = f"jsonb_set({expression}, %s, %s::jsonb, true)"
+                params += [self._path(field), self._encode(value)]
+        return self._update_in_place(key, expression, params, self._nest(patch))
+
+    def increment(self, key: str, field: str, amount: Union[int, float] = 1) -> Union[int, float]:
+        """
+        ➕ Atomically add to a numeric field of a state, e.g. a checkpoint counter.
+
+        A missing field counts as 0 and a new key is created.
+
+        Args:
+            key (str): The key to update.
+            field (str): The field to increment, nested fields are separated by dots.
+            amount (Union[int, float]): The amount to add. Defaults to 1.
+
+        Returns:
+            Union[int, float]: The new value of the field.
+
+        Raises:
+            Exception: If there's an error accessing PostgreSQL.
+        """
+        path = self._path(field)
+        expression = (
+            "jsonb_set(COALESCE(t.value, '{}'::jsonb), %s, to_jsonb(COALESCE((t.value #>> %s)::numeric, 0) + %s), true)"
+        )
+        return self._update_in_place(
+            key,
+            expression,
+            [path, path, amount],
+            self._nest({field: amount}),
+            returning="value #> %s",
+            returning_params=[path],
+        )
+
+    def close(self) -> None:
+        """
+        🚪 Flush buffered state and close all pooled connections.
+        """
+        super().close()
+        if getattr(self, "pool", None) and not self.pool.closed:
+            self.pool.closeall()
@@ -37,14 +37,15 @@ class PrometheusState(State):
     ```
     """
 
-    def __init__(self, gateway: str) -> None:
+    def __init__(self, gateway: str, **kwargs) -> None:
         """
         💥 Initialize a new Prometheus state manager.
 
         Args:
             gateway (str): The URL of the Prometheus PushGateway.
+            **kwargs: Additional arguments for `State`, like `write_behind` and `flush_interval`.
         """
-        super().__init__()
+        super().__init__(**kwargs)
         self.log = logging.getLogger(self.__class__.__name__)
         self.gateway = gateway
 
@@ -14,13 +14,36 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from typing import Dict, Optional
+import threading
+from typing import Dict, Iterable, Optional, Tuple
 
 import jsonpickle
 import redis  # type: ignore
 
 from geniusrise.core.state import State
 
+# Connection pools shared by all state managers connecting to the same server and database
+_pools: Dict[Tuple[str, int, int], redis.ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def shared_pool(host: str, port: int, db: int) -> redis.ConnectionPool:
+    """
+    🔌 Get the process-wide connection pool for a Redis database.
+
+    Args:
+        host (str): The host of the Redis server.
+        port (int): The port of the Redis server.
+        db (int): The database number.
+
+    Returns:
+        redis.ConnectionPool: The shared pool, created on first use.
+    """
+    with _pools_lock:
+        if (host, port, db) not in _pools:
+            _pools[(host, port, db)] = redis.ConnectionPool(host=host, port=port, db=db)
+        return _pools[(host, port, db)]
+
 
 class RedisState(State):
     """
@@ -29,7 +52,8 @@ class RedisState(State):
     This manager provides a fast, in-memory storage solution using Redis.
 
     ## Attributes:
-    - `redis` (redis.Redis): The Redis connection.
+    - `redis` (redis.Redis): The Redis client, backed by a connection pool shared with other state managers.
+    - `expire` (Optional[int]): Seconds after which keys expire, None to keep them.
 
     ## Usage:
     ```python
@@ -37,12 +61,24 @@ class RedisState(State):
     manager.set_state("user123", {"status": "active"})
     state = manager.get_state("user123")
     print(state)  # Outputs: {"status": "active"}
+
+    # checkpoint many keys in one round trip
+    manager.set_many({"user123": {"status": "active"}, "user456": {"status": "idle"}})
+    states = manager.get_many(["user123", "user456"])
     ```
 
     Ensure Redis is accessible and running.
     """
 
-    def __init__(self, host: str, port: int, db: int) -> None:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        db: int,
+        expire: Optional[int] = None,
+        pool: Optional[redis.ConnectionPool] = None,
+        **kwargs,
+    ) -> None:
         """
         💥 Initialize a new Redis state manager.
 
@@ -50,9 +86,14 @@ class RedisState(State):
             host (str): The host of the Redis server.
             port (int): The port of the Redis server.
             db (int): The database number to connect to.
+            expire (Optional[int]): Seconds after which keys expire. Defaults to None, keys never expire.
+            pool (Optional[redis.ConnectionPool]): Connection pool to use. Defaults to a pool shared
+                by all state managers of the same server and database.
+            **kwargs: Additional arguments for `State`, like `write_behind` and `flush_interval`.
         """
-        super().__init__()
-        self.redis = redis.Redis(host=host, port=port, db=db)
+        super().__init__(**kwargs)
+        self.expire = expire
+        self.redis = redis.Redis(connection_pool=pool if pool is not None else shared_pool(host, port, db))
         self.log.info(f"🔌 Connected to Redis at {host}:{port}, DB: {db}")
 
     def get(self, key: str) -> Optional[Dict]:
@@ -75,6 +116,25 @@ class RedisState(State):
         else:
             return jsonpickle.decode(value.decode("utf-8"))
 
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Optional[Dict]]:
+        """
+        📖 Get the states associated with several keys with a single MGET.
+
+        Args:
+            keys (Iterable[str]): The keys to get the states for.
+
+        Returns:
+            Dict[str, Optional[Dict]]: The state of each key, None for missing keys.
+
+        Raises:
+            Exception: If there's an error accessing Redis.
+        """
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = self.redis.mget(keys)
+        return {key: jsonpickle.decode(value.decode("utf-8")) if value else None for key, value in zip(keys, values)}
+
     def set(self, key: str, value: Dict) -> None:
         """
         📝 Set the state associated with a key.
@@ -87,8 +147,38 @@ class RedisState(State):
             Exception: If there's an error accessing Redis.
         """
         try:
-            self.redis.set(key, jsonpickle.encode(value))
+            self.redis.set(key, jsonpickle.encode(value), ex=self.expire)
             self.log.info(f"✅ State for key '{key}' set in Redis.")
         except Exception as e:
             self.log.exception(f"🚫 Failed to set state in Redis: {e}")
             raise
+
+    def set_many(self, items: Dict[str, Dict], expire: Optional[int] = None) -> None:
+        """
+        📝 Set the states associated with several keys in one round trip.
+
+        Uses MSET when keys do not expire, otherwise a pipeline of SETs.
+
+        Args:
+            items (Dict[str, Dict]): The state to set for each key.
+            expire (Optional[int]): Seconds after which the keys expire. Defaults to the manager's `expire`.
+
+        Raises:
+            Exception: If there's an error accessing Redis.
+        """
+        if not items:
+            return
+        expire = expire if expire is not None else self.expire
+        encoded = {key: jsonpickle.encode(value) for key, value in items.items()}
+        try:
+            if expire is None:
+                self.redis.mset(encoded)
+            else:
+                pipeline = self.redis.pipeline(transaction=False)
+                for key, value in encoded.items():
+                    pipeline.set(key, value, ex=expire)
+                pipeline.execute()
+            self.log.info(f"✅ State for {len(items)} keys set in Redis.")
+        except Exception as e:
+            self.log.exception(f"🚫 Failed to set state in Redis: {e}")
+            raise
@@ -0,0 +1,255 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from geniusrise.core.state import State
+
+
+class SQLiteState(State):
+    """
+    🗄️ **SQLiteState**: A state manager that stores state in an embedded SQLite database.
+
+    The database is a local file opened in write-ahead-log mode, so state survives restarts without
+    any network service. Reads and writes take microseconds and `set_many` writes all keys in one transaction.
+    Writes go through one connection shared by all threads of the manager, while each thread reads through
+    its own connection, so readers neither block the writer nor each other. An in-memory database
+    (`path=":memory:"`) only has the one connection, reads then wait for writes.
+
+    ## Attributes:
+    - `path` (str): The database file.
+    - `table` (str): The table holding the states.
+    - `connection` (sqlite3.Connection): The write connection.
+
+    ## Usage:
+    ```python
+    manager = SQLiteState(path="/var/lib/bolt/state.db")
+    manager.set_state("user123", {"status": "active"})
+    state = manager.get_state("user123")
+    print(state)  # Outputs: {"status": "active"}
+
+    # checkpoint many keys in one transaction
+    manager.set_many({"user123": {"status": "active"}, "user456": {"status": "idle"}})
+    states = manager.get_many(["user123", "user456"])
+    ```
+
+    Remember, the database is a local file. Use a database server for state shared across nodes!
+    """
+
+    # SQLite limits the number of parameters of a statement to 999 in older versions
+    BATCH_GET_SIZE = 500
+
+    def __init__(
+        self,
+        path: str = "geniusrise.db",
+        table: str = "geniusrise_state",
+        synchronous: str = "NORMAL",
+        **kwargs,
+    ) -> None:
+        """
+        💥 Initialize a new SQLite state manager.
+
+        Args:
+            path (str): The database file, created if missing. Defaults to "geniusrise.db".
+            table (str): The table to use, created if missing. Defaults to "geniusrise_state".
+            synchronous (str): SQLite `synchronous` level, "NORMAL" survives process crashes,
+                "FULL" also survives power loss at the cost of an fsync per transaction. Defaults to "NORMAL".
+            **kwargs: Additional arguments for `State`, like `write_behind` and `flush_interval`.
+
+        Raises:
+            ValueError: If the synchronous level is unknown.
+        """
+        if synchronous.upper() not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+            raise ValueError(f"Invalid synchronous level: {synchronous}")
+        super().__init__(**kwargs)
+        self.path = path
+        self.table = table
+        self._table = '"' + table.replace('"', '""') + '"'
+        self._lock = threading.Lock()
+        self._readers = threading.local()
+        self._reader_connections: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        try:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            # Transactions are explicit, see `set_many`
+            self.connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(f"PRAGMA synchronous={synchronous.upper()}")
+            self.connection.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {self._table} (
+                    key TEXT PRIMARY KEY,
+                    value TEXT,
+                    created_at TEXT,
+                    updated_at TEXT
+                )
+                """
+            )
+        except sqlite3.Error as e:
+            self.log.exception(f"🚫 Failed to open SQLite database {path}: {e}")
+            raise
+        self.log.info(f"🔌 Opened SQLite database at {path}, table: {table}")
+
+    @staticmethod
+    def _encode(value: Dict) -> str:
+        return json.dumps(value, default=str)
+
+    def _reader(self) -> Optional[sqlite3.Connection]:
+        """
+        🔌 Get the read connection of the calling thread, opened on first use.
+
+        Returns:
+            Optional[sqlite3.Connection]: The connection, None for an in-memory database.
+        """
+        if self.path == ":memory:":
+            return None
+        connection = getattr(self._readers, "connection", None)
+        if connection is None:
+            # Not bound to the thread, so that `close` can close it
+            connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA query_only=ON")
+            with self._readers_lock:
+                self._reader_connections.append(connection)
+            self._readers.connection = connection
+        return connection
+
+    def _read(self, query: str, parameters: Sequence[Any]) -> List[Tuple]:
+        reader = self._reader()
+        if reader is None:
+            with self._lock:
+                return self.connection.execute(query, parameters).fetchall()
+        return reader.execute(query, parameters).fetchall()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        📖 Get the state associated with a key.
+
+        Args:
+            key (str): The key to get the state for.
+
+        Returns:
+            Dict: The state associated with the key, or None if not found.
+
+        Raises:
+            Exception: If there's an error accessing SQLite.
+        """
+        try:
+            rows = self._read(f"SELECT value FROM {self._table} WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            self.log.exception(f"🚫 Failed to get state from SQLite: {e}")
+            raise
+        if not rows:
+            self.log.warning(f"🔍 Key '{key}' not found in SQLite.")
+            return None
+        return json.loads(rows[0][0])
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Optional[Dict]]:
+        """
+        📖 Get the states associated with several keys, 500 keys per query.
+
+        Args:
+            keys (Iterable[str]): The keys to get the states for.
+
+        Returns:
+            Dict[str, Optional[Dict]]: The state of each key, None for missing keys.
+
+        Raises:
+            Exception: If there's an error accessing SQLite.
+        """
+        keys = list(dict.fromkeys(keys))
+        found: Dict[str, Dict] = {}
+        try:
+            for start in range(0, len(keys), self.BATCH_GET_SIZE):
+                end = start + self.BATCH_GET_SIZE
+                batch = keys[start:end]
+                rows = self._read(
+                    f"SELECT key, value FROM {self._table} WHERE key IN ({', '.join('?' * len(batch))})", batch
+                )
+                found.update((key, json.loads(value)) for key, value in rows)
+        except sqlite3.Error as e:
+            self.log.exception(f"🚫 Failed to get state from SQLite: {e}")
+            raise
+        return {key: found.get(key) for key in keys}
+
+    def set(self, key: str, value: Dict) -> None:
+        """
+        📝 Set the state associated with a key.
+
+        Args:
+            key (str): The key to set the state for.
+            value (Dict): The state to set.
+
+        Raises:
+            Exception: If there's an error accessing SQLite.
+        """
+        self.set_many({key: value})
+
+    def set_many(self, items: Dict[str, Dict]) -> None:
+        """
+        📝 Set the states associated with several keys in one transaction.
+
+        Either all keys are written or, if any write fails, none of them.
+
+        Args:
+            items (Dict[str, Dict]): The state to set for each key.
+
+        Raises:
+            Exception: If there's an error accessing SQLite.
+        """
+        if not items:
+            return
+        now = datetime.utcnow().isoformat()
+        rows = [(key, self._encode(value), now, now) for key, value in items.items()]
+        try:
+            with self._lock:
+                self.connection.execute("BEGIN")
+                try:
+                    self.connection.executemany(
+                        f"""
+                        INSERT INTO {self._table} (key, value, created_at, updated_at)
+                        VALUES (?, ?, ?, ?)
+                        ON CONFLICT (key)
+                        DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+                        """,
+                        rows,
+                    )
+                except BaseException:
+                    self.connection.execute("ROLLBACK")
+                    raise
+                self.connection.execute("COMMIT")
+            self.log.debug(f"✅ State for {len(items)} keys set in SQLite.")
+        except sqlite3.Error as e:
+            self.log.exception(f"🚫 Failed to set state in SQLite: {e}")
+            raise
+
+    def close(self) -> None:
+        """
+        🚪 Flush buffered state and close the database.
+        """
+        super().close()
+        if getattr(self, "connection", None) is not None:
+            with self._readers_lock:
+                for reader in self._reader_connections:
+                    reader.close()
+                self._reader_connections = []
+            with self._lock:
+                self.connection.close()
@@ -15,3 +15,5 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from .base import Task
+from .profiler import Profiler
+from .workers import WorkerPool
@@ -0,0 +1,193 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from prometheus_client import CollectorRegistry, Histogram
+
+# Profilers that can be enabled on top of wall time, CPU time and peak RSS
+TOOLS = ("cprofile", "tracemalloc")
+
+
+def _peak_rss() -> int:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Profiler:
+    """
+    ⏱️ **Profiler**: Profiles the methods executed by a bolt or spout.
+
+    Every profiled call records its wall time, CPU time and the peak RSS of the process. With the
+    "tracemalloc" tool it also records the peak traced memory and the net number of memory blocks the call
+    left allocated, with the "cprofile" tool the time spent per function. Each call is written as a JSON profile artifact,
+    plus a `.prof` file for cProfile, and summarized into Prometheus histograms labelled by method.
+
+    Attributes:
+        tools (Iterable[str]): Enabled profilers, any of "cprofile" and "tracemalloc".
+        profile_dir (str): Folder the profile artifacts are written to.
+        last (Optional[Dict[str, Any]]): Summary of the last profiled call.
+
+    Usage:
+    ```python
+    profiler = Profiler(state.registry, tools=["tracemalloc"], profile_dir="/tmp/profiles")
+    result = profiler.run("process", bolt.execute, "process", input_folder="/tmp/input")
+    print(profiler.last["wall_time"], profiler.last["net_allocated_blocks"])
+    ```
+    """
+
+    def __init__(
+        self,
+        registry: CollectorRegistry,
+        tools: Iterable[str] = (),
+        profile_dir: Optional[str] = None,
+        top: int = 25,
+    ) -> None:
+        """
+        Initialize a new profiler.
+
+        Args:
+            registry (CollectorRegistry): Registry of the histograms, usually the state's.
+            tools (Iterable[str]): Profilers to enable, any of "cprofile" and "tracemalloc". Defaults to none.
+            profile_dir (Optional[str]): Folder to write profile artifacts to. Defaults to a temporary folder.
+            top (int): Number of functions with the most cumulative time in a cProfile summary. Defaults to 25.
+
+        Raises:
+            ValueError: If a tool is unknown.
+        """
+        self.log = logging.getLogger(self.__class__.__name__)
+        self.tools = [tool for tool in tools if tool]
+        for tool in self.tools:
+            if tool not in TOOLS:
+                raise ValueError(f"Invalid profiler: {tool}")
+        self.profile_dir = profile_dir or tempfile.mkdtemp(prefix="profiles-")
+        self.top = top
+        self.last: Optional[Dict[str, Any]] = None
+
+        # Methods run from milliseconds to hours
+        seconds = [0.01, 0.1, 1, 10, 60, 300, 900, 3600, 4 * 3600, 24 * 3600]
+        self.wall_time = Histogram(
+            "method_wall_seconds", "Wall time of profiled methods", ["method"], buckets=seconds, registry=registry
+        )
+        self.cpu_time = Histogram(
+            "method_cpu_seconds", "CPU time of profiled methods", ["method"], buckets=seconds, registry=registry
+        )
+        self.peak_rss = Histogram(
+            "method_peak_rss_bytes",
+            "Peak RSS of the process after profiled methods",
+            ["method"],
+            buckets=[2**i for i in range(20, 37)],
+            registry=registry,
+        )
+        self.net_allocated_blocks = Histogram(
+            "method_net_allocated_blocks",
+            "Memory blocks left allocated by profiled methods, allocations minus frees",
+            ["method"],
+            buckets=[10**i for i in range(1, 10)],
+            registry=registry,
+        )
+
+    def run(self, method_name: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Call a function and profile it, the profile is recorded even if the function raises.
+
+        Args:
+            method_name (str): The method name the profile is recorded under.
+            func (Callable[..., Any]): The function to call.
+            *args (Any): Positional arguments for the function.
+            **kwargs (Any): Keyword arguments for the function.
+
+        Returns:
+            Any: The result of the function.
+        """
+        profiler = cProfile.Profile() if "cprofile" in self.tools else None
+        trace = "tracemalloc" in self.tools and not tracemalloc.is_tracing()
+        if trace:
+            tracemalloc.start()
+        elif "tracemalloc" in self.tools:
+            # Someone else is tracing, the peak must not include what happened before this call
+            tracemalloc.reset_peak()
+        blocks = sys.getallocatedblocks()
+        started = datetime.utcnow()
+        wall, cpu = time.perf_counter(), time.process_time()
+        status = "failed"
+        try:
+            if profiler:
+                result = profiler.runcall(func, *args, **kwargs)
+            else:
+                result = func(*args, **kwargs)
+            status = "success"
+            return result
+        finally:
+            summary: Dict[str, Any] = {
+                "method": method_name,
+                "status": status,
+                "started": started.isoformat(),
+                "wall_time": time.perf_counter() - wall,
+                "cpu_time": time.process_time() - cpu,
+                "peak_rss": _peak_rss(),
+            }
+            if "tracemalloc" in self.tools:
+                # A net change: blocks allocated and freed within the call cancel out, shrinking counts as 0
+                summary["net_allocated_blocks"] = max(0, sys.getallocatedblocks() - blocks)
+                summary["traced_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+                if trace:
+                    tracemalloc.stop()
+            self._record(summary, profiler)
+
+    def _record(self, summary: Dict[str, Any], profiler: Optional[cProfile.Profile]) -> None:
+        """
+        Observe the histograms and write the profile artifacts.
+        """
+        method = summary["method"]
+        self.wall_time.labels(method).observe(summary["wall_time"])
+        self.cpu_time.labels(method).observe(summary["cpu_time"])
+        self.peak_rss.labels(method).observe(summary["peak_rss"])
+        if "net_allocated_blocks" in summary:
+            self.net_allocated_blocks.labels(method).observe(summary["net_allocated_blocks"])
+
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            name = os.path.join(self.profile_dir, f"{method}-{summary['started'].replace(':', '')}")
+            if profiler:
+                profiler.dump_stats(f"{name}.prof")
+                summary["cprofile"] = f"{name}.prof"
+                stream = io.StringIO()
+                pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(self.top)
+                summary["hot_paths"] = stream.getvalue()
+            with open(f"{name}.json", "w") as f:
+                json.dump(summary, f, indent=2)
+        except OSError as e:
+            self.log.error(f"🚫 Could not write profile of {method}: {e}")
+
+        self.last = summary
+        self.log.info(
+            f"⏱️ {method} took {summary['wall_time']:.3f}s wall, {summary['cpu_time']:.3f}s CPU, "
+            f"peak RSS {summary['peak_rss'] / 2**20:.0f}MB"
+        )
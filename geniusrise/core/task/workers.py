@@ -0,0 +1,315 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import multiprocessing
+import queue
+import signal
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from prometheus_client import CollectorRegistry, Counter, Gauge
+from prometheus_client.metrics_core import Metric
+from prometheus_client.registry import Collector
+
+from geniusrise.core.state.base import _close_states
+from geniusrise.logging import stop_logging
+
+# A worker's metrics as sent to the supervisor: (name, documentation, type, [(sample name, labels, value)])
+Family = Tuple[str, str, str, List[Tuple[str, Dict[str, str], float]]]
+
+
+def _families(registry: CollectorRegistry) -> List[Family]:
+    """
+    Plain, picklable copy of the metrics of a registry.
+    """
+    return [
+        (metric.name, metric.documentation, metric.type, [(s.name, s.labels, s.value) for s in metric.samples])
+        for metric in registry.collect()
+    ]
+
+
+class WorkerMetrics(Collector):
+    """
+    📊 **WorkerMetrics**: Prometheus collector that sums the metrics of all workers of a pool.
+
+    Counters, histograms and summaries of workers that exited are kept, so totals do not go down
+    when a worker is restarted. Gauges only count the workers that are alive.
+    """
+
+    def __init__(self) -> None:
+        self.live: Dict[int, List[Family]] = {}
+        self.retired: List[Family] = []
+        self._lock = threading.Lock()
+
+    def update(self, pid: int, families: List[Family]) -> None:
+        """
+        Replace the metrics of a worker with its latest ones.
+
+        Args:
+            pid (int): Process id of the worker.
+            families (List[Family]): Its metrics.
+        """
+        with self._lock:
+            self.live[pid] = families
+
+    def retire(self, pid: int) -> None:
+        """
+        Keep the totals of a worker that exited.
+
+        Args:
+            pid (int): Process id of the worker.
+        """
+        with self._lock:
+            families = self.live.pop(pid, [])
+            self.retired = self._merge([self.retired, [f for f in families if f[2] != "gauge"]])
+
+    @staticmethod
+    def _merge(workers: List[List[Family]]) -> List[Family]:
+        merged: Dict[str, Tuple[str, str, Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float]]] = {}
+        for families in workers:
+            for name, documentation, type_, samples in families:
+                _, _, values = merged.setdefault(name, (documentation, type_, {}))
+                for sample_name, labels, value in samples:
+                    # Creation timestamps do not add up
+                    if sample_name.endswith("_created"):
+                        continue
+                    key = (sample_name, tuple(sorted(labels.items())))
+                    values[key] = values.get(key, 0.0) + value
+        return [
+            (name, documentation, type_, [(s, dict(labels), v) for (s, labels), v in values.items()])
+            for name, (documentation, type_, values) in merged.items()
+        ]
+
+    def collect(self):
+        with self._lock:
+            families = self._merge([self.retired, *self.live.values()])
+        for name, documentation, type_, samples in families:
+            metric = Metric(name, documentation, type_)
+            for sample_name, labels, value in samples:
+                metric.add_sample(sample_name, labels, value)
+            yield metric
+
+
+class WorkerPool:
+    """
+    👷 **WorkerPool**: Runs a task in several forked worker processes, under a supervisor.
+
+    Each worker creates its own task, from its index, and runs the same method, so bolts reading from Kafka join
+    one consumer group and Kafka spreads the partitions over the workers. The supervisor restarts
+    workers that crash, with exponential backoff, and sums the metrics of the workers' state
+    registries into its own `registry`. Workers that exit cleanly are not restarted.
+
+    Attributes:
+        registry (CollectorRegistry): Metrics of all workers summed, plus `workers_alive` and `worker_restarts`.
+        exitcodes (Dict[int, Optional[int]]): Last exit code of each worker.
+
+    Usage:
+    ```python
+    pool = WorkerPool(lambda index: Bolt.create(MyBolt, "streaming", "batch", "none", **kwargs), workers=4)
+    serve_metrics(pool.registry, 8282)
+    pool.run("process")
+    ```
+
+    Note:
+    - Workers are forked, the task is created in each worker after the fork.
+    """
+
+    def __init__(
+        self,
+        create: Callable[[int], Any],
+        workers: int,
+        max_restarts: int = 5,
+        restart_delay: float = 1.0,
+        metrics_interval: float = 5.0,
+    ) -> None:
+        """
+        Initialize a new worker pool.
+
+        Args:
+            create (Callable[[int], Any]): Creates the task in a worker, a bolt or a spout, from the worker's
+                index, e.g. to give each worker its own folders.
+            workers (int): Number of worker processes.
+            max_restarts (int): Restarts of a worker before giving up on it. Defaults to 5.
+            restart_delay (float): Seconds before the first restart, doubled on every further restart. Defaults to 1.
+            metrics_interval (float): Seconds between metrics sent by the workers. Defaults to 5.
+
+        Raises:
+            ValueError: If the number of workers is not positive.
+        """
+        if workers < 1:
+            raise ValueError(f"Invalid number of workers: {workers}")
+        self.create = create
+        self.workers = workers
+        self.max_restarts = max_restarts
+        self.restart_delay = restart_delay
+        self.metrics_interval = metrics_interval
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self.context = multiprocessing.get_context("fork")
+        self.processes: Dict[int, Any] = {}
+        self.restarts: Dict[int, int] = {}
+        self.exitcodes: Dict[int, Optional[int]] = {}
+        self._stopping = threading.Event()
+
+        self.metrics = WorkerMetrics()
+        self.registry = CollectorRegistry()
+        self.registry.register(self.metrics)
+        self.workers_alive = Gauge("workers_alive", "Worker processes alive", registry=self.registry)
+        self.worker_restarts = Counter("worker_restarts", "Restarts of crashed workers", registry=self.registry)
+
+    def _work(self, index: int, metrics: Any, method_name: str, args: tuple, kwargs: dict) -> None:
+        """
+        Worker process: create the task, run the method and keep the supervisor posted with its metrics.
+        """
+        # Stop cleanly on terminate, the supervisor handles interrupts
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+        task = None
+        stopped = threading.Event()
+
+        def publish() -> None:
+            if task is not None:
+                metrics.put((multiprocessing.current_process().pid, _families(task.state.registry)))
+
+        def publish_periodically() -> None:
+            while not stopped.wait(self.metrics_interval):
+                publish()
+
+        try:
+            task = self.create(index)
+            threading.Thread(target=publish_periodically, daemon=True).start()
+            self.log.info(f"👷 Worker {index} running {method_name}")
+            task(method_name, *args, **kwargs)
+        except Exception as e:
+            self.log.exception(f"🚫 Worker {index} failed: {e}")
+            sys.exit(1)
+        finally:
+            stopped.set()
+            # Forked processes skip the exit handlers and finalizers, flush outputs before committing
+            # inputs, then states and logs
+            if task is not None:
+                for data in (getattr(task, "output", None), getattr(task, "input", None)):
+                    if data is not None and hasattr(data, "close"):
+                        try:
+                            data.close()
+                        except Exception as e:
+                            self.log.error(f"🚫 Worker {index} could not close {data.__class__.__name__}: {e}")
+            _close_states()
+            publish()
+            stop_logging()
+
+    def _start(self, index: int, metrics: Any, method_name: str, args: tuple, kwargs: dict) -> None:
+        process = self.context.Process(
+            target=self._work,
+            args=(index, metrics, method_name, args, kwargs),
+            name=f"worker-{index}",
+            daemon=False,
+        )
+        process.start()
+        self.processes[index] = process
+
+    def _drain(self, metrics: Any) -> None:
+        while True:
+            try:
+                pid, families = metrics.get_nowait()
+            except queue.Empty:
+                return
+            self.metrics.update(pid, families)
+
+    def stop(self, *_) -> None:
+        """
+        🛑 Stop the pool: terminate the workers and do not restart them.
+        """
+        self._stopping.set()
+
+    def run(self, method_name: str, *args, **kwargs) -> Dict[int, Optional[int]]:
+        """
+        🚀 Start the workers and supervise them until all of them exited or the pool is stopped.
+
+        SIGTERM and SIGINT stop the pool when called from the main thread.
+
+        Args:
+            method_name (str): The method each worker executes on its task.
+            *args: Positional arguments for the method.
+            **kwargs: Keyword arguments for the method.
+
+        Returns:
+            Dict[int, Optional[int]]: Last exit code of each worker.
+        """
+        metrics = self.context.Queue()
+        handlers = {}
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                handlers[signum] = signal.signal(signum, self.stop)
+
+        restart_at: Dict[int, float] = {}
+        try:
+            for index in range(self.workers):
+                self._start(index, metrics, method_name, args, kwargs)
+
+            while (self.processes or restart_at) and not self._stopping.is_set():
+                self._stopping.wait(0.1)
+                self._drain(metrics)
+
+                for index, process in list(self.processes.items()):
+                    if process.is_alive():
+                        continue
+                    self._drain(metrics)
+                    self.metrics.retire(process.pid)
+                    del self.processes[index]
+                    self.exitcodes[index] = process.exitcode
+
+                    if process.exitcode == 0:
+                        self.log.info(f"✅ Worker {index} finished")
+                    elif self.restarts.get(index, 0) >= self.max_restarts:
+                        self.log.error(
+                            f"🚫 Worker {index} exited with {process.exitcode}, giving up after {self.max_restarts} restarts"
+                        )
+                    else:
+                        delay = self.restart_delay * 2 ** self.restarts.get(index, 0)
+                        self.log.warning(f"🔁 Worker {index} exited with {process.exitcode}, restarting in {delay:.1f}s")
+                        restart_at[index] = time.monotonic() + delay
+
+                for index, at in list(restart_at.items()):
+                    if time.monotonic() >= at:
+                        del restart_at[index]
+                        self.restarts[index] = self.restarts.get(index, 0) + 1
+                        self.worker_restarts.inc()
+                        self._start(index, metrics, method_name, args, kwargs)
+
+                self.workers_alive.set(len(self.processes))
+        finally:
+            for process in self.processes.values():
+                process.terminate()
+            for index, process in self.processes.items():
+                # Keep reading, a worker cannot exit before its last metrics are off the queue
+                while process.is_alive():
+                    self._drain(metrics)
+                    process.join(0.1)
+                self.exitcodes[index] = process.exitcode
+            self._drain(metrics)
+            for process in self.processes.values():
+                self.metrics.retire(process.pid)
+            self.processes.clear()
+            self.workers_alive.set(0)
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+
+        return self.exitcodes
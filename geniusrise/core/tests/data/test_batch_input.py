@@ -15,11 +15,13 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
+import time
 
 import boto3
 import pytest
 
 from geniusrise.core.data import BatchInput
+from geniusrise.core.data.batch_input import MANIFEST_FILENAME
 
 # Define your S3 bucket and folder details as constants
 BUCKET = "geniusrise-test-bucket"
@@ -112,3 +114,56 @@ def test_batch_input_config_copy_from_remote(batch_input_config):
 
     # Clean up the test file from the S3 bucket
     s3.delete_object(Bucket=BUCKET, Key=f"{S3_FOLDER}/test_file_from_s3.txt")
+
+
+def test_batch_input_config_copy_from_remote_skips_unchanged(batch_input_config):
+    s3 = boto3.client("s3")
+    s3.put_object(Body="test content", Bucket=BUCKET, Key=f"{S3_FOLDER}/test_file_unchanged.txt")
+
+    batch_input_config.copy_from_remote()
+    local_path = os.path.join(batch_input_config.input_folder, S3_FOLDER, "test_file_unchanged.txt")
+    mtime = os.stat(local_path).st_mtime
+    assert os.path.exists(os.path.join(batch_input_config.input_folder, MANIFEST_FILENAME))
+    assert all(MANIFEST_FILENAME not in f for f in batch_input_config.list_files())
+
+    # A second run must not download the object again
+    time.sleep(0.01)
+    batch_input_config.copy_from_remote()
+    assert os.stat(local_path).st_mtime == mtime
+
+    s3.delete_object(Bucket=BUCKET, Key=f"{S3_FOLDER}/test_file_unchanged.txt")
+
+
+def test_batch_input_copy_from_remote_benchmark(tmpdir, monkeypatch):
+    moto = pytest.importorskip("moto")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    n_objects = 200
+
+    with moto.mock_s3():
+        s3 = boto3.client("s3")
+        s3.create_bucket(Bucket="bench")
+        for i in range(n_objects):
+            s3.put_object(Body=os.urandom(32 * 1024), Bucket="bench", Key=f"shards/{i}.bin")
+
+        # The previous implementation: one object at a time, every run
+        serial_folder = str(tmpdir.mkdir("serial"))
+        start = time.time()
+        _bucket = boto3.resource("s3").Bucket("bench")
+        for obj in _bucket.objects.filter(Prefix="shards/"):
+            os.makedirs(os.path.dirname(f"{serial_folder}/{obj.key}"), exist_ok=True)
+            _bucket.download_file(obj.key, f"{serial_folder}/{obj.key}")
+        serial = time.time() - start
+
+        batch_input = BatchInput(str(tmpdir.mkdir("pooled")), "bench", "shards", max_workers=16)
+        start = time.time()
+        batch_input.copy_from_remote()
+        cold = time.time() - start
+
+        start = time.time()
+        batch_input.copy_from_remote()
+        warm = time.time() - start
+
+    assert len(os.listdir(os.path.join(batch_input.input_folder, "shards"))) == n_objects
+    assert warm < cold, f"serial: {serial:.3f}s, pooled cold: {cold:.3f}s, pooled warm (manifest): {warm:.3f}s"
@@ -80,6 +80,38 @@ def test_batch_output_config_flush(batch_output_config):
     assert file_exists_in_s3(BUCKET, os.path.join(S3_FOLDER, filename))
 
 
+# Test that only new or changed files are uploaded on subsequent copies
+def test_batch_output_config_copy_to_remote_incremental(batch_output_config):
+    batch_output_config.save({"test": "data"}, "test_file.json")
+    batch_output_config.save({"test": "other"}, "test_file_2.json")
+
+    stats = batch_output_config.copy_to_remote()
+    assert stats["files"] == 2
+    assert stats["bytes"] > 0
+
+    stats = batch_output_config.copy_to_remote()
+    assert stats["files"] == 0
+    assert stats["skipped"] == 2
+
+    batch_output_config.save({"test": "changed data"}, "test_file.json")
+    stats = batch_output_config.copy_to_remote()
+    assert stats["files"] == 1
+    assert file_exists_in_s3(BUCKET, os.path.join(S3_FOLDER, "test_file.json"))
+
+
+# Test that files are uploaded again when the output folder is reused for another destination
+def test_batch_output_config_copy_to_remote_new_destination(batch_output_config):
+    batch_output_config.save({"test": "data"}, "test_file.json")
+    assert batch_output_config.copy_to_remote()["files"] == 1
+
+    batch_output_config.s3_folder = S3_FOLDER + "-moved"
+    stats = batch_output_config.copy_to_remote()
+    assert stats["files"] == 1
+    assert stats["skipped"] == 0
+    assert file_exists_in_s3(BUCKET, os.path.join(S3_FOLDER + "-moved", "test_file.json"))
+    assert batch_output_config.list_files() == [os.path.join(batch_output_config.output_folder, "test_file.json")]
+
+
 def file_exists_in_s3(bucket, key):
     """
     Check if a file exists in an S3 bucket.
@@ -78,3 +78,44 @@ def test_kafka_message_namedtuple(batch_to_streaming_input_config):
     kafka_message = next(stream_iterator)
     assert isinstance(kafka_message, KafkaMessage)
     assert kafka_message._fields == ("key", "value")
+
+
+# Test line-based files and the bounded queue
+def test_batch_to_streaming_input_config_stream_lines(tmpdir):
+    with open(tmpdir.join("sample.jsonl"), "w") as f:
+        for i in range(100):
+            f.write(json.dumps({"key": i}) + "\n")
+    with open(tmpdir.join("sample.csv"), "w") as f:
+        f.write("key,value\n1,a\n2,b\n")
+
+    batch_to_streaming_input = BatchToStreamingInput(
+        input_folder=str(tmpdir), bucket=BUCKET, s3_folder=S3_FOLDER, queue_size=10, num_readers=2
+    )
+    messages = list(batch_to_streaming_input.get())
+
+    assert batch_to_streaming_input.queue.maxsize == 10
+    assert len(messages) == 102
+    assert sorted(m.value["key"] for m in messages if isinstance(m.value["key"], int)) == list(range(100))
+    assert {"key": "1", "value": "a"} in [m.value for m in messages]
+
+
+# Test that parse errors end the stream instead of truncating it silently
+def test_batch_to_streaming_input_config_read_error(batch_to_streaming_input_config, tmpdir):
+    with open(tmpdir.join("broken.json"), "w") as f:
+        f.write("{")
+
+    with pytest.raises(json.JSONDecodeError):
+        list(batch_to_streaming_input_config.get())
+
+
+def test_batch_to_streaming_input_config_filter_messages(tmpdir):
+    with open(tmpdir.join("sample.jsonl"), "w") as f:
+        for i in range(10):
+            f.write(json.dumps({"key": i}) + "\n")
+
+    batch_to_streaming_input = BatchToStreamingInput(input_folder=str(tmpdir), bucket=BUCKET, s3_folder=S3_FOLDER)
+    even = lambda m: m.value["key"] % 2 == 0  # noqa: E731
+
+    assert [m.value["key"] for m in batch_to_streaming_input.filter_messages(even)] == [0, 2, 4, 6, 8]
+    batches = list(batch_to_streaming_input.filter_messages(even, batched=True, max_records=4))
+    assert [[m.value["key"] for m in batch] for batch in batches] == [[0, 2], [4, 6], [8]]
@@ -0,0 +1,113 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import socket
+import time
+import urllib.request
+
+from prometheus_client import CollectorRegistry
+
+from geniusrise.core.data import BatchOutput, InstrumentedIterator, RecordMetrics, instrument_output, serve_metrics
+from geniusrise.core.data.input import Input
+
+
+class Message:
+    def __init__(self, value: bytes) -> None:
+        self.value = value
+        self.serialized_value_size = len(value)
+
+
+class Consumer:
+    def __init__(self, messages) -> None:
+        self.messages = messages
+        self.committed = False
+
+    def __iter__(self):
+        return iter(self.messages)
+
+    def commit(self) -> None:
+        self.committed = True
+
+
+def sample(registry, name, labels=None):
+    return registry.get_sample_value(name, labels or {})
+
+
+def test_instrumented_iterator_counts_records():
+    registry = CollectorRegistry()
+    metrics = RecordMetrics(registry, "input", "processing")
+    consumer = Consumer([Message(b"x" * 10) for _ in range(5)])
+
+    records = InstrumentedIterator(consumer, metrics)
+    for _ in records:
+        time.sleep(0.01)
+    records.commit()
+
+    assert consumer.committed
+    assert sample(registry, "input_records_total") == 5
+    assert sample(registry, "input_bytes_total") == 50
+    assert sample(registry, "input_inter_arrival_seconds_count") == 4
+    assert sample(registry, "input_processing_seconds_count") == 5
+    assert sample(registry, "input_processing_seconds_sum") >= 0.05
+
+    summary = metrics.summary()
+    assert summary["records"] == 5
+    assert summary["bytes"] == 50
+    assert 0 < summary["records_per_second"] < 200
+
+
+def test_instrument_output(tmpdir):
+    registry = CollectorRegistry()
+    output = BatchOutput(str(tmpdir), "geniusrise-test-bucket", "test-🤮")
+    instrument_output(output, RecordMetrics(registry, "output", "save"))
+
+    for i in range(3):
+        output.save('{"a": 1}', filename=f"{i}.json")
+
+    assert len(tmpdir.listdir()) == 3
+    assert sample(registry, "output_records_total") == 3
+    assert sample(registry, "output_bytes_total") == 24
+    assert sample(registry, "output_save_seconds_count") == 3
+
+
+def test_input_instrumented():
+    class TestInput(Input):
+        def get(self):
+            pass
+
+    input = TestInput()
+    records = [1, 2, 3]
+    assert input.instrumented(records) is records
+    assert "records" not in input.collect_metrics()
+
+    input.record_metrics = RecordMetrics(CollectorRegistry(), "input", "processing")
+    assert list(input.instrumented(records)) == records
+    assert input.collect_metrics()["records"] == 3
+
+
+def test_serve_metrics():
+    registry = CollectorRegistry()
+    metrics = RecordMetrics(registry, "input", "processing")
+    list(InstrumentedIterator([b"abc", b"de"], metrics))
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    serve_metrics(registry, port, addr="127.0.0.1")
+
+    body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5).read().decode()
+    assert "input_records_total 2.0" in body
+    assert "input_bytes_total 5.0" in body
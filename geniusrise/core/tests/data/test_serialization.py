@@ -0,0 +1,49 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+
+import pytest
+
+from geniusrise.core.data.serialization import get_serializer, loads, loads_many
+
+
+def test_loads():
+    assert loads(b'{"test": "data"}') == {"test": "data"}
+
+
+def test_loads_many():
+    values = [json.dumps({"test": i}).encode("utf-8") for i in range(10)]
+    assert loads_many(values) == [{"test": i} for i in range(10)]
+    assert loads_many([]) == []
+
+
+def test_loads_many_malformed():
+    # "1,2" is not one document even though the joined array would parse
+    with pytest.raises(ValueError):
+        loads_many([b"1,2", b"3"])
+    with pytest.raises(ValueError):
+        loads_many([b'{"test": 1}', b"{"])
+    # Broken documents that happen to join into an array of the right length
+    with pytest.raises(ValueError):
+        loads_many([b"[1", b"2]", b"3,4"])
+
+
+def test_get_serializer():
+    assert get_serializer("json")({"test": "data"}) == b'{"test": "data"}'
+    assert loads(get_serializer("orjson")({"test": "data"})) == {"test": "data"}
+    with pytest.raises(ValueError):
+        get_serializer("pickle")
@@ -70,7 +70,37 @@ def test_stream_to_batch_input_config_store_to_temp(stream_to_batch_input_config
     stream_to_batch_input_config.store_to_temp(messages)
 
     stored_files = os.listdir(stream_to_batch_input_config.temp_folder)
-    assert len(stored_files) == BUFFER_SIZE
+    assert stored_files == ["segment_00000.jsonl"]
+    with open(os.path.join(stream_to_batch_input_config.temp_folder, stored_files[0])) as f:
+        assert [json.loads(line) for line in f] == messages
+
+
+# Test that every batch replaces the segments of the previous one
+def test_stream_to_batch_input_config_store_to_temp_twice(stream_to_batch_input_config):
+    stream_to_batch_input_config.store_to_temp([{"batch": 1}] * BUFFER_SIZE)
+    stream_to_batch_input_config.store_to_temp([{"batch": 2}])
+
+    stored_files = os.listdir(stream_to_batch_input_config.temp_folder)
+    assert stored_files == ["segment_00000.jsonl"]
+    with open(os.path.join(stream_to_batch_input_config.temp_folder, stored_files[0])) as f:
+        assert [json.loads(line) for line in f] == [{"batch": 2}]
+
+
+# Test that offsets are not committed when a segment could not be written
+def test_stream_to_batch_input_config_write_segments_error(stream_to_batch_input_config, monkeypatch):
+    commits = []
+    monkeypatch.setattr(stream_to_batch_input_config, "commit", lambda: commits.append(True))
+
+    def values():
+        yield b'{"test": 1}'
+        raise OSError("No space left on device")
+
+    with pytest.raises(OSError):
+        stream_to_batch_input_config.write_segments(values())
+    assert commits == []
+
+    stream_to_batch_input_config.write_segments([b'{"test": 2}'])
+    assert commits == [True]
 
 
 # Test Get (Buffer and Store)
@@ -85,7 +115,24 @@ def test_stream_to_batch_input_config_get(stream_to_batch_input_config):
 
     assert os.path.exists(temp_folder)
     stored_files = os.listdir(temp_folder)
-    assert len(stored_files) == BUFFER_SIZE
+    lines = []
+    for stored_file in stored_files:
+        with open(os.path.join(temp_folder, stored_file)) as f:
+            lines += f.readlines()
+    assert len(lines) == BUFFER_SIZE
+
+
+# Test that segments roll over by size
+def test_stream_to_batch_input_config_write_segments(stream_to_batch_input_config):
+    stream_to_batch_input_config.segment_max_bytes = 100
+    values = [json.dumps({"test": i, "text": "x" * 50}, indent=2).encode("utf-8") for i in range(BUFFER_SIZE)]
+    count = stream_to_batch_input_config.write_segments(values, limit=BUFFER_SIZE - 1)
+
+    assert count == BUFFER_SIZE - 1
+    stored_files = sorted(os.listdir(stream_to_batch_input_config.temp_folder))
+    assert len(stored_files) == BUFFER_SIZE - 1
+    with open(os.path.join(stream_to_batch_input_config.temp_folder, stored_files[0])) as f:
+        assert [json.loads(line) for line in f] == [{"test": 0, "text": "x" * 50}]
 
 
 # Test Close
@@ -15,12 +15,13 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
+import time
 
 import boto3
 import pytest
 from kafka import KafkaConsumer
 
-from geniusrise.core.data import StreamToBatchOutput
+from geniusrise.core.data import FlushPolicy, StreamToBatchOutput
 
 # Constants
 KAFKA_SERVERS = "localhost:9094"
@@ -66,6 +67,14 @@ def test_stream_to_batch_output_init(stream_to_batch_output_config):
     assert stream_to_batch_output_config.buffer_size == BUFFER_SIZE
 
 
+def test_stream_to_batch_output_collect_metrics(stream_to_batch_output_config):
+    stream_to_batch_output_config.save({"test": "data"})
+    metrics = stream_to_batch_output_config.collect_metrics()
+    assert metrics["buffered"] == 1
+    assert metrics["pending"] == 0
+    assert metrics["failed_files"] == 0
+
+
 def test_stream_to_batch_output_save(stream_to_batch_output_config):
     data = {"test": "data"}
     for _ in range(BUFFER_SIZE):
@@ -82,3 +91,122 @@ def test_stream_to_batch_output_flush(stream_to_batch_output_config):
 
     stream_to_batch_output_config.flush()
     assert len(stream_to_batch_output_config.buffered_messages) == 0
+
+
+def test_stream_to_batch_output_write_files_rollover(tmpdir):
+    output = StreamToBatchOutput(
+        output_folder=tmpdir,
+        bucket=BUCKET,
+        s3_folder=S3_FOLDER,
+        buffer_size=BUFFER_SIZE,
+        output_format="jsonl",
+        max_file_size=100,
+    )
+    filenames = output.write_files([{"test": "data" * 10} for _ in range(BUFFER_SIZE)])
+
+    assert len(filenames) > 1
+    assert all(f.endswith(".jsonl") for f in filenames)
+    lines = sum(len(open(os.path.join(tmpdir, f)).readlines()) for f in filenames)
+    assert lines == BUFFER_SIZE
+
+
+def test_stream_to_batch_output_write_files_rollover_parquet(tmpdir):
+    pq = pytest.importorskip("pyarrow.parquet")
+    output = StreamToBatchOutput(
+        output_folder=tmpdir,
+        bucket=BUCKET,
+        s3_folder=S3_FOLDER,
+        buffer_size=BUFFER_SIZE,
+        output_format="parquet",
+        max_file_size=100,
+    )
+    filenames = output.write_files([{"test": "data" * 10} for _ in range(BUFFER_SIZE)])
+
+    assert len(filenames) > 1
+    assert sum(pq.read_table(os.path.join(tmpdir, f)).num_rows for f in filenames) == BUFFER_SIZE
+
+
+@pytest.mark.parametrize("output_format", ["jsonl", "jsonl.gz"])
+def test_stream_to_batch_output_flush_formats(tmpdir, output_format):
+    output = StreamToBatchOutput(
+        output_folder=tmpdir,
+        bucket=BUCKET,
+        s3_folder=S3_FOLDER,
+        buffer_size=BUFFER_SIZE,
+        output_format=output_format,
+    )
+    for _ in range(BUFFER_SIZE):
+        output.save({"test": "data"})
+
+    files = os.listdir(tmpdir)
+    assert all(f.endswith(output_format) for f in files)
+    assert any(file_exists_in_s3(BUCKET, os.path.join(S3_FOLDER, f)) for f in files)
+
+
+def test_stream_to_batch_output_flush_policy():
+    policy = FlushPolicy(max_count=10, max_bytes=100, max_age=5)
+    assert not policy.should_flush(0, 1000, 10)
+    assert policy.should_flush(10, 0, 0)
+    assert policy.should_flush(1, 100, 0)
+    assert policy.should_flush(1, 0, 5)
+    assert not policy.should_flush(1, 10, 1)
+
+
+def test_stream_to_batch_output_background_flush(tmpdir):
+    output = StreamToBatchOutput(
+        output_folder=tmpdir,
+        bucket=BUCKET,
+        s3_folder=S3_FOLDER,
+        buffer_size=BUFFER_SIZE,
+        flush_policy=FlushPolicy(max_count=BUFFER_SIZE, max_age=0.5),
+        background=True,
+    )
+    for _ in range(BUFFER_SIZE + 1):
+        output.save({"test": "data"})
+    assert len(output.buffered_messages) == 1
+
+    # The age limit flushes the remaining message without another save
+    time.sleep(2)
+    assert len(output.buffered_messages) == 0
+
+    output.close()
+    files = os.listdir(tmpdir)
+    assert len(files) == 2
+    assert all(file_exists_in_s3(BUCKET, os.path.join(S3_FOLDER, f)) for f in files)
+
+
+def test_stream_to_batch_output_retry_failed_uploads(tmpdir):
+    output = StreamToBatchOutput(
+        output_folder=tmpdir,
+        bucket=BUCKET,
+        s3_folder=S3_FOLDER,
+        buffer_size=BUFFER_SIZE,
+        output_format="jsonl",
+        max_file_size=100,
+        max_retries=1,
+    )
+    uploaded = []
+    failing = set()
+
+    def copy_file_to_remote(filename):
+        if not failing and not uploaded:
+            failing.add(filename)
+        if filename in failing:
+            raise IOError("S3 is down")
+        uploaded.append(filename)
+
+    output.copy_file_to_remote = copy_file_to_remote
+    for _ in range(BUFFER_SIZE - 1):
+        output.save({"test": "data" * 10})
+
+    # Every file is attempted before the error is raised
+    with pytest.raises(IOError):
+        output.flush()
+    assert output.failed_files == list(failing)
+    assert len(uploaded) == len(os.listdir(tmpdir)) - 1
+
+    # The failed file is uploaded on the next flush, without new messages
+    failing.clear()
+    output.flush()
+    assert output.failed_files == []
+    assert sorted(uploaded) == sorted(os.listdir(tmpdir))
@@ -14,12 +14,17 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import asyncio
 import json
+import threading
+import time
+import uuid
 
 import pytest
-from kafka import KafkaConsumer, KafkaProducer
+from kafka import KafkaConsumer, KafkaProducer, TopicPartition
 
 from geniusrise.core.data import StreamingInput
+from geniusrise.core.data.streaming_input import CommitManager
 
 # Constants
 KAFKA_CLUSTER_CONNECTION_STRING = "localhost:9094"
@@ -133,3 +138,176 @@ def test_streaming_input_config_collect_metrics(streaming_input_config):
         assert "request_latency_max" in metrics
     except Exception:
         pytest.fail("Failed to collect metrics")
+
+
+# Test async iteration and the concurrency gain of process_async
+def test_streaming_input_config_process_async_benchmark():
+    topic = f"test_async_{uuid.uuid4().hex}"
+    n_messages = 200
+    producer = KafkaProducer(bootstrap_servers=KAFKA_CLUSTER_CONNECTION_STRING)
+    for i in range(n_messages):
+        producer.send(topic, value=json.dumps({"test": i}).encode("utf-8"))
+    producer.flush()
+
+    async def handler(message):
+        # Simulates an I/O-bound model or API call
+        await asyncio.sleep(0.01)
+
+    async def consume_sequentially(streaming_input):
+        count = 0
+        async for message in streaming_input.async_iterator():
+            await handler(message)
+            count += 1
+        return count
+
+    def make_input(group_id):
+        return StreamingInput(
+            topic,
+            KAFKA_CLUSTER_CONNECTION_STRING,
+            group_id,
+            auto_offset_reset="earliest",
+            consumer_timeout_ms=3000,
+        )
+
+    start = time.time()
+    assert asyncio.run(consume_sequentially(make_input(f"{GROUP_ID}_seq"))) == n_messages
+    sequential = time.time() - start
+
+    start = time.time()
+    assert asyncio.run(make_input(f"{GROUP_ID}_async").process_async(handler, concurrency=50)) == n_messages
+    concurrent = time.time() - start
+
+    assert concurrent < sequential, f"sequential: {sequential:.3f}s, process_async: {concurrent:.3f}s"
+
+
+# Test batched iteration with per-batch commits
+def test_streaming_input_config_iter_batches():
+    topic = f"test_batches_{uuid.uuid4().hex}"
+    producer = KafkaProducer(bootstrap_servers=KAFKA_CLUSTER_CONNECTION_STRING)
+    for i in range(25):
+        producer.send(topic, value=json.dumps({"test": i}).encode("utf-8"))
+    producer.flush()
+
+    streaming_input = StreamingInput(
+        topic,
+        KAFKA_CLUSTER_CONNECTION_STRING,
+        GROUP_ID,
+        auto_offset_reset="earliest",
+        consumer_timeout_ms=3000,
+    )
+    batches = list(streaming_input.iter_batches(max_records=10, max_wait_ms=500))
+
+    assert all(len(batch) <= 10 for batch in batches)
+    assert sorted(message.value["test"] for batch in batches for message in batch) == list(range(25))
+    for batch in batches:
+        assert len({message.partition for message in batch}) == 1
+
+    filtered = list(
+        StreamingInput(
+            topic,
+            KAFKA_CLUSTER_CONNECTION_STRING,
+            f"{GROUP_ID}_filter",
+            auto_offset_reset="earliest",
+            consumer_timeout_ms=3000,
+        ).filter_messages(lambda message: message.value["test"] % 2 == 0, batched=True, max_records=10)
+    )
+    assert sum(len(batch) for batch in filtered) == 13
+
+
+# Test batched asynchronous commits of acknowledged messages
+def test_streaming_input_config_ack_batched_commits():
+    topic = f"test_commits_{uuid.uuid4().hex}"
+    producer = KafkaProducer(bootstrap_servers=KAFKA_CLUSTER_CONNECTION_STRING)
+    for i in range(20):
+        producer.send(topic, value=json.dumps({"test": i}).encode("utf-8"))
+    producer.flush()
+
+    streaming_input = StreamingInput(
+        topic,
+        KAFKA_CLUSTER_CONNECTION_STRING,
+        GROUP_ID,
+        auto_offset_reset="earliest",
+        consumer_timeout_ms=3000,
+        commit_every=10,
+        commit_interval_ms=60000,
+        enable_auto_commit=False,
+    )
+    # Only acknowledged offsets are committed
+    assert streaming_input.consumer.config["enable_auto_commit"] is False
+    for message in streaming_input.get():
+        streaming_input.ack(message)
+
+    metrics = streaming_input.collect_metrics()
+    assert {"commit_lag", "commits", "commit_failures", "commit_latency_avg", "commit_latency_max"} <= set(metrics)
+    assert metrics["commit_failures"] == 0
+
+    streaming_input.close()
+    assert streaming_input.commit_manager.metrics()["commit_lag"] == 0
+    assert streaming_input.commit_manager.metrics()["commits"] >= 1
+
+
+# Test that commits due on other threads are left to the thread that polls the consumer
+def test_commit_manager_poll_thread():
+    class Consumer:
+        def __init__(self):
+            self.threads = []
+
+        def commit_async(self, offsets, callback):
+            self.threads.append(threading.get_ident())
+
+    consumer = Consumer()
+    manager = CommitManager(consumer, commit_every=1)
+    polled = threading.Event()
+
+    def poll():
+        manager.poll_thread = threading.get_ident()
+        polled.wait(5)
+        manager.run_requested()
+
+    poller = threading.Thread(target=poll)
+    poller.start()
+    while manager.poll_thread is None:
+        time.sleep(0.01)
+
+    manager.mark(TopicPartition("test", 0), 41)
+    assert consumer.threads == []
+
+    polled.set()
+    poller.join()
+    assert consumer.threads == [poller.ident]
+
+
+# Test that out-of-order acks are committed only up to the lowest unfinished message
+def test_commit_manager_watermark():
+    class Consumer:
+        def __init__(self):
+            self.offsets = []
+
+        def commit_async(self, offsets, callback):
+            self.offsets.append({tp: offset.offset for tp, offset in offsets.items()})
+            callback(offsets, None)
+
+    consumer = Consumer()
+    manager = CommitManager(consumer, commit_every=1)
+    tp = TopicPartition("test", 0)
+    for offset in range(5, 12):
+        manager.track(tp, offset)
+
+    manager.mark(tp, 10)
+    manager.mark(tp, 5)
+    assert manager.processed[tp] == 6
+    for offset in [6, 8, 9]:
+        manager.mark(tp, offset)
+    assert manager.processed[tp] == 7
+    manager.mark(tp, 7)
+    assert manager.processed[tp] == 11
+    manager.mark(tp, 11)
+    assert manager.processed[tp] == 12
+    assert [offsets[tp] for offsets in consumer.offsets] == [5, 6, 7, 11, 12]
+
+
+# Test that offsets are auto-committed unless acknowledgements are asked for
+def test_streaming_input_config_auto_commit(streaming_input_config):
+    assert streaming_input_config.consumer.config["enable_auto_commit"] is True
+    streaming_input_config.ack()
+    assert streaming_input_config.commit_manager.processed == {}
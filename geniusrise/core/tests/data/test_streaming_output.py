@@ -15,6 +15,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import json
+import time
 
 import pytest
 from kafka import KafkaConsumer
@@ -79,3 +80,40 @@ def test_streaming_output_config_save_bulk(streaming_output_config, kafka_consum
         if i == len(data) - 1:
             break  # Only consume the number of messages that were saved
     kafka_consumer.unsubscribe()
+
+
+# Test that deliveries are accounted for by the delivery callbacks
+def test_streaming_output_config_delivery_metrics(streaming_output_config):
+    streaming_output_config.save_bulk([{"test": i} for i in range(100)])
+    streaming_output_config.flush()
+
+    metrics = streaming_output_config.collect_metrics()
+    assert metrics["sent"] == 100
+    assert metrics["delivered"] == 100
+    assert metrics["failed"] == 0
+    assert metrics["pending"] == 0
+
+
+# Test that an unknown producer profile is rejected
+def test_streaming_output_config_invalid_profile():
+    with pytest.raises(ValueError):
+        StreamingOutput(OUTPUT_TOPIC, KAFKA_SERVERS, profile="fastest")
+
+
+# Benchmark records/s across producer profiles and serializers
+def test_streaming_output_config_profiles_benchmark():
+    records = [{"id": i, "text": "lorem ipsum dolor sit amet " * 8, "score": i / 3} for i in range(20000)]
+
+    rates = {}
+    for profile, serializer in [("default", "json"), ("throughput", "json"), ("throughput", "orjson")]:
+        output = StreamingOutput(OUTPUT_TOPIC, KAFKA_SERVERS, profile=profile, serializer=serializer)
+        start = time.time()
+        output.save_bulk(records)
+        output.flush()
+        rates[(profile, serializer)] = len(records) / (time.time() - start)
+        assert output.collect_metrics()["delivered"] == len(records)
+        output.close()
+
+    assert rates[("throughput", "orjson")] > rates[("default", "json")], {
+        f"{profile}/{serializer}": f"{rate:.0f} records/s" for (profile, serializer), rate in rates.items()
+    }
@@ -0,0 +1,94 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import gzip
+import json
+import os
+
+import pytest
+
+from geniusrise.core.data.writers import get_record_writer
+
+RECORDS = [{"id": i, "text": f"record {i}"} for i in range(100)]
+
+
+def read_records(path, output_format):
+    if output_format == "json":
+        with open(path) as f:
+            return json.load(f)
+    elif output_format == "jsonl":
+        with open(path) as f:
+            return [json.loads(line) for line in f]
+    elif output_format == "jsonl.gz":
+        with gzip.open(path, "rt") as f:
+            return [json.loads(line) for line in f]
+    elif output_format == "jsonl.zst":
+        zstandard = pytest.importorskip("zstandard")
+        with open(path, "rb") as f:
+            data = zstandard.ZstdDecompressor().stream_reader(f).read()
+        return [json.loads(line) for line in data.splitlines()]
+    elif output_format == "parquet":
+        pq = pytest.importorskip("pyarrow.parquet")
+        return pq.read_table(path).to_pylist()
+
+
+@pytest.mark.parametrize("output_format", ["json", "jsonl", "jsonl.gz", "jsonl.zst", "parquet"])
+def test_record_writer_roundtrip(tmpdir, output_format):
+    try:
+        writer_class = get_record_writer(output_format)
+    except ValueError:
+        pytest.skip(f"{output_format} dependencies are not installed")
+
+    path = os.path.join(tmpdir, f"records.{writer_class.extension}")
+    with writer_class(path) as writer:
+        for record in RECORDS:
+            writer.write(record)
+
+    assert writer.records_written == len(RECORDS)
+    assert writer.bytes_written == os.path.getsize(path)
+    assert read_records(path, output_format) == RECORDS
+
+
+def test_get_record_writer_invalid_format():
+    with pytest.raises(ValueError):
+        get_record_writer("xml")
+
+
+def test_parquet_writer_schema_drift(tmpdir):
+    pq = pytest.importorskip("pyarrow.parquet")
+    writer_class = get_record_writer("parquet")
+
+    first = [{"id": i, "note": None} for i in range(3)]
+    second = [{"id": i, "note": "text", "extra": True} for i in range(3, 6)]
+    with writer_class(os.path.join(tmpdir, "records.parquet"), row_group_size=3) as writer:
+        for record in first + second:
+            writer.write(record)
+
+    assert len(writer.paths) == 2
+    assert [record for path in writer.paths for record in pq.read_table(path).to_pylist()] == first + second
+
+
+def test_parquet_writer_buffered_bytes(tmpdir):
+    pytest.importorskip("pyarrow.parquet")
+    writer_class = get_record_writer("parquet")
+
+    with writer_class(os.path.join(tmpdir, "records.parquet"), row_group_bytes=1024) as writer:
+        writer.write(RECORDS[0])
+        assert writer.bytes_written > 0
+        for record in RECORDS:
+            writer.write(record)
+        # Row groups are flushed by size before reaching the row count
+        assert os.path.getsize(writer.path) > 0
@@ -0,0 +1,141 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import time
+
+from geniusrise.core.state import CachedState, InMemoryState, cached
+
+
+class CachedInMemoryState(CachedState, InMemoryState):
+    pass
+
+
+def counter(state, name):
+    return state.registry.get_sample_value(f"{name}_total")
+
+
+# Test that repeated reads are served from the cache
+def test_cached_state_hits():
+    state = CachedInMemoryState(cache_size=10, cache_ttl=60)
+    state.set_state("test_key", {"test": "data"})
+
+    reads = []
+    original_get = InMemoryState.get
+    InMemoryState.get = lambda self, key: reads.append(key) or original_get(self, key)
+    try:
+        for _ in range(5):
+            assert state.get_state("test_key")["test"] == "data"
+    finally:
+        InMemoryState.get = original_get
+
+    assert reads == ["test_key"]
+    assert counter(state, "cache_hits") == 4
+    assert counter(state, "cache_misses") == 1
+
+
+# Test that writes invalidate the cached key
+def test_cached_state_write_invalidates():
+    state = CachedInMemoryState()
+    state.set_state("test_key", {"test": 1})
+    assert state.get_state("test_key")["test"] == 1
+    state.set_state("test_key", {"test": 2})
+    assert state.get_state("test_key")["test"] == 2
+
+
+# Test that reads with backend options bypass the cache
+def test_cached_state_get_options():
+    state = CachedInMemoryState()
+    state.set_state("test_key", {"test": "data"})
+    assert state.get("test_key")["test"] == "data"
+
+    reads = []
+    original_get = InMemoryState.get
+    InMemoryState.get = lambda self, key, fields=None: reads.append(fields) or {"test": "partial"}
+    try:
+        assert state.get("test_key", fields=["test"]) == {"test": "partial"}
+        assert state.get("test_key", fields=None)["test"] == "data"
+    finally:
+        InMemoryState.get = original_get
+
+    assert reads == [["test"]]
+    assert state.get("test_key")["test"] == "data"
+
+
+# Test LRU eviction
+def test_cached_state_lru_eviction():
+    state = cached(InMemoryState)(cache_size=3)
+    for i in range(3):
+        state.set_state(f"key_{i}", {"test": i})
+        state.get_state(f"key_{i}")
+    state.get_state("key_0")
+    state.set_state("key_3", {"test": 3})
+    state.get_state("key_3")
+
+    assert list(state._cache) == ["key_2", "key_0", "key_3"]
+    assert counter(state, "cache_evictions") == 1
+
+
+# Test global and per-key TTLs
+def test_cached_state_ttl():
+    state = CachedInMemoryState(cache_ttl=0.1)
+    state.set_key_ttl("long_lived", None)
+    state.set_state("short_lived", {"test": 1})
+    state.set_state("long_lived", {"test": 2})
+    state.get_state("short_lived")
+    state.get_state("long_lived")
+
+    time.sleep(0.2)
+    state.get_state("short_lived")
+    state.get_state("long_lived")
+    assert counter(state, "cache_misses") == 3
+    assert counter(state, "cache_hits") == 1
+
+
+# Test that bulk reads only go to the backend for uncached keys
+def test_cached_state_get_many():
+    state = CachedInMemoryState()
+    state.set_many({f"key_{i}": {"test": i} for i in range(4)})
+    state.get_state("key_0")
+
+    states = state.get_many(["key_0", "key_1", "key_2", "missing_key"])
+    assert list(states) == ["key_0", "key_1", "key_2", "missing_key"]
+    assert states["key_2"] == {"test": 2}
+    assert states["missing_key"] is None
+    assert counter(state, "cache_hits") == 1
+    assert counter(state, "cache_misses") == 4
+
+    state.set_many({"key_1": {"test": 10}})
+    assert state.get_many(["key_1"])["key_1"] == {"test": 10}
+
+
+# Test that mutating a state that was read does not change the cache
+def test_cached_state_copies():
+    state = CachedInMemoryState()
+    state.set_state("test_key", {"test": {"nested": 1}})
+    state.get_state("test_key")
+
+    cached_state = state.get_state("test_key")
+    cached_state["test"]["nested"] = 2
+    assert state.get_state("test_key")["test"] == {"nested": 1}
+    assert counter(state, "cache_hits") == 2
+
+
+# Test that per-key TTLs are bounded
+def test_cached_state_max_key_ttls():
+    state = CachedInMemoryState(max_key_ttls=2)
+    for i in range(3):
+        state.set_key_ttl(f"key_{i}", None)
+    assert list(state.key_ttls) == ["key_1", "key_2"]
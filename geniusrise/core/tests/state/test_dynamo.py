@@ -17,8 +17,9 @@
 import boto3
 import pytest
 from botocore.exceptions import ClientError
+from moto import mock_dynamodb
 
-from geniusrise.core.state import DynamoDBState
+from geniusrise.core.state import DynamoDBState, VersionConflictError, cached
 
 # Define your DynamoDB connection details as constants
 TABLE_NAME = "test_table"
@@ -82,3 +83,87 @@ def test_dynamodb_state_manager_set_state(dynamodb_state_manager):
 
     # Check that the state was set correctly
     assert dynamodb_state_manager.get_state(key)["test"] == "data"
+
+
+# Define a fixture for a DynamoDBState backed by moto
+@pytest.fixture
+def moto_dynamodb_state_manager(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    with mock_dynamodb():
+        boto3.resource("dynamodb", region_name=REGION_NAME).create_table(
+            TableName=TABLE_NAME,
+            KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        yield DynamoDBState(TABLE_NAME, REGION_NAME)
+
+
+# Test that states are stored as native maps
+def test_dynamodb_state_manager_native_attributes(moto_dynamodb_state_manager):
+    value = {"status": "active", "score": 0.5, "count": 3, "tags": ["a", "b"], "nested": {"ok": True}}
+    moto_dynamodb_state_manager.set("native_key", value)
+
+    item = moto_dynamodb_state_manager.table.get_item(Key={"id": "native_key"})["Item"]
+    assert item["state"]["status"] == "active"
+    assert item["version"] == 1
+    assert moto_dynamodb_state_manager.get("native_key") == value
+
+
+# Test batch reads and writes
+def test_dynamodb_state_manager_get_set_many(moto_dynamodb_state_manager):
+    items = {f"bulk_key_{i}": {"test": i} for i in range(250)}
+    moto_dynamodb_state_manager.set_many(items)
+
+    states = moto_dynamodb_state_manager.get_many(list(items) + ["missing_key"])
+    assert states["missing_key"] is None
+    assert all(states[key] == value for key, value in items.items())
+
+
+# Test conditional writes with versions
+def test_dynamodb_state_manager_versions(moto_dynamodb_state_manager):
+    state, version = moto_dynamodb_state_manager.get_versioned("versioned_key")
+    assert state is None and version == 0
+
+    assert moto_dynamodb_state_manager.set_versioned("versioned_key", {"test": 1}, version=0) == 1
+    with pytest.raises(VersionConflictError):
+        moto_dynamodb_state_manager.set_versioned("versioned_key", {"test": 2}, version=0)
+    assert moto_dynamodb_state_manager.set_versioned("versioned_key", {"test": 2}, version=1) == 2
+    assert moto_dynamodb_state_manager.get_versioned("versioned_key") == ({"test": 2}, 2)
+
+
+# Test that batched and buffered writes bump versions too
+def test_dynamodb_state_manager_versions_set_many(moto_dynamodb_state_manager):
+    assert moto_dynamodb_state_manager.set_versioned("interleaved_key", {"test": 1}, version=0) == 1
+    moto_dynamodb_state_manager.set_many({"interleaved_key": {"test": 2}, "other_key": {"test": 3}})
+    assert moto_dynamodb_state_manager.get_versioned("interleaved_key") == ({"test": 2}, 2)
+    assert moto_dynamodb_state_manager.get_versioned("other_key") == ({"test": 3}, 1)
+    with pytest.raises(VersionConflictError):
+        moto_dynamodb_state_manager.set_versioned("interleaved_key", {"test": 4}, version=1)
+
+    # set_state flushes through set_many
+    moto_dynamodb_state_manager.set_state("interleaved_key", {"test": 5})
+    state, version = moto_dynamodb_state_manager.get_versioned("interleaved_key")
+    assert state["test"] == 5 and version == 3
+    with pytest.raises(VersionConflictError):
+        moto_dynamodb_state_manager.set_versioned("interleaved_key", {"test": 6}, version=0)
+    assert moto_dynamodb_state_manager.set_versioned("interleaved_key", {"test": 6}, version=3) == 4
+
+
+# Test that versioned writes drop a cached copy
+def test_dynamodb_state_manager_versions_cached(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    with mock_dynamodb():
+        boto3.resource("dynamodb", region_name=REGION_NAME).create_table(
+            TableName=TABLE_NAME,
+            KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        state = cached(DynamoDBState)(TABLE_NAME, REGION_NAME)
+        state.set("cached_key", {"test": 1})
+        assert state.get("cached_key") == {"test": 1}
+        assert state.set_versioned("cached_key", {"test": 2}, version=1) == 2
+        assert state.get("cached_key") == {"test": 2}
@@ -0,0 +1,138 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import gc
+import threading
+import time
+
+import pytest
+
+from geniusrise.core.state import InMemoryState, MetricsHistory, SystemSampler
+
+
+# Test that the history keeps the most recent samples once full
+def test_metrics_history_ring_buffer():
+    history = MetricsHistory(capacity=5)
+    for i in range(12):
+        history.append(float(i), float(i * 10), 50.0)
+
+    assert len(history) == 5
+    samples = history.samples()
+    assert samples["timestamp"] == [7.0, 8.0, 9.0, 10.0, 11.0]
+    assert samples["cpu_usage"] == [70.0, 80.0, 90.0, 100.0, 110.0]
+
+
+# Test the on-demand aggregates
+def test_metrics_history_aggregate():
+    history = MetricsHistory(capacity=100)
+    assert history.aggregate() == {}
+
+    for i in range(1, 101):
+        history.append(float(i), float(i), 25.0)
+
+    aggregates = history.aggregate()
+    assert aggregates["samples"] == 100
+    assert aggregates["since"] == 1.0
+    assert aggregates["until"] == 100.0
+    assert aggregates["cpu_usage"] == {"min": 1.0, "max": 100.0, "mean": 50.5, "p95": 95.0}
+    assert aggregates["memory_usage"]["p95"] == 25.0
+
+    history.clear()
+    assert len(history) == 0
+
+
+# Test that an empty history is rejected
+def test_metrics_history_invalid_capacity():
+    with pytest.raises(ValueError):
+        MetricsHistory(capacity=0)
+
+
+# Test that state writes carry host information and aggregates, not raw samples
+def test_state_metrics_summary():
+    state = InMemoryState()
+    while state.sampler.latest is None:
+        time.sleep(0.01)
+    state.capture_metrics()
+    state.set_state("test_key", {"test": "data"})
+
+    metrics = state.get_state("test_key")["metrics"]
+    assert metrics["hostname"] == state.hostname
+    assert metrics["samples"] >= 1
+    assert set(metrics["cpu_usage"]) == {"min", "max", "mean", "p95"}
+    assert len(state.metrics_history) <= 1
+
+
+# Test that state operations reuse the sampler's latest sample instead of sampling themselves
+def test_state_capture_metrics_cached(monkeypatch):
+    def sample():
+        raise AssertionError("sampled on the calling thread")
+
+    state = InMemoryState()
+    while state.sampler.latest is None:
+        time.sleep(0.01)
+    monkeypatch.setattr(SystemSampler, "sample", staticmethod(sample))
+    state.flush_metrics()
+    state.get_state("test_key")
+    assert len(state.metrics_history) == 1
+
+    state.sampler.configure(None)
+    try:
+        state.flush_metrics()
+        state.time_function(lambda: None)
+        assert len(state.metrics_history) == 0
+    finally:
+        state.sampler.configure(1)
+
+
+# Test that all state managers share one lazily started sampler
+def test_system_sampler_shared():
+    SystemSampler.instance().configure(0.05)
+    states = [InMemoryState() for _ in range(5)]
+    assert all(state.sampler is SystemSampler.instance() for state in states)
+
+    time.sleep(0.3)
+    samplers = [thread for thread in threading.enumerate() if thread.name == "SystemSampler"]
+    assert len(samplers) == 1
+    assert all(len(state.metrics_history) >= 1 for state in states)
+    SystemSampler.instance().configure(1)
+
+
+# Test that sampling can be turned off and that subscribers are held weakly
+def test_system_sampler_configure():
+    sampler = SystemSampler(interval=None)
+    samples = []
+    sampler.subscribe(samples.append)
+    time.sleep(0.1)
+    assert samples == []
+
+    sampler.configure(0.02)
+    time.sleep(0.2)
+    assert len(samples) >= 2
+
+    sampler.configure(None)
+    time.sleep(0.1)
+    count = len(samples)
+    time.sleep(0.1)
+    assert len(samples) == count
+
+    state = InMemoryState()
+    sampler.subscribe(state.record_sample)
+    del state
+    gc.collect()
+    sampler.configure(0.02)
+    time.sleep(0.1)
+    assert len(sampler._subscribers) == 1
+    sampler.configure(None)
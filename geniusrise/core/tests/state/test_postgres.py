@@ -14,8 +14,13 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import json
+import threading
+import time
 import uuid
+from datetime import datetime
 
+import jsonpickle
 import psycopg2
 import pytest
 from psycopg2 import sql
@@ -57,7 +62,7 @@ def postgres_state_manager():
 
 # Test that the PostgresState can be initialized
 def test_postgres_state_manager_init(postgres_state_manager):
-    assert postgres_state_manager.conn is not None
+    assert postgres_state_manager.pool is not None
 
 
 # Test that the PostgresState can get state
@@ -79,3 +84,165 @@ def test_postgres_state_manager_set_state(postgres_state_manager):
 
     # Check that the state was set correctly
     assert postgres_state_manager.get_state(key)["test"] == "data"
+
+
+# Benchmark set_state ops/s with and without write-behind
+def test_postgres_state_manager_set_state_benchmark(postgres_state_manager):
+    n_ops = 1000
+    keys = [str(uuid.uuid4()) for _ in range(100)]
+    rates = {}
+    for write_behind in (False, True):
+        state = PostgresState(
+            HOST, PORT, USER, PASSWORD, DATABASE, TABLE, write_behind=write_behind, flush_interval=0.1
+        )
+        start = time.time()
+        for i in range(n_ops):
+            state.set_state(keys[i % 100], {"test": i})
+        state.close()
+        rates[write_behind] = n_ops / (time.time() - start)
+        assert state.get(keys[(n_ops - 1) % 100])["test"] == n_ops - 1
+    assert rates[True] > rates[False], f"set_state ops/s by write_behind: {rates}"
+
+
+# Test batched upserts and bulk reads
+def test_postgres_state_manager_get_set_many(postgres_state_manager):
+    items = {str(uuid.uuid4()): {"test": i} for i in range(500)}
+    postgres_state_manager.set_many(items)
+    postgres_state_manager.set_many({key: {"test": -1} for key in list(items)[:10]})
+
+    missing = str(uuid.uuid4())
+    states = postgres_state_manager.get_many(list(items) + [missing])
+    assert states[missing] is None
+    assert [states[key]["test"] for key in list(items)[:12]] == [-1] * 10 + [10, 11]
+
+
+# Test that the manager can be shared across threads
+def test_postgres_state_manager_threads():
+    state = PostgresState(HOST, PORT, USER, PASSWORD, DATABASE, TABLE, max_connections=4)
+    keys = [str(uuid.uuid4()) for _ in range(16)]
+
+    def worker(key):
+        for i in range(20):
+            state.set(key, {"test": i})
+            assert state.get(key)["test"] == i
+
+    threads = [threading.Thread(target=worker, args=(key,)) for key in keys]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(value["test"] == 19 for value in state.get_many(keys).values())
+
+
+# Test that dropped connections are replaced
+def test_postgres_state_manager_reconnect(postgres_state_manager):
+    key = str(uuid.uuid4())
+    postgres_state_manager.set(key, {"test": "data"})
+
+    conn = psycopg2.connect(host=HOST, port=PORT, user=USER, password=PASSWORD, database=DATABASE)
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = %s AND pid <> pg_backend_pid()",
+            (DATABASE,),
+        )
+    conn.close()
+
+    assert postgres_state_manager.get(key)["test"] == "data"
+
+
+# Test that states are stored as native JSONB
+def test_postgres_state_manager_native_jsonb(postgres_state_manager):
+    key = str(uuid.uuid4())
+    postgres_state_manager.set(key, {"test": "data", "nested": {"count": 1}})
+
+    conn = psycopg2.connect(host=HOST, port=PORT, user=USER, password=PASSWORD, database=DATABASE)
+    with conn.cursor() as cur:
+        cur.execute(
+            sql.SQL("SELECT value->'nested'->>'count' FROM {} WHERE key = %s").format(sql.Identifier(TABLE)), (key,)
+        )
+        assert cur.fetchone()[0] == "1"
+    conn.close()
+
+
+# Test partial updates and atomic increments
+def test_postgres_state_manager_update_fields(postgres_state_manager):
+    key = str(uuid.uuid4())
+    postgres_state_manager.set(key, {"status": "running", "offsets": {"p0": 1}, "processed": 0})
+
+    state = postgres_state_manager.update_fields(key, {"status": "done", "offsets.p1": 7})
+    assert state == {"status": "done", "offsets": {"p0": 1, "p1": 7}, "processed": 0}
+
+    threads = [threading.Thread(target=postgres_state_manager.increment, args=(key, "processed")) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert postgres_state_manager.increment(key, "offsets.p0", 2) == 3
+    assert postgres_state_manager.get(key)["processed"] == 20
+
+    new_key = str(uuid.uuid4())
+    assert postgres_state_manager.increment(new_key, "counters.seen") == 1
+    assert postgres_state_manager.get(new_key) == {"counters": {"seen": 1}}
+
+
+# Test server-side field projection
+def test_postgres_state_manager_get_fields(postgres_state_manager):
+    key = str(uuid.uuid4())
+    postgres_state_manager.set(key, {"status": "running", "offsets": {"p0": 1}, "blob": "x" * 10000})
+
+    assert postgres_state_manager.get(key, fields=["status", "offsets.p0", "missing"]) == {
+        "status": "running",
+        "offsets.p0": 1,
+        "missing": None,
+    }
+    assert postgres_state_manager.get(str(uuid.uuid4()), fields=["status"]) is None
+
+
+# Test that native states shaped like the legacy wrapper are not misread
+def test_postgres_state_manager_data_field(postgres_state_manager):
+    key = str(uuid.uuid4())
+    postgres_state_manager.set(key, {"data": "42"})
+    assert postgres_state_manager.get(key) == {"data": "42"}
+    assert postgres_state_manager.get_many([key]) == {key: {"data": "42"}}
+
+
+# Test that rows written by earlier versions are read, patched and migrated
+def test_postgres_state_manager_legacy_rows(postgres_state_manager):
+    key = str(uuid.uuid4())
+    conn = psycopg2.connect(host=HOST, port=PORT, user=USER, password=PASSWORD, database=DATABASE)
+    with conn.cursor() as cur:
+        cur.execute(
+            sql.SQL("INSERT INTO {} (key, value, encoding) VALUES (%s, %s, 'jsonpickle')").format(
+                sql.Identifier(TABLE)
+            ),
+            (key, json.dumps({"data": jsonpickle.encode({"status": "running", "processed": 1})})),
+        )
+    conn.commit()
+
+    assert postgres_state_manager.get(key) == {"status": "running", "processed": 1}
+    assert postgres_state_manager.get(key, fields=["status"]) == {"status": "running"}
+    assert postgres_state_manager.increment(key, "processed") == 2
+    assert postgres_state_manager.update_fields(key, {"status": "done"}) == {"status": "done", "processed": 2}
+
+    other = str(uuid.uuid4())
+    with conn.cursor() as cur:
+        cur.execute(
+            sql.SQL("INSERT INTO {} (key, value, encoding) VALUES (%s, %s, 'jsonpickle')").format(
+                sql.Identifier(TABLE)
+            ),
+            (other, json.dumps({"data": jsonpickle.encode({"status": "idle"})})),
+        )
+        conn.commit()
+        assert postgres_state_manager.migrate() >= 1
+        cur.execute(sql.SQL("SELECT value, encoding FROM {} WHERE key = %s").format(sql.Identifier(TABLE)), (other,))
+        assert cur.fetchone() == ({"status": "idle"}, "json")
+    conn.close()
+
+
+# Test that values which are not plain JSON are rejected
+def test_postgres_state_manager_non_json(postgres_state_manager):
+    with pytest.raises(ValueError):
+        postgres_state_manager.set(str(uuid.uuid4()), {"when": datetime.now()})
+    with pytest.raises(ValueError):
+        postgres_state_manager.set(str(uuid.uuid4()), {"ratio": float("nan")})
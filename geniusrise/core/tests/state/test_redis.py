@@ -14,7 +14,11 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import time
+
+import fakeredis
 import pytest
+import redis  # type: ignore
 
 from geniusrise.core.state import RedisState
 
@@ -54,3 +58,65 @@ def test_redis_state_manager_set_state(redis_state_manager):
 
     # Check that the state was set correctly
     assert redis_state_manager.get_state(key) == value
+
+
+# Benchmark set_state ops/s with and without write-behind
+def test_redis_state_manager_set_state_benchmark():
+    n_ops = 2000
+    rates = {}
+    for write_behind in (False, True):
+        state = RedisState(HOST, PORT, DB, write_behind=write_behind, flush_interval=0.1)
+        start = time.time()
+        for i in range(n_ops):
+            state.set_state(f"benchmark_key_{i % 100}", {"test": i})
+        state.close()
+        rates[write_behind] = n_ops / (time.time() - start)
+        assert state.get(f"benchmark_key_{(n_ops - 1) % 100}")["test"] == n_ops - 1
+    assert rates[True] > rates[False], f"set_state ops/s by write_behind: {rates}"
+
+
+# Test that state managers of the same database share a connection pool
+def test_redis_state_manager_shared_pool(redis_state_manager):
+    other = RedisState(HOST, PORT, DB)
+    assert other.redis.connection_pool is redis_state_manager.redis.connection_pool
+
+
+# Test bulk get and set
+def test_redis_state_manager_get_set_many(redis_state_manager):
+    items = {f"bulk_key_{i}": {"test": i} for i in range(100)}
+    redis_state_manager.set_many(items)
+
+    states = redis_state_manager.get_many(list(items) + ["missing_key"])
+    assert states["missing_key"] is None
+    assert all(states[key] == value for key, value in items.items())
+
+
+# Test per-key expiry
+def test_redis_state_manager_expire():
+    state = RedisState(HOST, PORT, DB, expire=1)
+    state.set("expiring_key", {"test": "data"})
+    state.set_many({"expiring_bulk_key": {"test": "data"}}, expire=1)
+    assert 0 < state.redis.ttl("expiring_key") <= 1
+    assert 0 < state.redis.ttl("expiring_bulk_key") <= 1
+
+
+# Benchmark a 10k-key checkpoint, one key at a time against get_many/set_many, on a fakeredis server
+def test_redis_state_manager_bulk_benchmark():
+    pool = redis.ConnectionPool(server=fakeredis.FakeServer(), connection_class=fakeredis.FakeConnection)
+    state = RedisState(HOST, PORT, DB, pool=pool)
+    items = {f"checkpoint_{i}": {"offset": i, "partition": i % 8} for i in range(10000)}
+
+    start = time.time()
+    for key, value in items.items():
+        state.set(key, value)
+    for key in items:
+        state.get(key)
+    single = 2 * len(items) / (time.time() - start)
+
+    start = time.time()
+    state.set_many(items)
+    states = state.get_many(items)
+    bulk = 2 * len(items) / (time.time() - start)
+
+    assert states == items
+    assert bulk > single, f"single-key: {single:.0f} ops/s, get_many/set_many: {bulk:.0f} ops/s"
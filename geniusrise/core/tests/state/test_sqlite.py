@@ -0,0 +1,147 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+import time
+
+import fakeredis
+import pytest
+import redis  # type: ignore
+
+from geniusrise.core.state import InMemoryState, RedisState, SQLiteState
+
+
+# Define a fixture for your SQLiteState
+@pytest.fixture
+def sqlite_state_manager(tmp_path):
+    state = SQLiteState(path=str(tmp_path / "state.db"))
+    yield state
+    state.close()
+
+
+# Test that the SQLiteState can be initialized in WAL mode
+def test_sqlite_state_manager_init(sqlite_state_manager):
+    assert sqlite_state_manager.connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+# Test that the SQLiteState can get state
+def test_sqlite_state_manager_get_state(sqlite_state_manager):
+    # First, set some state
+    key = "test_key"
+    value = {"test": "data"}
+    sqlite_state_manager.set_state(key, value)
+
+    # Then, get the state and check that it's correct
+    assert sqlite_state_manager.get_state(key) == value
+
+
+# Test that the SQLiteState can set state
+def test_sqlite_state_manager_set_state(sqlite_state_manager):
+    key = "test_key"
+    value = {"test": "data"}
+    sqlite_state_manager.set_state(key, value)
+
+    # Check that the state was set correctly
+    assert sqlite_state_manager.get(key) == value
+    assert sqlite_state_manager.get("missing_key") is None
+
+
+# Test bulk get and set
+def test_sqlite_state_manager_get_set_many(sqlite_state_manager):
+    items = {f"bulk_key_{i}": {"test": i} for i in range(1200)}
+    sqlite_state_manager.set_many(items)
+
+    states = sqlite_state_manager.get_many(list(items) + ["missing_key"])
+    assert states["missing_key"] is None
+    assert all(states[key] == value for key, value in items.items())
+
+
+# Test that a failed batch is rolled back as a whole
+def test_sqlite_state_manager_set_many_rollback(sqlite_state_manager):
+    with pytest.raises(Exception):
+        # a key that cannot be bound fails the second insert
+        sqlite_state_manager.set_many({"good_key": {"test": 1}, ("bad", "key"): {"test": 2}})  # type: ignore
+    assert sqlite_state_manager.get("good_key") is None
+
+
+# Test that state survives reopening the database
+def test_sqlite_state_manager_reopen(tmp_path):
+    path = str(tmp_path / "state.db")
+    state = SQLiteState(path=path, write_behind=True, flush_interval=60)
+    state.set_state("test_key", {"test": "data"})
+    state.close()
+
+    reopened = SQLiteState(path=path)
+    assert reopened.get("test_key")["test"] == "data"
+    reopened.close()
+
+
+# Test that many threads can share a manager
+def test_sqlite_state_manager_threads(sqlite_state_manager):
+    def work(t):
+        for i in range(200):
+            sqlite_state_manager.set_state(f"key_{t}_{i}", {"test": i})
+            assert sqlite_state_manager.get_state(f"key_{t}_{i}")["test"] == i
+
+    threads = [threading.Thread(target=work, args=(t,)) for t in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(sqlite_state_manager.get_many(f"key_{t}_{i}" for t in range(4) for i in range(200))) == 800
+
+
+# Test that reads do not wait for the writer, and that in-memory databases read through the writer
+def test_sqlite_state_manager_readers(sqlite_state_manager, tmp_path):
+    sqlite_state_manager.set("test_key", {"test": 1})
+    with sqlite_state_manager._lock:
+        assert sqlite_state_manager.get("test_key") == {"test": 1}
+
+    state = SQLiteState(path=":memory:")
+    state.set("test_key", {"test": 2})
+    assert state.get_many(["test_key", "missing_key"]) == {"test_key": {"test": 2}, "missing_key": None}
+    state.close()
+
+
+# Test that an unknown synchronous level is rejected
+def test_sqlite_state_manager_invalid_synchronous(tmp_path):
+    with pytest.raises(ValueError):
+        SQLiteState(path=str(tmp_path / "state.db"), synchronous="SOMETIMES")
+
+
+# Benchmark a 10k-key checkpoint against the in-memory and (fake) Redis backends
+def test_sqlite_state_manager_benchmark(tmp_path):
+    items = {f"checkpoint_{i}": {"offset": i, "partition": i % 8} for i in range(10000)}
+    pool = redis.ConnectionPool(server=fakeredis.FakeServer(), connection_class=fakeredis.FakeConnection)
+    backends = {
+        "memory": InMemoryState(),
+        "sqlite": SQLiteState(path=str(tmp_path / "state.db")),
+        "fakeredis": RedisState("localhost", 6379, 0, pool=pool),
+    }
+    for name, state in backends.items():
+        start = time.time()
+        for key in list(items)[:1000]:
+            state.set(key, items[key])
+        single = 1000 / (time.time() - start)
+
+        start = time.time()
+        state.set_many(items)
+        states = state.get_many(items)
+        bulk = 2 * len(items) / (time.time() - start)
+
+        assert states == items, f"{name}: single-key set {single:.0f} ops/s, get_many/set_many {bulk:.0f} ops/s"
+        state.close()
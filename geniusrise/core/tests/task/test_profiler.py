@@ -0,0 +1,83 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import os
+import tracemalloc
+
+import pytest
+from prometheus_client import CollectorRegistry
+
+from geniusrise.core.task import Profiler
+
+
+def work(n):
+    return sum(len(str(i)) for i in [list(range(10)) for _ in range(n)])
+
+
+# Test that a profiled call records timings, artifacts and histograms
+def test_profiler_run(tmp_path):
+    registry = CollectorRegistry()
+    profiler = Profiler(registry, profile_dir=str(tmp_path))
+    assert profiler.run("work", work, 1000) == work(1000)
+
+    summary = profiler.last
+    assert summary["status"] == "success"
+    assert summary["wall_time"] > 0 and summary["cpu_time"] > 0 and summary["peak_rss"] > 0
+    assert "net_allocated_blocks" not in summary
+    (artifact,) = os.listdir(tmp_path)
+    assert json.load(open(tmp_path / artifact))["method"] == "work"
+    assert registry.get_sample_value("method_wall_seconds_count", {"method": "work"}) == 1
+
+
+# Test the cProfile and tracemalloc tools
+def test_profiler_tools(tmp_path):
+    registry = CollectorRegistry()
+    profiler = Profiler(registry, tools=["cprofile", "tracemalloc"], profile_dir=str(tmp_path))
+    profiler.run("work", work, 10000)
+
+    summary = profiler.last
+    assert summary["traced_peak_bytes"] > 0
+    assert os.path.exists(summary["cprofile"])
+    assert "work" in summary["hot_paths"]
+    assert registry.get_sample_value("method_net_allocated_blocks_count", {"method": "work"}) == 1
+
+
+# Test that the traced peak of a call does not include earlier allocations when tracing is already on
+def test_profiler_tracemalloc_reset_peak(tmp_path):
+    profiler = Profiler(CollectorRegistry(), tools=["tracemalloc"], profile_dir=str(tmp_path))
+    tracemalloc.start()
+    try:
+        garbage = bytearray(50 * 2**20)
+        del garbage
+        profiler.run("work", work, 10)
+    finally:
+        tracemalloc.stop()
+    assert profiler.last["traced_peak_bytes"] < 10 * 2**20
+
+
+# Test that failing calls are profiled too
+def test_profiler_failure(tmp_path):
+    profiler = Profiler(CollectorRegistry(), profile_dir=str(tmp_path))
+    with pytest.raises(ZeroDivisionError):
+        profiler.run("fail", lambda: 1 / 0)
+    assert profiler.last["status"] == "failed"
+
+
+# Test that an unknown tool is rejected
+def test_profiler_invalid_tool():
+    with pytest.raises(ValueError):
+        Profiler(CollectorRegistry(), tools=["pyinstrument"])
@@ -0,0 +1,118 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import threading
+import time
+
+import pytest
+from prometheus_client import Counter
+
+from geniusrise.core.state import InMemoryState
+from geniusrise.core.task import WorkerPool
+
+
+class CountingTask:
+    def __init__(self, index=0, marker=None):
+        self.index = index
+        self.state = InMemoryState()
+        self.processed = Counter("processed", "Processed records", registry=self.state.registry)
+        self.marker = marker
+
+    def __call__(self, method_name, n, fail=False, sleep=0.0):
+        self.processed.inc(n)
+        # Crash the first run, leaving the marker file behind
+        if self.marker and not os.path.exists(self.marker):
+            open(self.marker, "w").close()
+            raise RuntimeError("first run")
+        if fail:
+            raise RuntimeError("always")
+        time.sleep(sleep)
+
+
+# Test that all workers run and their metrics are summed
+def test_workers_run():
+    pool = WorkerPool(CountingTask, workers=3, metrics_interval=0.1)
+    assert pool.run("process", 5) == {0: 0, 1: 0, 2: 0}
+
+    assert pool.registry.get_sample_value("processed_total") == 15
+    assert pool.registry.get_sample_value("workers_alive") == 0
+    assert pool.registry.get_sample_value("worker_restarts_total") == 0
+
+
+# Test that crashed workers are restarted and the totals of crashed runs are kept
+def test_workers_restart(tmp_path):
+    pool = WorkerPool(lambda index: CountingTask(index, str(tmp_path / "crashed")), workers=1, restart_delay=0.01)
+    assert pool.run("process", 2) == {0: 0}
+
+    assert pool.restarts == {0: 1}
+    assert pool.registry.get_sample_value("worker_restarts_total") == 1
+    assert pool.registry.get_sample_value("processed_total") == 4
+
+
+# Test that the supervisor gives up on workers that keep crashing
+def test_workers_max_restarts():
+    pool = WorkerPool(CountingTask, workers=2, max_restarts=2, restart_delay=0.01)
+    assert pool.run("process", 1, fail=True) == {0: 1, 1: 1}
+
+    assert pool.restarts == {0: 2, 1: 2}
+    assert pool.registry.get_sample_value("processed_total") == 6
+
+
+# Test that stopping the pool terminates the workers and collects their last metrics
+def test_workers_stop():
+    pool = WorkerPool(CountingTask, workers=2)
+    threading.Timer(1.0, pool.stop).start()
+
+    started = time.time()
+    assert pool.run("process", 3, sleep=60) == {0: 0, 1: 0}
+    assert time.time() - started < 30
+    assert pool.registry.get_sample_value("processed_total") == 6
+
+
+# Test that each worker creates its task from its own index
+def test_workers_index(tmp_path):
+    def create(index):
+        os.makedirs(tmp_path / f"worker-{index}")
+        return CountingTask(index)
+
+    assert WorkerPool(create, workers=3).run("process", 1) == {0: 0, 1: 0, 2: 0}
+    assert sorted(os.listdir(tmp_path)) == ["worker-0", "worker-1", "worker-2"]
+
+
+# Test that workers close their input and output, also when the method failed
+def test_workers_close_data(tmp_path):
+    class Data:
+        def __init__(self, path):
+            self.path = path
+
+        def close(self):
+            open(self.path, "a").close()
+
+    def create(index):
+        task = CountingTask(index)
+        task.input = Data(str(tmp_path / f"input-{index}"))
+        task.output = Data(str(tmp_path / f"output-{index}"))
+        return task
+
+    assert WorkerPool(create, workers=1).run("process", 1) == {0: 0}
+    assert WorkerPool(lambda index: create(index + 1), workers=1, max_restarts=0).run("process", 1, fail=True) == {0: 1}
+    assert sorted(os.listdir(tmp_path)) == ["input-0", "input-1", "output-0", "output-1"]
+
+
+def test_workers_invalid():
+    with pytest.raises(ValueError):
+        WorkerPool(CountingTask, workers=0)
@@ -14,49 +14,527 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import atexit
+import json
 import logging
-from typing import Any, Optional
+import os
+import queue
+import threading
+import weakref
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import colorlog
+from geniusrise.core.data import StreamingOutput
 from geniusrise.core.state import State
 
 from geniusrise.config import LOGLEVEL
 
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None  # type: ignore
+
+# Records waiting to be formatted and emitted by the listener thread, records beyond this are dropped
+LOG_QUEUE_SIZE = 10000
+
+# Fields of the running task, added to every record logged inside `log_context`
+CONTEXT_FIELDS = ("task_id", "task", "method")
+_log_context: ContextVar[Dict[str, Any]] = ContextVar("geniusrise_log_context", default={})
+
+
+@contextmanager
+def log_context(**fields: Any) -> Iterator[None]:
+    """
+    🏷️ Add fields, like `task_id`, `task` and `method`, to the records logged inside the block.
+
+    ## Usage:
+    ```python
+    with log_context(task_id=bolt.id, task="MyBolt", method="process"):
+        logger.info("Processing")  # the record has task_id, task and method attributes
+    ```
+    """
+    token = _log_context.set({**_log_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """
+    🏷️ **ContextFilter**: Copies the fields of the current `log_context` onto each record.
+
+    It runs on the logging thread, before records are handed to the listener thread.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for field, value in _log_context.get().items():
+            if not hasattr(record, field):
+                setattr(record, field, value)
+        return True
+
+
+def _dumps(entry: Dict[str, Any]) -> bytes:
+    if orjson:
+        return orjson.dumps(entry, default=str)
+    return json.dumps(entry, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    🛠️ **JSONFormatter**: Formats records as compact, single-line JSON.
+
+    Each entry has the timestamp, level, logger name and message, the task fields of the
+    `log_context` the record was logged in, and the traceback of exceptions.
+    """
+
+    def to_dict(self, record: logging.LogRecord) -> Dict[str, Any]:
+        """
+        Convert a record to a structured log entry.
+
+        Args:
+            record (logging.LogRecord): The record.
+
+        Returns:
+            Dict[str, Any]: The log entry.
+        """
+        entry: Dict[str, Any] = {
+            "timestamp": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return entry
+
+    def format(self, record: logging.LogRecord) -> str:
+        return _dumps(self.to_dict(record)).decode("utf-8")
+
+
+class LogSink(ABC):
+    """
+    📦 **LogSink**: Destination of batches of structured log entries, see `BatchingHandler`.
+
+    Attributes:
+        loggers (Tuple[str, ...]): Loggers used while writing, their records are not shipped to the
+            sink, so a failing sink does not feed on its own errors.
+        destination (Tuple[Any, ...]): Where the entries end up, `setup_logger` ships to each
+            destination once however many bolts and spouts ask for it.
+    """
+
+    loggers: Tuple[str, ...] = ()
+    destination: Tuple[Any, ...] = ()
+
+    @abstractmethod
+    def write(self, entries: List[Dict[str, Any]]) -> None:
+        """
+        Ship a batch of log entries.
+
+        Args:
+            entries (List[Dict[str, Any]]): The log entries, oldest first.
+        """
+        pass
+
+    def close(self) -> None:
+        """
+        Release the resources of the sink.
+        """
+        pass
+
+
+class FileSink(LogSink):
+    """
+    📁 **FileSink**: Appends log entries as JSON lines to a local file, rotated by size.
+
+    The file is renamed to `path.1` once it would grow beyond `max_bytes`, earlier rotations
+    move up to `path.<backup_count>` and the oldest one is deleted.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 100 * 1024 * 1024, backup_count: int = 5) -> None:
+        """
+        Args:
+            path (str): The log file.
+            max_bytes (int): Size at which the file is rotated. Defaults to 100MB.
+            backup_count (int): Number of rotated files kept. Defaults to 5.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.destination = FileSink.destination_of(path)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "ab")
+
+    @staticmethod
+    def destination_of(path: str) -> Tuple[Any, ...]:
+        return ("file", os.path.abspath(path))
+
+    def _rotate(self) -> None:
+        self._file.close()
+        if self.backup_count:
+            for i in range(self.backup_count - 1, 0, -1):
+                if os.path.exists(f"{self.path}.{i}"):
+                    os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+            self._file = open(self.path, "ab")
+        else:
+            self._file = open(self.path, "wb")
+
+    def write(self, entries: List[Dict[str, Any]]) -> None:
+        data = b"".join(_dumps(entry) + b"\n" for entry in entries)
+        if self._file.tell() and self._file.tell() + len(data) > self.max_bytes:
+            self._rotate()
+        self._file.write(data)
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class KafkaSink(LogSink):
+    """
+    📨 **KafkaSink**: Sends each log entry as a message to a Kafka topic through a `StreamingOutput`.
+
+    Messages are batched by the producer, they are flushed when the sink is closed.
+    """
+
+    def __init__(self, output: StreamingOutput) -> None:
+        """
+        Args:
+            output (StreamingOutput): The output to send log entries to.
+        """
+        self.output = output
+        self.loggers = (output.log.name, "kafka")
+        servers = output.producer.config["bootstrap_servers"] if output.producer else None
+        self.destination = KafkaSink.destination_of(output.output_topic, servers)
+
+    @staticmethod
+    def destination_of(topic: str, servers: Any) -> Tuple[Any, ...]:
+        return ("kafka", topic, str(servers))
+
+    def write(self, entries: List[Dict[str, Any]]) -> None:
+        self.output.save_bulk(entries)
+
+    def close(self) -> None:
+        self.output.flush()
+
+
+class StateSink(LogSink):
+    """
+    🗄️ **StateSink**: Writes each batch of log entries under its own key of a state backend.
+
+    Keys are `<key_prefix>/<timestamp of the first entry>/<batch number>`, so batches sort by time.
+    """
+
+    def __init__(self, state: State, key_prefix: str = "logs") -> None:
+        """
+        Args:
+            state (State): The state manager to write to.
+            key_prefix (str): Prefix of the keys. Defaults to "logs".
+        """
+        self.state = state
+        self.key_prefix = key_prefix
+        self.loggers = (state.log.name,)
+        self.destination = ("state", id(state), key_prefix)
+        self._batches = 0
+
+    def write(self, entries: List[Dict[str, Any]]) -> None:
+        self._batches += 1
+        self.state.set(f"{self.key_prefix}/{entries[0]['timestamp']:.6f}/{self._batches}", {"logs": entries})
+
+
+class BatchingHandler(logging.Handler):
+    """
+    🛠️ **BatchingHandler**: Collects structured log entries and ships them to a `LogSink` in batches.
+
+    A batch is shipped once it holds `batch_size` entries, or `flush_interval` seconds after the
+    previous one, whichever comes first.
+
+    Attributes:
+        failed (int): Entries lost because the sink failed to write them.
+    """
+
+    def __init__(self, sink: LogSink, batch_size: int = 100, flush_interval: float = 1.0) -> None:
+        """
+        Args:
+            sink (LogSink): Where to ship the batches.
+            batch_size (int): Entries per batch. Defaults to 100.
+            flush_interval (float): Seconds after which a partial batch is shipped. Defaults to 1.
+        """
+        super().__init__()
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.failed = 0
+        self.formatter: JSONFormatter = JSONFormatter()
+        self._batch: List[Dict[str, Any]] = []
+        self._stopped = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+        self._flusher.start()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if record.name.split(".")[0] in self.sink.loggers:
+            return
+        self._batch.append(self.formatter.to_dict(record))
+        if len(self._batch) >= self.batch_size:
+            self._ship()
+
+    def _ship(self) -> None:
+        batch, self._batch = self._batch, []
+        if not batch:
+            return
+        try:
+            self.sink.write(batch)
+        except Exception:
+            self.failed += len(batch)
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            self._ship()
+        finally:
+            self.release()
+
+    def _flush_periodically(self) -> None:
+        while not self._stopped.wait(self.flush_interval):
+            self.flush()
+
+    def close(self) -> None:
+        self._stopped.set()
+        self.flush()
+        self.sink.close()
+        super().close()
+
+
+def log_sinks(state: Optional[State] = None, **kwargs: Any) -> List[LogSink]:
+    """
+    📦 Create the log sinks named by the `log_sink` keyword argument of a bolt or spout.
+
+    Args:
+        state (Optional[State]): The state manager used by the "state" sink.
+        **kwargs: Keyword arguments of the bolt or spout.
+            ```
+            Keyword Arguments:
+                - log_sink (str): Comma-separated sinks: "file", "kafka" or "state".
+                - log_file (str): Log file of the "file" sink.
+                - log_file_max_bytes (int): Size at which the log file is rotated.
+                - log_kafka_topic (str): Topic of the "kafka" sink.
+                - log_kafka_cluster_connection_string (str): Kafka servers of the "kafka" sink.
+            ```
+
+    Returns:
+        List[LogSink]: The sinks, empty if `log_sink` is not set. Files and topics already shipped
+        to by another bolt or spout of this process are left out.
+
+    Raises:
+        ValueError: If a sink is unknown, or the state or the Kafka servers are missing.
+    """
+    sinks: List[LogSink] = []
+    with _listener_lock:
+        served = {handler.sink.destination for handler in _batching_handlers}
+    for name in filter(None, (kwargs.get("log_sink") or "").split(",")):
+        name = name.strip()
+        if name == "file":
+            path = kwargs.get("log_file", "geniusrise.log")
+            if FileSink.destination_of(path) not in served:
+                sinks.append(FileSink(path, max_bytes=kwargs.get("log_file_max_bytes", 100 * 1024 * 1024)))
+        elif name == "kafka":
+            topic = kwargs.get("log_kafka_topic", "geniusrise-logs")
+            servers = kwargs.get("log_kafka_cluster_connection_string")
+            if not servers:
+                raise ValueError("Log sink kafka requires log_kafka_cluster_connection_string.")
+            if KafkaSink.destination_of(topic, servers) not in served:
+                sinks.append(KafkaSink(StreamingOutput(topic, servers, profile="throughput")))
+        elif name == "state":
+            if state is None:
+                raise ValueError("Log sink state requires a state manager.")
+            sinks.append(StateSink(state))
+        else:
+            raise ValueError(f"Invalid log sink: {name}")
+    return sinks
+
 
 class StateHandler(logging.Handler):
     """
     🛠️ **StateHandler**: Handler for logging state changes.
 
     This class is used to capture logging via state module in geniusrise.
+    Warnings and errors are always captured, lower levels are sampled at `sample_rate`
+    so hot loops do not flood the state's bounded log buffer. The state is referenced weakly,
+    records are discarded once it is gone.
     """
 
-    def __init__(self, state_instance: State):
+    def __init__(self, state_instance: State, sample_rate: float = 1.0):
+        """
+        Args:
+            state_instance (State): The state manager to capture logs in.
+            sample_rate (float): Fraction of records below WARNING to capture, evenly spaced. Defaults to 1, all.
+        """
         super().__init__()
-        self.state = state_instance
+        self._state = weakref.ref(state_instance)
+        self.sample_rate = sample_rate
+        self._credit = 0.0
+
+    @property
+    def state(self) -> Optional[State]:
+        return self._state()
+
+    def _sampled(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.sample_rate >= 1:
+            return True
+        self._credit += self.sample_rate
+        if self._credit >= 1:
+            self._credit -= 1
+            return True
+        return False
 
     def emit(self, record: Any):
+        state = self.state
+        if state is None:
+            return
+        if not self._sampled(record):
+            state.logs_sampled_out.inc()
+            return
         log_entry = self.format(record)
-        self.state.capture_log(log_entry)
+        state.capture_log(log_entry)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    🛠️ **DroppingQueueHandler**: Hands records to a `QueueListener` without formatting them.
+
+    Only the message arguments are merged on the calling thread, formatting and I/O happen on the
+    listener thread. When the queue is full records are dropped and counted instead of blocking.
+
+    Attributes:
+        dropped (int): Records dropped because the queue was full.
+    """
+
+    def __init__(self, queue: "queue.Queue[logging.LogRecord]"):
+        super().__init__(queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the arguments now, they could change before the listener gets to the record
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
 
 
-def setup_logger(state_instance: Optional[State] = None) -> logging.Logger:
+_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+_queue_handler = DroppingQueueHandler(_queue)
+_queue_handler.addFilter(ContextFilter())
+_stream_handler: Optional[logging.Handler] = None
+_state_handlers: List[StateHandler] = []
+_batching_handlers: List[BatchingHandler] = []
+_listener: Optional[QueueListener] = None
+_listener_lock = threading.Lock()
+
+
+def _restart_listener() -> None:
+    """
+    Start the listener thread with the current handlers, draining the queue of the previous one first.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+    handlers = [h for h in [_stream_handler, *_state_handlers, *_batching_handlers] if h is not None]
+    _listener = QueueListener(_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def _reinit_after_fork() -> None:
+    """
+    Give a forked child its own queue, lock and listener, the parent's listener thread does not exist in it.
+    """
+    global _queue, _listener, _listener_lock
+    _queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _queue_handler.queue = _queue
+    _listener_lock = threading.Lock()
+    # The flusher threads of batching handlers are gone too, their sinks stay with the parent
+    _batching_handlers.clear()
+    _listener = None
+    if _stream_handler is not None or _state_handlers:
+        _restart_listener()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reinit_after_fork)
+
+
+@atexit.register
+def stop_logging() -> None:
+    """
+    🛑 Emit the queued records, stop the listener thread and ship the pending batches to their sinks.
+    """
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+        for handler in _batching_handlers:
+            handler.close()
+        _batching_handlers.clear()
+
+
+def setup_logger(
+    state_instance: Optional[State] = None,
+    sample_rate: float = 1.0,
+    structured: bool = False,
+    sinks: Optional[List[LogSink]] = None,
+    batch_size: int = 100,
+    flush_interval: float = 1.0,
+) -> logging.Logger:
     """
     🛠️ **Setup Logger**: Configure and return a logger with a default ColoredFormatter.
 
     This function sets up a logger for the `geniusrise-cli` with colorful logging outputs. The log level is determined by the `LOGLEVEL` from the configuration.
+    Records are put on a queue and formatted and written by a background `QueueListener`, so logging
+    does not block the calling thread. If a state manager is given, log lines are also captured in its bounded log buffer.
+    In structured mode records are formatted as compact JSON instead, and can be shipped in batches to log sinks.
 
     ## Usage:
     ```python
     logger = setup_logger()
     logger.info("This is a fancy info log!")
+
+    # JSON lines, also shipped to a rotating file in batches of 500
+    logger = setup_logger(structured=True, sinks=[FileSink("/var/log/bolt.jsonl")], batch_size=500)
     ```
 
+    Args:
+        state_instance (Optional[State]): State manager to capture log lines in. Defaults to None.
+        sample_rate (float): Fraction of records below WARNING captured in the state. Defaults to 1, all.
+        structured (bool): Format records as JSON instead of colored text. Defaults to False.
+        sinks (Optional[List[LogSink]]): Sinks to ship structured records to, sinks of a destination that
+            is already shipped to are closed and left out. Defaults to None.
+        batch_size (int): Records per batch shipped to the sinks. Defaults to 100.
+        flush_interval (float): Seconds after which a partial batch is shipped. Defaults to 1.
+
     Returns:
         logging.Logger: Configured logger with colorful outputs.
     """
+    global _stream_handler
+
     # Define the custom formatter
-    formatter = (
-        colorlog.ColoredFormatter(
+    formatter: logging.Formatter = (
+        JSONFormatter()
+        if structured
+        else colorlog.ColoredFormatter(
             "%(log_color)s%(levelname)-8s%(reset)s "
             "%(yellow)s[%(asctime)s] "
             "%(blue)s[%(name)s:%(lineno)d] "
@@ -91,15 +569,32 @@ def setup_logger(state_instance: Optional[State] = None) -> logging.Logger:
         logger = logging.getLogger("kafka")
         logger.setLevel(logging.WARN)
 
-    # Setup logger for geniusrise
-    handler = logging.StreamHandler()
-    handler.setFormatter(formatter)
+    # Setup logger for geniusrise, the stream handler runs on the listener thread
+    with _listener_lock:
+        if _stream_handler is None:
+            _stream_handler = logging.StreamHandler()
+        _stream_handler.setFormatter(formatter)
+
+        _state_handlers[:] = [h for h in _state_handlers if h.state is not None]
+        if state_instance and not any(h.state is state_instance for h in _state_handlers):
+            state_handler = StateHandler(state_instance, sample_rate=sample_rate)
+            state_handler.setFormatter(formatter)
+            _state_handlers.append(state_handler)
+            restart = True
+        else:
+            restart = _listener is None
 
-    if state_instance:
-        state_handler = StateHandler(state_instance)
-        state_handler.setFormatter(formatter)
+        for sink in sinks or []:
+            # Every handler sees every record, a second handler of the same destination would duplicate them
+            if sink.destination and any(h.sink.destination == sink.destination for h in _batching_handlers):
+                sink.close()
+                continue
+            _batching_handlers.append(BatchingHandler(sink, batch_size=batch_size, flush_interval=flush_interval))
+            restart = True
+        if restart:
+            _restart_listener()
 
-    logging.basicConfig(encoding="utf-8", level=logging.getLevelName(LOGLEVEL), handlers=[handler])
+    logging.basicConfig(encoding="utf-8", level=logging.getLevelName(LOGLEVEL), handlers=[_queue_handler])
     logger = logging.getLogger("geniusrise")
     logger.setLevel(logging.getLevelName(LOGLEVEL))
 
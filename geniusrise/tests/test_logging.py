@@ -0,0 +1,274 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import json
+import logging
+import queue
+import time
+from logging.handlers import QueueListener
+
+import colorlog
+import pytest
+
+from geniusrise.core.state import InMemoryState
+from geniusrise.logging import (
+    BatchingHandler,
+    ContextFilter,
+    DroppingQueueHandler,
+    FileSink,
+    JSONFormatter,
+    LogSink,
+    StateHandler,
+    StateSink,
+    log_context,
+    log_sinks,
+    setup_logger,
+)
+import geniusrise.logging as geniusrise_logging
+
+
+def _logger(name, handler):
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    return logger
+
+
+# Test that the state keeps a bounded number of log lines and counts the dropped ones
+def test_state_log_capture_bounded():
+    state = InMemoryState(log_capacity=10)
+    for i in range(25):
+        state.capture_log(f"line {i}")
+
+    logs = state.metrics_buffer["logs"]
+    assert len(logs) == 10
+    assert logs[0]["log"] == "line 15"
+    assert state.logs_dropped._value.get() == 15
+
+
+# Test that captured log lines are written with the next state write
+def test_state_log_capture_persisted():
+    state = InMemoryState(log_capacity=10)
+    state.capture_log("first")
+    state.capture_log("second")
+    state.set_state("test_key", {"test": "data"})
+
+    assert [entry["log"] for entry in state.get("test_key")["logs"]] == ["first", "second"]
+    assert "logs" not in state.metrics_buffer
+
+    state.set_state("test_key", {"test": "data"})
+    assert "logs" not in state.get("test_key")
+
+
+# Test that records below WARNING are sampled and warnings always captured
+def test_state_handler_sampling():
+    state = InMemoryState()
+    logger = _logger("test_state_handler_sampling", StateHandler(state, sample_rate=0.25))
+    for i in range(100):
+        logger.info(f"info {i}")
+    logger.warning("warning")
+
+    logs = state.metrics_buffer["logs"]
+    assert len(logs) == 26
+    assert logs[-1]["log"] == "warning"
+    assert state.logs_sampled_out._value.get() == 75
+
+
+# Test that the state handler does not keep its state alive
+def test_state_handler_weak_state():
+    handler = StateHandler(InMemoryState())
+    assert handler.state is None
+    handler.handle(logging.makeLogRecord({"msg": "orphan"}))
+
+
+# Test that queued records are emitted by the listener, with arguments merged on the calling thread
+def test_dropping_queue_handler():
+    records: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=5)
+    handler = DroppingQueueHandler(records)
+    logger = _logger("test_dropping_queue_handler", handler)
+    value = {"count": 1}
+    for _ in range(10):
+        logger.info("value %s", value)
+    value["count"] = 2
+
+    assert handler.dropped == 5
+    stream = io.StringIO()
+    emitter = logging.StreamHandler(stream)
+    listener = QueueListener(records, emitter)
+    listener.start()
+    listener.stop()
+    assert stream.getvalue().splitlines() == ["value {'count': 1}"] * 5
+
+
+# Test that setup_logger registers a state with the listener once
+def test_setup_logger_state():
+    state = InMemoryState()
+    setup_logger(state)
+    setup_logger(state)
+
+    assert sum(h.state is state for h in geniusrise_logging._state_handlers) == 1
+    assert geniusrise_logging._listener is not None
+    assert any(h.state is state for h in geniusrise_logging._listener.handlers if isinstance(h, StateHandler))
+
+
+# Benchmark the per-record cost on the logging thread, inline formatting and I/O against the queue
+def test_logging_benchmark(tmp_path):
+    n_records = 20000
+    formatter = colorlog.ColoredFormatter(
+        "%(log_color)s%(levelname)-8s%(reset)s %(yellow)s[%(asctime)s] %(blue)s[%(name)s:%(lineno)d] %(message)s"
+    )
+    costs = {}
+
+    with open(tmp_path / "inline.log", "w") as f:
+        handler = logging.StreamHandler(f)
+        handler.setFormatter(formatter)
+        logger = _logger("test_logging_benchmark_inline", handler)
+        start = time.perf_counter()
+        for i in range(n_records):
+            logger.info("processed record %d", i)
+        costs["inline"] = (time.perf_counter() - start) / n_records
+
+    with open(tmp_path / "queued.log", "w") as f:
+        records: "queue.Queue[logging.LogRecord]" = queue.Queue()
+        handler = logging.StreamHandler(f)
+        handler.setFormatter(formatter)
+        listener = QueueListener(records, handler)
+        listener.start()
+        logger = _logger("test_logging_benchmark_queued", DroppingQueueHandler(records))
+        start = time.perf_counter()
+        for i in range(n_records):
+            logger.info("processed record %d", i)
+        costs["queued"] = (time.perf_counter() - start) / n_records
+        listener.stop()
+
+    assert (tmp_path / "queued.log").read_text().count("processed record") == n_records
+    assert costs["queued"] < costs["inline"], ", ".join(
+        f"{name}: {cost * 1e6:.1f} us per record" for name, cost in costs.items()
+    )
+
+
+class ListSink(LogSink):
+    def __init__(self):
+        self.batches = []
+
+    def write(self, entries):
+        self.batches.append(entries)
+
+
+# Test that records are formatted as JSON with the fields of the log context
+def test_json_formatter_context():
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JSONFormatter())
+    handler.addFilter(ContextFilter())
+    logger = _logger("test_json_formatter_context", handler)
+
+    with log_context(task_id="TestBolt-1", task="TestBolt", method="process"):
+        logger.info("processed %d records", 10)
+    logger.info("outside")
+
+    inside, outside = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert inside["message"] == "processed 10 records"
+    assert inside["level"] == "INFO"
+    assert (inside["task_id"], inside["task"], inside["method"]) == ("TestBolt-1", "TestBolt", "process")
+    assert "task_id" not in outside
+
+
+# Test that batches are shipped by size and by time
+def test_batching_handler():
+    sink = ListSink()
+    handler = BatchingHandler(sink, batch_size=10, flush_interval=0.2)
+    logger = _logger("test_batching_handler", handler)
+    for i in range(25):
+        logger.info(f"record {i}")
+
+    assert [len(batch) for batch in sink.batches] == [10, 10]
+    time.sleep(0.5)
+    assert [len(batch) for batch in sink.batches] == [10, 10, 5]
+    assert sink.batches[2][-1]["message"] == "record 24"
+    handler.close()
+
+
+# Test that records of the sink's own loggers are not shipped to it
+def test_batching_handler_skips_sink_loggers():
+    sink = ListSink()
+    sink.loggers = ("test_sink_internals",)
+    handler = BatchingHandler(sink, batch_size=1)
+    _logger("test_sink_internals", handler).info("ignored")
+    _logger("test_batching_handler_skips", handler).info("shipped")
+    handler.close()
+
+    assert [batch[0]["message"] for batch in sink.batches] == ["shipped"]
+
+
+# Test that the file sink writes JSON lines and rotates by size
+def test_file_sink(tmp_path):
+    path = str(tmp_path / "bolt.jsonl")
+    sink = FileSink(path, max_bytes=1000, backup_count=2)
+    for i in range(100):
+        sink.write([{"message": f"record {i}", "padding": "x" * 50}])
+    sink.close()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["bolt.jsonl", "bolt.jsonl.1", "bolt.jsonl.2"]
+    lines = open(path).read().splitlines()
+    assert json.loads(lines[-1])["message"] == "record 99"
+    assert all(p.stat().st_size <= 1000 for p in tmp_path.iterdir())
+
+
+# Test that the state sink writes each batch under its own key
+def test_state_sink():
+    state = InMemoryState()
+    sink = StateSink(state)
+    sink.write([{"timestamp": 1.0, "message": "first"}])
+    sink.write([{"timestamp": 2.0, "message": "second"}])
+
+    keys = sorted(state.store)
+    assert keys == ["logs/1.000000/1", "logs/2.000000/2"]
+    assert state.store[keys[1]]["logs"][0]["message"] == "second"
+
+
+# Test that sinks are created from bolt and spout arguments
+def test_log_sinks(tmp_path):
+    state = InMemoryState()
+    sinks = log_sinks(state, log_sink="file,state", log_file=str(tmp_path / "bolt.jsonl"))
+    assert [type(sink) for sink in sinks] == [FileSink, StateSink]
+    assert log_sinks(state) == []
+    with pytest.raises(ValueError):
+        log_sinks(state, log_sink="carrier_pigeon")
+    for sink in sinks:
+        sink.close()
+
+
+# Test that the kafka sink needs its servers
+def test_log_sinks_kafka_servers():
+    with pytest.raises(ValueError):
+        log_sinks(log_sink="kafka", log_kafka_topic="logs")
+
+
+# Test that each destination gets one batching handler, however many tasks ask for it
+def test_setup_logger_sink_destinations(tmp_path):
+    path = str(tmp_path / "bolt.jsonl")
+    setup_logger(sinks=log_sinks(log_sink="file", log_file=path))
+    assert log_sinks(log_sink="file", log_file=path) == []
+    setup_logger(sinks=[FileSink(path)])
+
+    handlers = [h for h in geniusrise_logging._batching_handlers if h.sink.destination == ("file", path)]
+    assert len(handlers) == 1
+    _logger("test_sink_destinations", geniusrise_logging._queue_handler).warning("once")
+    geniusrise_logging.stop_logging()
+    assert [json.loads(line)["message"] for line in open(path)] == ["once"]